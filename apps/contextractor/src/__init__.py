@@ -1,5 +1,14 @@
 """Contextractor - Web content extraction using trafilatura."""
 
-from .main import main
+from typing import Any
 
 __all__ = ['main']
+
+
+def __getattr__(name: str) -> Any:
+    # Import the actor entry point (apify, crawlee, Playwright) only when used
+    if name == 'main':
+        from .main import main
+
+        return main
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import re
 from typing import Any
 
 from contextractor_engine import TrafilaturaConfig, normalize_config_keys
@@ -23,8 +24,10 @@ def build_trafilatura_config(raw: dict[str, Any] | None) -> TrafilaturaConfig:
 def build_crawl_config(actor_input: dict[str, Any]) -> dict[str, Any]:
     """Build crawl configuration from actor input.
 
-    Note: trafilatura_config_raw is passed as dict for JSON serialization in user_data.
-    The TrafilaturaConfig object is built in the handler.
+    The config is passed to the handler in `Request.user_data`, so it holds
+    only JSON-serializable values; the TrafilaturaConfig and extraction
+    variants are built once by the caller with build_trafilatura_config() and
+    build_extraction_variants().
 
     Args:
         actor_input: Raw actor input dictionary.
@@ -32,6 +35,7 @@ def build_crawl_config(actor_input: dict[str, Any]) -> dict[str, Any]:
     Returns:
         Normalized configuration dictionary for the request handler.
     """
+    trafilatura_config = build_trafilatura_config(actor_input.get('trafilaturaConfig'))
     return {
         'save_raw_html': actor_input.get('saveRawHtmlToKeyValueStore', False),
         'save_text': actor_input.get('saveExtractedTextToKeyValueStore', False),
@@ -39,16 +43,86 @@ def build_crawl_config(actor_input: dict[str, Any]) -> dict[str, Any]:
         'save_markdown': actor_input.get('saveExtractedMarkdownToKeyValueStore', True),
         'save_xml': actor_input.get('saveExtractedXmlToKeyValueStore', False),
         'save_xmltei': actor_input.get('saveExtractedXmlTeiToKeyValueStore', False),
-        'trafilatura_config_raw': actor_input.get('trafilaturaConfig', {}),  # Raw dict for JSON serialization
         'globs': actor_input.get('globs', []),
         'excludes': actor_input.get('excludes', []),
         'link_selector': actor_input.get('linkSelector', ''),
         'pseudo_urls': actor_input.get('pseudoUrls', []),
         'keep_url_fragments': actor_input.get('keepUrlFragments', False),
         'max_crawling_depth': actor_input.get('maxCrawlingDepth', 0),
+        'close_cookie_modals': actor_input.get('closeCookieModals', False),
+        'max_scroll_height': actor_input.get('maxScrollHeightPixels', 0),
+        'scroll_target_text_length': actor_input.get('scrollTargetTextLength', 0),
+        'compression': build_compression(actor_input.get('storageCompression')),
+        'inline_max_bytes': actor_input.get('inlineOutputMaxBytes', 0),
+        'large_page_threshold': actor_input.get('largePageThresholdChars', 0),
+        'near_duplicates': build_near_duplicates_mode(actor_input.get('nearDuplicates')),
+        'target_language': trafilatura_config.target_language,
+        'skip_language_alternates': actor_input.get('skipLanguageAlternates', True),
+        'boilerplate_templates': actor_input.get('learnBoilerplateTemplates', False),
     }
 
 
+def build_extraction_variants(raw: dict[str, Any] | None) -> dict[str, TrafilaturaConfig]:
+    """Build named config variants from the extractionVariants input.
+
+    Args:
+        raw: Mapping of variant name to a preset name (balanced, precision,
+            recall) or a trafilatura config object.
+
+    Returns:
+        TrafilaturaConfig per variant name, in input order.
+    """
+    presets = {
+        'balanced': TrafilaturaConfig.balanced,
+        'precision': TrafilaturaConfig.precision,
+        'recall': TrafilaturaConfig.recall,
+    }
+    variants: dict[str, TrafilaturaConfig] = {}
+    for name, value in (raw or {}).items():
+        # Names become part of key-value store keys
+        if not re.fullmatch(r'[A-Za-z0-9_-]{1,32}', name):
+            raise ValueError(f'Invalid extractionVariants name: {name!r}')
+        if isinstance(value, str):
+            if value.lower() not in presets:
+                raise ValueError(f'Unknown extractionVariants preset: {value}')
+            variants[name] = presets[value.lower()]()
+        else:
+            variants[name] = build_trafilatura_config(value)
+    return variants
+
+
+def build_compression(value: str | None) -> str | None:
+    """Map the storageCompression input to a content encoding.
+
+    Args:
+        value: One of NONE, GZIP, BROTLI (case-insensitive).
+
+    Returns:
+        Content encoding (`gzip` or `br`), or None for uncompressed storage.
+    """
+    encodings = {'NONE': None, 'GZIP': 'gzip', 'BROTLI': 'br'}
+    key = (value or 'NONE').upper()
+    if key not in encodings:
+        raise ValueError(f'Unsupported storageCompression: {value}')
+    return encodings[key]
+
+
+def build_near_duplicates_mode(value: str | None) -> str | None:
+    """Map the nearDuplicates input to a handler mode.
+
+    Args:
+        value: One of OFF, FLAG, SKIP (case-insensitive).
+
+    Returns:
+        `flag`, `skip`, or None when detection is off.
+    """
+    modes = {'OFF': None, 'FLAG': 'flag', 'SKIP': 'skip'}
+    key = (value or 'OFF').upper()
+    if key not in modes:
+        raise ValueError(f'Unsupported nearDuplicates: {value}')
+    return modes[key]
+
+
 def build_browser_launch_options(actor_input: dict[str, Any]) -> dict[str, Any]:
     """Build browser launch options from actor input.
 
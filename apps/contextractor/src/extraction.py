@@ -2,25 +2,34 @@
 
 from __future__ import annotations
 
+import gzip
 import hashlib
 import re
+import zlib
 from typing import Any
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
 
-from contextractor_engine import ContentExtractor
+from contextractor_engine import ContentExtractor, SimHashIndex, simhash
 
 
-def extract_metadata(html: str, url: str, extractor: ContentExtractor) -> dict[str, Any]:
+def extract_metadata(
+    html: str,
+    url: str,
+    extractor: ContentExtractor,
+    tree: Any | None = None,
+) -> dict[str, Any]:
     """Extract metadata from HTML.
 
     Args:
-        html: Raw HTML content.
+        html: Raw HTML content (only its beginning for streamed large pages).
         url: Source URL for context.
         extractor: ContentExtractor instance with configured options.
+        tree: Optional parsed page, used instead of parsing `html` again.
 
     Returns:
         Dictionary with extracted metadata fields.
     """
-    result = extractor.extract_metadata(html, url=url)
+    result = extractor.extract_metadata(html if tree is None else tree, url=url)
     metadata: dict[str, Any] = {
         'title': result.title,
         'author': result.author,
@@ -40,7 +49,7 @@ def extract_metadata(html: str, url: str, extractor: ContentExtractor) -> dict[s
 
 
 def extract_format(
-    html: str,
+    html: Any,
     output_format: str,
     extractor: ContentExtractor,
     url: str | None = None,
@@ -48,7 +57,7 @@ def extract_format(
     """Extract content in specified format.
 
     Args:
-        html: Raw HTML content.
+        html: Raw HTML content or its parsed tree.
         output_format: One of txt, json, markdown, xml, xmltei.
         extractor: ContentExtractor instance with configured options.
         url: Optional source URL.
@@ -60,6 +69,37 @@ def extract_format(
     return result.content if result else None
 
 
+def check_near_duplicate(
+    html: Any,
+    url: str,
+    extractor: ContentExtractor,
+    index: SimHashIndex,
+) -> dict[str, Any] | None:
+    """Check extracted text against the crawl-wide near-duplicate index.
+
+    Pages that are not near-duplicates are added to the index.
+
+    Args:
+        html: Raw HTML content or its parsed tree.
+        url: Source URL, stored in the index; its own entry from an earlier attempt
+            of the same request is ignored.
+        extractor: ContentExtractor instance with configured options.
+        index: Near-duplicate index shared by the crawl.
+
+    Returns:
+        Dictionary with url and distance of the matched page, or None.
+    """
+    text = extract_format(html, 'txt', extractor, url=url)
+    fingerprint = simhash(text) if text else None
+    if fingerprint is None:
+        return None
+    match = index.check_and_add(fingerprint, url)
+    if match is None:
+        return None
+    matched_url, distance = match
+    return {'url': matched_url, 'distance': distance}
+
+
 def compute_content_info(content: str | bytes) -> dict[str, Any]:
     """Compute hash and length for content.
 
@@ -77,28 +117,215 @@ def compute_content_info(content: str | bytes) -> dict[str, Any]:
     }
 
 
+# Compression name -> (key suffix, KVS content type)
+COMPRESSION_FORMATS: dict[str, tuple[str, str]] = {
+    'gzip': ('.gz', 'application/gzip'),
+    'br': ('.br', 'application/x-brotli'),
+}
+
+
+def compress_content(content: bytes, compression: str) -> bytes:
+    """Compress content with the given encoding.
+
+    Args:
+        content: UTF-8 encoded content.
+        compression: One of `gzip`, `br`.
+
+    Returns:
+        Compressed bytes.
+    """
+    if compression == 'gzip':
+        return gzip.compress(content, compresslevel=6, mtime=0)
+    if compression == 'br':
+        import brotli
+
+        return brotli.compress(content, quality=5)
+    raise ValueError(f'Unsupported compression: {compression}')
+
+
+class StreamedContent:
+    """Content written in chunks, hashed and kept for one upload as it arrives.
+
+    With `compression` only the compressed bytes are held; with `keep=False`
+    nothing but the hash and length.
+    """
+
+    def __init__(self, compression: str | None = None, keep: bool = True) -> None:
+        self.compression = compression if keep else None
+        self.length = 0
+        self._md5 = hashlib.md5()
+        self._chunks: list[bytes] | None = [] if keep else None
+        self._compressor: Any = None
+        if self.compression == 'gzip':
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif self.compression == 'br':
+            import brotli
+
+            self._compressor = brotli.Compressor(quality=5)
+        elif self.compression:
+            raise ValueError(f'Unsupported compression: {compression}')
+
+    def write(self, data: bytes) -> None:
+        """Add the next chunk of UTF-8 content."""
+        self._md5.update(data)
+        self.length += len(data)
+        if self._chunks is None:
+            return
+        if self.compression == 'gzip':
+            data = self._compressor.compress(data)
+        elif self.compression == 'br':
+            data = self._compressor.process(data)
+        if data:
+            self._chunks.append(data)
+
+    def info(self) -> dict[str, Any]:
+        """Hash and length of the uncompressed content, like compute_content_info()."""
+        return {'hash': self._md5.hexdigest(), 'length': self.length}
+
+    def getvalue(self) -> bytes:
+        """Finish the content and return the kept (compressed) bytes."""
+        if self._chunks is None:
+            raise ValueError('Content was not kept')
+        if self.compression == 'gzip' and self._compressor is not None:
+            self._chunks.append(self._compressor.flush())
+        elif self.compression == 'br' and self._compressor is not None:
+            self._chunks.append(self._compressor.finish())
+        self._compressor = None
+        return b''.join(self._chunks)
+
+
+class PublicUrlTemplate:
+    """Build public URLs of key-value store records without an API call per key.
+
+    `kvs.get_public_url()` loads the store metadata on every call. The template
+    is derived once from the URL of a probe key. Stores with signed URLs keep
+    using `get_public_url()`, as the signature is a private detail of the SDK.
+    """
+
+    _PROBE_KEY = 'CONTEXTRACTOR-URL-TEMPLATE'
+
+    def __init__(self, url: str) -> None:
+        parts = urlsplit(url)
+        self._parts = parts
+        self._path_prefix = parts.path[: -len(quote(self._PROBE_KEY, safe=''))]
+        self._query = urlencode(parse_qsl(parts.query, keep_blank_values=True))
+
+    @classmethod
+    async def create(cls, kvs: Any) -> PublicUrlTemplate | None:
+        """Derive the template from the store's URL of a probe key.
+
+        Returns:
+            The template, or None if URLs of the store cannot be built locally.
+        """
+        url = await kvs.get_public_url(cls._PROBE_KEY)
+        parts = urlsplit(url)
+        if not parts.path.endswith(quote(cls._PROBE_KEY, safe='')):
+            return None
+        if 'signature' in dict(parse_qsl(parts.query)):
+            return None
+        return cls(url)
+
+    def url(self, key: str) -> str:
+        """Public URL of the record under `key`."""
+        return urlunsplit(self._parts._replace(
+            path=self._path_prefix + quote(key, safe=''),
+            query=self._query,
+        ))
+
+
 async def save_content_to_kvs(
     kvs: Any,
     key: str,
-    content: str,
+    content: str | bytes,
     content_type: str,
+    compression: str | None = None,
+    inline_max_bytes: int = 0,
+    public_urls: PublicUrlTemplate | None = None,
 ) -> dict[str, Any]:
     """Save content to key-value store and return info dict.
 
+    Content is encoded to UTF-8 once and uploaded as bytes, so the store does
+    not re-encode it. With `compression`, the compressed buffer is stored under
+    the key with a `.gz`/`.br` suffix and the info reports `contentEncoding`.
+    Content of at most `inline_max_bytes` is not stored but returned inline.
+
     Args:
         kvs: Key-value store instance.
         key: Storage key.
         content: Content to save.
-        content_type: MIME type.
+        content_type: MIME type of the uncompressed content.
+        compression: Optional content encoding, `gzip` or `br`.
+        inline_max_bytes: Size up to which content is inlined, 0 disables inlining.
+        public_urls: Optional template for the record URL, saves one API call.
 
     Returns:
-        Dictionary with key, url, hash, and length.
+        Dictionary with key, url, hash, and length (of the uncompressed content),
+        or with content, hash and length for inlined content.
     """
-    await kvs.set_value(key, content, content_type=content_type)
-    content_bytes = content.encode('utf-8')
+    content_bytes = content.encode('utf-8') if isinstance(content, str) else content
+    info = compute_content_info(content_bytes)
+
+    if inline_max_bytes and len(content_bytes) <= inline_max_bytes:
+        text = content if isinstance(content, str) else content_bytes.decode('utf-8', 'replace')
+        return {'content': text, **info}
+
+    body = compress_content(content_bytes, compression) if compression else content_bytes
+    return await _store_record(kvs, key, body, info, content_type, compression, public_urls)
+
+
+async def save_streamed_to_kvs(
+    kvs: Any,
+    key: str,
+    content: StreamedContent,
+    content_type: str,
+    public_urls: PublicUrlTemplate | None = None,
+) -> dict[str, Any]:
+    """Save streamed content to key-value store and return info dict.
+
+    Same as save_content_to_kvs(), for content that was compressed while it
+    was received.
+
+    Args:
+        kvs: Key-value store instance.
+        key: Storage key.
+        content: Streamed content, with its compression.
+        content_type: MIME type of the uncompressed content.
+        public_urls: Optional template for the record URL.
+
+    Returns:
+        Dictionary with key, url, hash, and length (of the uncompressed content).
+    """
+    body = content.getvalue()
+    return await _store_record(
+        kvs, key, body, content.info(), content_type, content.compression, public_urls
+    )
+
+
+async def _store_record(
+    kvs: Any,
+    key: str,
+    body: bytes,
+    info: dict[str, Any],
+    content_type: str,
+    compression: str | None,
+    public_urls: PublicUrlTemplate | None,
+) -> dict[str, Any]:
+    """Upload an encoded record and return its info dict."""
+    if compression:
+        suffix, stored_content_type = COMPRESSION_FORMATS[compression]
+        key = f'{key}{suffix}'
+        info = {
+            **info,
+            'contentType': content_type,
+            'contentEncoding': compression,
+            'encodedLength': len(body),
+        }
+    else:
+        stored_content_type = content_type
+
+    await kvs.set_value(key, body, content_type=stored_content_type)
     return {
         'key': key,
-        'url': await kvs.get_public_url(key),
-        'hash': hashlib.md5(content_bytes).hexdigest(),
-        'length': len(content_bytes),
+        'url': public_urls.url(key) if public_urls else await kvs.get_public_url(key),
+        **info,
     }
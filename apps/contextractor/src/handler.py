@@ -2,38 +2,55 @@
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
+import time
+from collections.abc import Callable
 from datetime import datetime, timezone
-from typing import Any
+from typing import TYPE_CHECKING, Any, NoReturn
+from urllib.parse import urlsplit
 
 from apify import Actor
-from crawlee.crawlers import PlaywrightCrawlingContext
-
-from contextractor_engine import ContentExtractor, TrafilaturaConfig, normalize_config_keys
+from crawlee import Request
+from crawlee.errors import ContextPipelineInterruptedError
+
+from contextractor_engine import (
+    ContentExtractor,
+    HtmlStreamParser,
+    TrafilaturaConfig,
+    extract_variants,
+    parse_html,
+)
+from contextractor_engine.language import primary_subtag
 
 from .extraction import (
+    PublicUrlTemplate,
+    StreamedContent,
+    check_near_duplicate,
     compute_content_info,
-    extract_format,
     extract_metadata,
     save_content_to_kvs,
+    save_streamed_to_kvs,
 )
+from .links import build_url_filter, extract_language_alternates, extract_links
+from .metrics import CrawlMetrics
+from .page_actions import close_cookie_modals, iter_page_html, read_page_html, scroll_to_load
+from .state import CrawlState, ResultsCounter
 
+if TYPE_CHECKING:
+    from crawlee.crawlers import PlaywrightCrawlingContext
 
-class ResultsCounter:
-    """Thread-safe counter for tracking results."""
+# Longest wait for a result slot held by pages in progress before requeueing
+RESERVE_WAIT_SECS = 10.0
+RESERVE_POLL_SECS = 0.5
 
-    def __init__(self, max_results: int) -> None:
-        self.max_results = max_results
-        self.count = 0
+# Requeues of a page that found no free result slot before it is skipped
+MAX_REQUEUES = 3
 
-    def increment(self) -> int:
-        """Increment and return new count."""
-        self.count += 1
-        return self.count
 
-    def is_limit_reached(self) -> bool:
-        """Check if max results limit is reached."""
-        return self.max_results > 0 and self.count >= self.max_results
+def build_key_base(url: str) -> str:
+    """Base key of the records of a page."""
+    return hashlib.md5(url.encode()).hexdigest()[:16]
 
 
 def create_request_handler(
@@ -41,6 +58,12 @@ def create_request_handler(
     dataset: Any | None,
     results_counter: ResultsCounter,
     browser_log_enabled: bool,
+    crawl_state: CrawlState | None = None,
+    on_limit_reached: Callable[[], None] | None = None,
+    metrics: CrawlMetrics | None = None,
+    public_urls: PublicUrlTemplate | None = None,
+    trafilatura_config: TrafilaturaConfig | None = None,
+    extraction_variants: dict[str, TrafilaturaConfig] | None = None,
 ):
     """Create a request handler function.
 
@@ -49,6 +72,12 @@ def create_request_handler(
         dataset: Optional named dataset.
         results_counter: Counter for tracking results.
         browser_log_enabled: Whether to log browser console.
+        crawl_state: Optional persisted crawl state recording the stored pages.
+        on_limit_reached: Called once max results are stored, e.g. to stop the crawler.
+        metrics: Optional run metrics to record page outcomes and timings in.
+        public_urls: Optional template for record URLs, computed once per run.
+        trafilatura_config: Extraction config built from the input, balanced if None.
+        extraction_variants: Optional config variants extracted side by side.
 
     Returns:
         Async handler function for PlaywrightCrawler.
@@ -56,11 +85,19 @@ def create_request_handler(
 
     async def handler(context: PlaywrightCrawlingContext) -> None:
         """Process a single page and extract content."""
-        # Check if max results reached
-        if results_counter.is_limit_reached():
-            Actor.log.info(f'Max results ({results_counter.max_results}) reached, stopping')
+        if metrics is None:
+            await handle_page(context)
             return
-
+        started = time.perf_counter()
+        metrics.page_started()
+        status = 'error'
+        try:
+            status = await handle_page(context)
+        finally:
+            metrics.page_finished(status, time.perf_counter() - started)
+
+    async def handle_page(context: PlaywrightCrawlingContext) -> str:
+        """Handle the page and return its outcome, `stored` or `skipped`."""
         url = context.request.url
         Actor.log.info(f'Processing {url}')
 
@@ -71,118 +108,492 @@ def create_request_handler(
                 lambda msg: Actor.log.info(f'[Browser] {msg.type}: {msg.text}'),
             )
 
-        html = await context.page.content()
-        key_base = hashlib.md5(url.encode()).hexdigest()[:16]
-
         handler_config = context.request.user_data.get('config', {})
+        key_base = build_key_base(url)
+
+        # The result slot was reserved before navigation by the pre-navigation
+        # hook, which also gives it back if the request fails
+        await _prepare_page(context, handler_config)
+        processing_started = time.perf_counter()
+        # Parsed once and shared by extraction and link enqueueing
+        html, tree, raw_html = await _load_page(context, handler_config)
+        data = await _process_page(
+            context, kvs, key_base, html, tree, handler_config, crawl_state,
+            public_urls=public_urls, raw_html=raw_html,
+            trafilatura_config=trafilatura_config, extraction_variants=extraction_variants,
+        )
+        if metrics is not None:
+            html_size = raw_html.length if raw_html else len(html)
+            metrics.page_processed(time.perf_counter() - processing_started, html_size)
+
+        # Skipped pages (near-duplicates, other languages) do not count as results
+        if data is None or 'skipReason' in data:
+            results_counter.release(context.request.unique_key)
+            if data is not None:
+                await _push(context, dataset, data)
+            # Links go first, so a page marked as stored always has them queued
+            await _enqueue_links(context, handler_config, tree)
+            if data is not None and crawl_state:
+                crawl_state.mark_stored(key_base)
+            return 'skipped'
+
+        # Links are not followed once this result fills the limit
+        limit = results_counter.max_results
+        if not limit or results_counter.count + 1 < limit:
+            await _enqueue_links(context, handler_config, tree)
+
+        # Store and count the result
+        await _push(context, dataset, data)
+        results_counter.commit(context.request.unique_key)
+        if crawl_state:
+            crawl_state.mark_stored(key_base)
 
-        # Build TrafilaturaConfig from raw dict
-        trafilatura_config_raw = handler_config.get('trafilatura_config_raw', {})
-        if trafilatura_config_raw:
-            # Normalize keys (camelCase → snake_case) and filter None values
-            normalized = normalize_config_keys(trafilatura_config_raw)
-            filtered = {k: v for k, v in normalized.items() if v is not None}
-            trafilatura_config = TrafilaturaConfig(**filtered)
-        else:
-            trafilatura_config = TrafilaturaConfig.balanced()
-
-        extractor = ContentExtractor(config=trafilatura_config)
-
-        # Build raw HTML info
-        html_bytes = html.encode('utf-8')
-        raw_html_info = compute_content_info(html_bytes)
-
-        if handler_config.get('save_raw_html'):
-            html_key = f'{key_base}-raw.html'
-            await kvs.set_value(html_key, html, content_type='text/html; charset=utf-8')
-            raw_html_info['key'] = html_key
-            raw_html_info['url'] = await kvs.get_public_url(html_key)
-
-        # Extract metadata using ContentExtractor
-        metadata = extract_metadata(html, url, extractor)
-
-        # Build dataset entry
-        data: dict[str, Any] = {
-            'loadedUrl': url,
-            'rawHtml': raw_html_info,
-            'loadedAt': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
-            'metadata': metadata,
-            'httpStatus': 200,
-        }
+        # Stop crawler if max results reached
+        if results_counter.is_limit_reached():
+            Actor.log.info(
+                f'Max results ({results_counter.max_results}) reached, stopping crawler'
+            )
+            if on_limit_reached:
+                on_limit_reached()
+        return 'stored'
+
+    return handler
 
-        # Save extracted formats
-        await _save_extracted_formats(kvs, key_base, html, url, extractor, handler_config, data)
 
-        # Push data to dataset
-        if dataset:
-            await dataset.push_data(data)
-        else:
-            await context.push_data(data)
+def create_pre_navigation_hook(
+    results_counter: ResultsCounter,
+    crawl_state: CrawlState | None = None,
+    metrics: CrawlMetrics | None = None,
+):
+    """Create a hook deciding before navigation whether a page is loaded at all.
 
-        # Increment results count
-        results_counter.increment()
+    Pages stored before a restart are skipped, and a result slot is reserved
+    so concurrent pages cannot overshoot max results. A page is never loaded
+    only to find out that it cannot be stored.
 
-        # Stop crawler if max results reached
-        if results_counter.is_limit_reached():
+    Args:
+        results_counter: Counter for tracking results.
+        crawl_state: Optional persisted crawl state used to skip already stored pages.
+        metrics: Optional run metrics counting the skipped pages.
+
+    Returns:
+        Async pre-navigation hook for PlaywrightCrawler.
+    """
+
+    async def reserve_result_slot(context: Any) -> None:
+        """Skip the request, or reserve a result slot for it until it is done."""
+        request = context.request
+        url = request.url
+
+        # Skip pages stored before a restart or by a previous run of a resumed crawl
+        if crawl_state and crawl_state.is_stored(build_key_base(url)):
+            Actor.log.info(f'Already stored {url}, skipping')
+            await _skip_navigation(context, metrics)
+
+        # Slots held by pages in progress come back if those pages fail, so a
+        # page waits for them and is queued again rather than dropped
+        waited = 0.0
+        while not results_counter.try_reserve(request.unique_key):
+            if results_counter.is_limit_reached():
+                Actor.log.info(
+                    f'Max results ({results_counter.max_results}) reached, skipping {url}'
+                )
+                await _skip_navigation(context, metrics)
+            if waited >= RESERVE_WAIT_SECS:
+                requeued = request.user_data.get('requeued', 0)
+                if requeued < MAX_REQUEUES:
+                    Actor.log.debug(f'No free result slot, queueing {url} again')
+                    await _requeue(context)
+                else:
+                    Actor.log.warning(
+                        f'No free result slot for {url} after {requeued} requeues, skipping'
+                    )
+                await _skip_navigation(context, metrics)
+            await asyncio.sleep(RESERVE_POLL_SECS)
+            waited += RESERVE_POLL_SECS
+
+        # Runs after every attempt, also when navigation or the handler fails;
+        # a committed slot is no longer held, so this is a no-op then
+        async def release_slot() -> None:
+            results_counter.release(request.unique_key)
+
+        context.register_deferred_cleanup(release_slot)
+
+    return reserve_result_slot
+
+
+async def _skip_navigation(context: Any, metrics: CrawlMetrics | None) -> NoReturn:
+    """Close the unused page and end the request as handled without loading it."""
+    if metrics is not None:
+        metrics.page_skipped()
+    await context.page.close()
+    raise ContextPipelineInterruptedError(f'Skipped {context.request.url} before navigation')
+
+
+async def _push(context: PlaywrightCrawlingContext, dataset: Any | None, data: dict) -> None:
+    """Push a dataset entry to the named dataset, or the default one."""
+    if dataset:
+        await dataset.push_data(data)
+    else:
+        await context.push_data(data)
+
+
+async def _requeue(context: Any) -> None:
+    """Add the request again under a new unique key, behind the pages in progress."""
+    request = context.request
+    requeued = request.user_data.get('requeued', 0) + 1
+    await context.add_requests([
+        Request.from_url(
+            request.url,
+            unique_key=f'{request.unique_key}#requeued-{requeued}',
+            user_data={
+                'config': request.user_data.get('config', {}),
+                'depth': request.user_data.get('depth', 0),
+                'requeued': requeued,
+            },
+        )
+    ])
+
+
+async def _process_page(
+    context: PlaywrightCrawlingContext,
+    kvs: Any,
+    key_base: str,
+    html: str,
+    tree: Any,
+    handler_config: dict[str, Any],
+    crawl_state: CrawlState | None = None,
+    public_urls: PublicUrlTemplate | None = None,
+    raw_html: StreamedContent | None = None,
+    trafilatura_config: TrafilaturaConfig | None = None,
+    extraction_variants: dict[str, TrafilaturaConfig] | None = None,
+) -> dict[str, Any] | None:
+    """Extract the page and save its content to the key-value store.
+
+    Args:
+        context: Crawling context.
+        kvs: Key-value store for content.
+        key_base: Base key for storage.
+        html: Page HTML, only its beginning for large pages.
+        tree: Parsed page, None if the HTML could not be parsed.
+        handler_config: Handler configuration.
+        crawl_state: Optional crawl state holding the near-duplicate index and
+            boilerplate templates.
+        public_urls: Optional template for record URLs.
+        raw_html: Raw HTML streamed from a large page (hashed, kept only if it
+            is saved), instead of encoding `html`.
+        trafilatura_config: Extraction config, balanced if None.
+        extraction_variants: Optional config variants extracted side by side.
+
+    Returns:
+        Dataset entry for the page (with `skipReason` if it was rejected by the
+        language pre-filter or is a streamed page that could not be parsed), or
+        None if it was skipped as a near-duplicate.
+    """
+    url = context.request.url
+
+    # A streamed page exists only as its parsed tree, `html` is just its first
+    # chunk; extracting from that would silently store a truncated page
+    if tree is None and raw_html is not None:
+        Actor.log.warning(f'Could not parse streamed page {url}, skipping')
+        return _skip_entry(url, {
+            'type': 'unparseable',
+            'message': f'Streamed HTML ({raw_html.length} bytes) could not be parsed',
+        })
+
+    if trafilatura_config is None:
+        trafilatura_config = TrafilaturaConfig.balanced()
+    extractor = ContentExtractor(config=trafilatura_config)
+
+    # Cheap language pre-filter before the expensive extraction passes
+    language_check = extractor.check_language(html, url=url)
+    if language_check and language_check.rejected:
+        Actor.log.info(f'Skipping {url}: {language_check.reason}')
+        return _skip_entry(url, {
+            'type': 'language',
+            'message': language_check.reason,
+            'language': language_check.language,
+            'source': language_check.source,
+            'targetLanguage': trafilatura_config.target_language,
+        })
+
+    # The parsed tree is shared by all extraction passes below
+    document = html if tree is None else tree
+
+    # Prune blocks learned as boilerplate on earlier pages of this host
+    templates = crawl_state.templates if crawl_state else None
+    if templates is not None:
+        extractor = ContentExtractor(config=templates.config_for(url, trafilatura_config))
+
+    # Check extracted text against pages seen earlier in the crawl
+    near_duplicate = None
+    near_duplicates_mode = handler_config.get('near_duplicates')
+    if near_duplicates_mode and crawl_state and crawl_state.near_duplicates is not None:
+        near_duplicate = check_near_duplicate(
+            document, url, extractor, crawl_state.near_duplicates
+        )
+        if near_duplicate and near_duplicates_mode == 'skip':
             Actor.log.info(
-                f'Max results ({results_counter.max_results}) reached, stopping crawler'
+                f'Skipping near-duplicate {url} of {near_duplicate["url"]} '
+                f'(distance {near_duplicate["distance"]})'
             )
-            raise SystemExit(0)
+            return None
+
+    # Build raw HTML info (encoded once, the same buffer is hashed and uploaded;
+    # large pages were hashed and compressed while they were streamed)
+    save_raw_html = handler_config.get('save_raw_html')
+    if raw_html is not None and save_raw_html:
+        raw_html_info = await save_streamed_to_kvs(
+            kvs, f'{key_base}-raw.html', raw_html, 'text/html; charset=utf-8', public_urls
+        )
+    elif raw_html is not None:
+        raw_html_info = raw_html.info()
+    elif save_raw_html:
+        raw_html_info = await save_content_to_kvs(
+            kvs,
+            f'{key_base}-raw.html',
+            html,
+            'text/html; charset=utf-8',
+            compression=handler_config.get('compression'),
+            inline_max_bytes=handler_config.get('inline_max_bytes', 0),
+            public_urls=public_urls,
+        )
+    else:
+        raw_html_info = compute_content_info(html)
+
+    # Extract metadata using ContentExtractor
+    metadata = extract_metadata(html, url, extractor, tree)
+
+    # Build dataset entry
+    data: dict[str, Any] = {
+        'loadedUrl': url,
+        'rawHtml': raw_html_info,
+        'loadedAt': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+        'metadata': metadata,
+        'httpStatus': 200,
+    }
+    if near_duplicate:
+        data['nearDuplicateOf'] = near_duplicate
+
+    # Save extracted formats
+    await _save_extracted_formats(
+        kvs, key_base, document, url, extractor, handler_config, data, public_urls
+    )
 
-        # Enqueue links if linkSelector is set
-        await _enqueue_links(context, handler_config)
+    # Learn the host template, or check the learned one for drift
+    if templates is not None:
+        status = templates.observe(url, document, trafilatura_config)
+        if status in ('learned', 'drift'):
+            rules = templates.rules_for(url)
+            Actor.log.info(f'Boilerplate template {status} for {url} ({len(rules)} rules)')
+
+    # Save extraction config variants for side-by-side comparison
+    if extraction_variants:
+        await _save_extraction_variants(
+            kvs, key_base, document, url, extraction_variants, handler_config, data, public_urls
+        )
+
+    return data
+
+
+def _skip_entry(url: str, skip_reason: dict[str, Any]) -> dict[str, Any]:
+    """Dataset entry of a page that was loaded but not extracted."""
+    return {
+        'loadedUrl': url,
+        'loadedAt': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+        'httpStatus': 200,
+        'skipReason': skip_reason,
+    }
+
+
+async def _load_page(
+    context: PlaywrightCrawlingContext,
+    config: dict[str, Any],
+) -> tuple[str, Any, StreamedContent | None]:
+    """Read and parse the page HTML.
+
+    HTML longer than `large_page_threshold` characters is streamed out of the
+    browser in chunks. Each chunk is hashed, kept for the raw HTML record only
+    if it is saved (compressed as it arrives with storage compression), and fed
+    to an incremental parser that drops scripts, styles and other non-content
+    subtrees, so the page is never held as one string.
+
+    Args:
+        context: Crawling context.
+        config: Handler configuration.
+
+    Returns:
+        Tuple of the HTML (only the first chunk for large pages), the parsed
+        tree (None if unparseable) and the streamed raw HTML of large pages.
+    """
+    threshold = config.get('large_page_threshold', 0)
+    if not threshold:
+        html = await context.page.content()
+        return html, parse_html(html), None
+
+    html, length = await read_page_html(context.page, threshold)
+    if html is not None:
+        return html, parse_html(html), None
+
+    Actor.log.info(f'Streaming large page {context.request.url} ({length} characters)')
+    parser = HtmlStreamParser()
+    raw_html = StreamedContent(config.get('compression'), keep=config.get('save_raw_html', False))
+    head = ''
+    async for chunk in iter_page_html(context.page, length):
+        # The beginning is kept for the language check and the lang fallback
+        head = head or chunk
+        data = chunk.encode('utf-8')
+        raw_html.write(data)
+        parser.feed(data)
+    return head, parser.close(), raw_html
+
+
+async def _prepare_page(
+    context: PlaywrightCrawlingContext,
+    config: dict[str, Any],
+) -> None:
+    """Dismiss cookie modals and scroll to load lazy content if configured.
+
+    Args:
+        context: Crawling context.
+        config: Handler configuration.
+    """
+    if config.get('close_cookie_modals'):
+        result = await close_cookie_modals(context.page)
+        Actor.log.debug(f'Cookie modals on {context.request.url}: {result}')
+
+    max_scroll_height = config.get('max_scroll_height', 0)
+    if max_scroll_height > 0:
+        result = await scroll_to_load(
+            context.page, max_scroll_height, config.get('scroll_target_text_length', 0)
+        )
+        Actor.log.debug(f'Scrolled {context.request.url}: {result}')
 
-    return handler
+
+def _enabled_formats(config: dict[str, Any]) -> dict[str, tuple[str, str, str]]:
+    """Map each requested output format to its dataset key, content type and key extension.
+
+    Args:
+        config: Handler configuration.
+
+    Returns:
+        Dictionary keyed by output format, in extraction order.
+    """
+    format_configs = [
+        ('save_text', 'txt', 'extractedText', 'text/plain; charset=utf-8', 'txt'),
+        ('save_json', 'json', 'extractedJson', 'application/json; charset=utf-8', 'json'),
+        ('save_markdown', 'markdown', 'extractedMarkdown', 'text/markdown; charset=utf-8', 'md'),
+        ('save_xml', 'xml', 'extractedXml', 'application/xml; charset=utf-8', 'xml'),
+        ('save_xmltei', 'xmltei', 'extractedXmlTei', 'application/xml; charset=utf-8', 'tei.xml'),
+    ]
+    return {
+        output_format: (data_key, content_type, ext)
+        for config_key, output_format, data_key, content_type, ext in format_configs
+        if config.get(config_key)
+    }
 
 
 async def _save_extracted_formats(
     kvs: Any,
     key_base: str,
-    html: str,
+    html: Any,
     url: str,
     extractor: ContentExtractor,
     config: dict[str, Any],
     data: dict[str, Any],
+    public_urls: PublicUrlTemplate | None = None,
 ) -> None:
     """Save extracted content in requested formats.
 
     Args:
         kvs: Key-value store.
         key_base: Base key for storage.
-        html: Raw HTML content.
+        html: Raw HTML content or its parsed tree.
         url: Source URL.
         extractor: ContentExtractor instance.
         config: Handler configuration.
         data: Data dict to update with results.
+        public_urls: Optional template for record URLs.
     """
-    format_configs = [
-        ('save_text', 'txt', 'extractedText', 'text/plain; charset=utf-8'),
-        ('save_json', 'json', 'extractedJson', 'application/json; charset=utf-8'),
-        ('save_markdown', 'markdown', 'extractedMarkdown', 'text/markdown; charset=utf-8'),
-        ('save_xml', 'xml', 'extractedXml', 'application/xml; charset=utf-8'),
-        ('save_xmltei', 'xmltei', 'extractedXmlTei', 'application/xml; charset=utf-8'),
-    ]
+    enabled = _enabled_formats(config)
+    if not enabled:
+        return
 
-    for config_key, output_format, data_key, content_type in format_configs:
-        if config.get(config_key):
-            content = extract_format(html, output_format, extractor, url=url)
-            if content:
-                ext = 'tei.xml' if output_format == 'xmltei' else output_format
-                if output_format == 'markdown':
-                    ext = 'md'
-                key = f'{key_base}.{ext}'
-                data[data_key] = await save_content_to_kvs(kvs, key, content, content_type)
+    # One format at a time: each is encoded, uploaded and released before the next
+    for result in extractor.iter_formats(html, url=url, formats=list(enabled)):
+        data_key, content_type, ext = enabled[result.output_format]
+        data[data_key] = await save_content_to_kvs(
+            kvs,
+            f'{key_base}.{ext}',
+            result.to_bytes(),
+            content_type,
+            compression=config.get('compression'),
+            inline_max_bytes=config.get('inline_max_bytes', 0),
+            public_urls=public_urls,
+        )
+
+
+async def _save_extraction_variants(
+    kvs: Any,
+    key_base: str,
+    html: Any,
+    url: str,
+    variants: dict[str, TrafilaturaConfig],
+    config: dict[str, Any],
+    data: dict[str, Any],
+    public_urls: PublicUrlTemplate | None = None,
+) -> None:
+    """Extract the requested formats with every config variant and save them.
+
+    Each variant is stored under `{key_base}-{name}.{ext}` and summarized in
+    `data['variants'][name]` with its extraction time.
+
+    Args:
+        kvs: Key-value store.
+        key_base: Base key for storage.
+        html: Raw HTML content or its parsed tree.
+        url: Source URL.
+        variants: Config variants keyed by name.
+        config: Handler configuration.
+        data: Data dict to update with results.
+        public_urls: Optional template for record URLs.
+    """
+    enabled = _enabled_formats(config)
+    if not enabled:
+        return
+
+    data['variants'] = {}
+    results = extract_variants(html, variants, url=url, formats=list(enabled))
+    for name, variant in results.items():
+        entry: dict[str, Any] = {'extractionMs': round(variant.elapsed * 1000, 1)}
+        for output_format, result in variant.results.items():
+            data_key, content_type, ext = enabled[output_format]
+            entry[data_key] = await save_content_to_kvs(
+                kvs,
+                f'{key_base}-{name}.{ext}',
+                result.to_bytes(),
+                content_type,
+                compression=config.get('compression'),
+                inline_max_bytes=config.get('inline_max_bytes', 0),
+                public_urls=public_urls,
+            )
+        data['variants'][name] = entry
 
 
 async def _enqueue_links(
     context: PlaywrightCrawlingContext,
     config: dict[str, Any],
+    tree: Any | None = None,
 ) -> None:
     """Enqueue links from the page if configured.
 
+    Links are selected on the parsed page in Python and added as one batch,
+    keeping crawlee's default same-hostname scope.
+
     Args:
         context: Crawling context.
         config: Handler configuration.
+        tree: Parsed page, loaded from the browser if not given.
     """
     link_selector = config.get('link_selector', '')
     if not link_selector:
@@ -194,15 +605,38 @@ async def _enqueue_links(
     if max_depth != 0 and current_depth >= max_depth:
         return
 
-    globs = config.get('globs', [])
-    excludes = config.get('excludes', [])
+    if tree is None:
+        tree = parse_html(await context.page.content())
+        if tree is None:
+            return
+
+    page_url = context.request.loaded_url or context.request.url
+    keep_fragments = config.get('keep_url_fragments', False)
+    urls = extract_links(tree, link_selector, page_url, keep_fragments)
+
+    # Do not follow hreflang alternates of this page in other languages
+    skip_urls: set[str] = set()
+    target_language = config.get('target_language')
+    if target_language and config.get('skip_language_alternates', True):
+        target = primary_subtag(target_language)
+        skip_urls = {
+            alternate_url
+            for alternate_url, hreflang in extract_language_alternates(tree, page_url).items()
+            if primary_subtag(hreflang) != target
+        }
+
+    hostname = urlsplit(page_url).hostname
+    url_filter = build_url_filter(config.get('globs', []), config.get('excludes', []))
     new_config = {**config}
     new_depth = current_depth + 1
-
-    await context.enqueue_links(
-        selector=link_selector,
-        globs=[g.get('glob') for g in globs if g.get('glob')] if globs else None,
-        exclude_globs=[e.get('glob') for e in excludes if e.get('glob')] if excludes else None,
-        keep_url_fragments=config.get('keep_url_fragments', False),
-        user_data={'config': new_config, 'depth': new_depth},
-    )
+    requests = [
+        Request.from_url(
+            url,
+            user_data={'config': new_config, 'depth': new_depth},
+            keep_url_fragment=keep_fragments,
+        )
+        for url in urls
+        if urlsplit(url).hostname == hostname and url not in skip_urls and url_filter(url)
+    ]
+    if requests:
+        await context.add_requests(requests)
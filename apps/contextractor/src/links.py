@@ -0,0 +1,137 @@
+"""Link extraction from the parsed page tree.
+
+Links are selected with the `linkSelector` CSS selector on the same lxml tree
+the extractor uses, so no second query into the browser is needed. URLs are
+resolved against the page (or its `<base href>`), canonicalized and stripped
+of tracking parameters before they are enqueued in one batch.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from crawlee import Glob
+
+# Query parameters that only identify the traffic source
+TRACKING_PARAMS = frozenset((
+    'fbclid', 'gclid', 'gclsrc', 'dclid', 'msclkid', 'yclid', 'twclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok', 'ref_src', 'spm',
+))
+_TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_')
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+_SKIPPED_SCHEMES = re.compile(r'^\s*(javascript|mailto|tel|data|about|blob):', re.IGNORECASE)
+
+
+@lru_cache(maxsize=32)
+def _compile_selector(selector: str) -> Any:
+    # Imported lazily, cssselect is only needed when link enqueueing is used
+    from lxml.cssselect import CSSSelector
+
+    return CSSSelector(selector)
+
+
+def is_tracking_param(name: str) -> bool:
+    """Check if a query parameter only identifies the traffic source."""
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(_TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str, keep_fragment: bool = False) -> str | None:
+    """Normalize an absolute URL for enqueueing.
+
+    Lowercases scheme and host, drops default ports, empty paths become `/`,
+    tracking parameters and (unless kept) the fragment are removed.
+
+    Returns:
+        Canonical URL, or None for non-HTTP(S) or malformed URLs.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    if ':' in host:
+        host = f'[{host}]'
+    if port and port != _DEFAULT_PORTS[scheme]:
+        host = f'{host}:{port}'
+    if parts.username or parts.password:
+        host = f'{parts.netloc.rsplit("@", 1)[0]}@{host}'
+
+    query = parts.query
+    if query:
+        params = parse_qsl(query, keep_blank_values=True)
+        kept = [(k, v) for k, v in params if not is_tracking_param(k)]
+        if len(kept) != len(params):
+            query = urlencode(kept)
+    fragment = parts.fragment if keep_fragment else ''
+    return urlunsplit((scheme, host, parts.path or '/', query, fragment))
+
+
+def build_url_filter(
+    globs: list[dict[str, str]],
+    excludes: list[dict[str, str]],
+) -> Callable[[str], bool]:
+    """Build a predicate applying the globs and excludes inputs to a URL."""
+    include = [Glob(g['glob']).regexp for g in globs if g.get('glob')]
+    exclude = [Glob(e['glob']).regexp for e in excludes if e.get('glob')]
+
+    def matches(url: str) -> bool:
+        if include and not any(pattern.match(url) for pattern in include):
+            return False
+        return not any(pattern.match(url) for pattern in exclude)
+
+    return matches
+
+
+def extract_links(
+    tree: Any,
+    selector: str,
+    page_url: str,
+    keep_fragments: bool = False,
+) -> list[str]:
+    """Select links with a CSS selector and return canonical absolute URLs.
+
+    Args:
+        tree: Parsed page (lxml HtmlElement).
+        selector: CSS selector of elements with an `href` attribute.
+        page_url: URL the page was loaded from.
+        keep_fragments: Keep `#fragment` parts of the URLs.
+
+    Returns:
+        Unique URLs in document order.
+    """
+    base_url = page_url
+    base = tree.find('.//base[@href]')
+    if base is not None:
+        base_url = urljoin(page_url, base.get('href').strip())
+
+    urls = []
+    for element in _compile_selector(selector)(tree):
+        href = (element.get('href') or '').strip()
+        if not href or _SKIPPED_SCHEMES.match(href):
+            continue
+        url = canonicalize_url(urljoin(base_url, href), keep_fragments)
+        if url:
+            urls.append(url)
+    return list(dict.fromkeys(urls))
+
+
+def extract_language_alternates(tree: Any, page_url: str) -> dict[str, str]:
+    """Map `<link rel="alternate" hreflang>` URLs of the page to their hreflang."""
+    alternates = {}
+    for link in tree.iterfind('.//link[@hreflang][@href]'):
+        if 'alternate' in (link.get('rel') or '').lower().split():
+            url = canonicalize_url(urljoin(page_url, link.get('href').strip()))
+            if url:
+                alternates[url] = link.get('hreflang')
+    return alternates
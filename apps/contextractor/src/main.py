@@ -2,19 +2,41 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import logging
-from datetime import timedelta
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-from apify import Actor
+from apify import Actor, Event
 from crawlee import Request
-from crawlee.crawlers import PlaywrightCrawler
+
+from contextractor_engine import BoilerplateTemplates, SimHashIndex, warmup
 
 from .config import (
     build_browser_context_options,
     build_browser_launch_options,
     build_crawl_config,
+    build_extraction_variants,
+    build_trafilatura_config,
 )
-from .handler import ResultsCounter, create_request_handler
+from .extraction import PublicUrlTemplate
+from .handler import create_pre_navigation_hook, create_request_handler
+from .metrics import METRICS_KEY, CrawlMetrics, report_metrics, start_metrics_server
+from .resource_cache import ResourceCache
+from .sharding import ShardCoordinator, shard_name, sync_shards
+from .sitemaps import discover_sitemaps, parse_lastmod, seed_from_sitemaps
+from .state import CrawlState, ResultsCounter, build_state_key
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+
+    from crawlee.crawlers import PlaywrightCrawler
+
+# Seconds between two checks whether the queue is drained after sitemap seeding
+SEED_DRAIN_POLL_SECS = 1.0
 
 
 async def main() -> None:
@@ -35,16 +57,96 @@ async def main() -> None:
 
         # Open storages
         kvs = await _open_key_value_store(actor_input)
-        dataset = await _open_dataset(actor_input)
+        coordinator = _create_coordinator(actor_input, kvs)
+        dataset = await _open_dataset(actor_input, coordinator)
 
-        # Build configuration
+        # A shard crawls only the hosts assigned to it
+        if coordinator:
+            start_urls = [url for url in start_urls if coordinator.owns(url)]
+            Actor.log.info(
+                f'Shard {coordinator.shard_index} of {coordinator.shard_count}: '
+                f'{len(start_urls)} start URLs'
+            )
+
+        # Build configuration; extraction configs are built once for all pages
         config = build_crawl_config(actor_input)
+        trafilatura_config = build_trafilatura_config(actor_input.get('trafilaturaConfig'))
+        extraction_variants = build_extraction_variants(actor_input.get('extractionVariants'))
+
+        # Crawl state outlives the run only together with a named request queue;
+        # otherwise it is kept in the run's default store for restarts after a migration
+        queue_name = actor_input.get('requestQueueName')
+        state_kvs = kvs if queue_name else await Actor.open_key_value_store()
+        request_queue = await _open_request_queue(actor_input, coordinator)
+
+        # Restore persisted state (after a migration/restart or for a resumed run)
+        results_counter = ResultsCounter(actor_input.get('maxResultsPerCrawl', 0))
+        crawl_state = CrawlState(
+            kvs=state_kvs,
+            key=build_state_key(request_queue.name if request_queue else None),
+            results_counter=results_counter,
+        )
+        if config.get('near_duplicates'):
+            crawl_state.near_duplicates = SimHashIndex(
+                max_distance=actor_input.get('nearDuplicateMaxDistance', 3)
+            )
+        if config.get('boilerplate_templates'):
+            crawl_state.templates = BoilerplateTemplates()
+        new_crawl = True
+        if queue_name and not await request_queue.get_total_count():
+            # A new queue starts a new crawl, whatever state an earlier one left behind
+            await crawl_state.clear()
+        elif not await crawl_state.restore() and coordinator and not queue_name:
+            # Without state of this run, the shard queue is left over from an earlier run
+            await request_queue.drop()
+            request_queue = await _open_request_queue(actor_input, coordinator)
+        else:
+            new_crawl = False
+        if new_crawl and coordinator and coordinator.shard_index == 0:
+            # Progress of a merge an earlier crawl did not complete
+            await kvs.delete_value(coordinator.merge_key())
 
         # Create crawler
-        crawler = await _create_crawler(actor_input)
+        crawler = await _create_crawler(actor_input, request_queue)
+
+        async def persist_state(_: Any) -> None:
+            await crawl_state.persist()
+
+        Actor.on(Event.PERSIST_STATE, persist_state)
+        Actor.on(Event.MIGRATING, persist_state)
+
+        # Run metrics, also counting request errors that happen outside the handler
+        metrics = CrawlMetrics()
+
+        @crawler.error_handler
+        async def record_error(context: Any, _: Exception) -> None:
+            metrics.request_error(context.request.url)
+
+        @crawler.failed_request_handler
+        async def record_failure(context: Any, _: Exception) -> None:
+            metrics.request_failed(context.request.url)
+
+        # Decide before navigation whether a page can be stored at all
+        crawler.pre_navigation_hook(
+            create_pre_navigation_hook(results_counter, crawl_state, metrics)
+        )
+
+        # Serve repeated scripts, styles, fonts and images from a shared disk cache
+        resource_cache = None
+        if actor_input.get('cacheSubresources', False):
+            resource_cache = ResourceCache(
+                Path(tempfile.mkdtemp(prefix='contextractor-resources-')),
+                max_bytes=actor_input.get('subresourceCacheMb', 512) * 1024 * 1024,
+            )
+
+            @crawler.pre_navigation_hook
+            async def route_subresources(context: Any) -> None:
+                await context.page.route('**/*', resource_cache.handle_route)
+
+        # Record URLs are built from a template instead of an API call per key
+        public_urls = await PublicUrlTemplate.create(kvs)
 
         # Set up request handler
-        results_counter = ResultsCounter(actor_input.get('maxResultsPerCrawl', 0))
         browser_log_enabled = actor_input.get('browserLog', False)
 
         handler = create_request_handler(
@@ -52,6 +154,12 @@ async def main() -> None:
             dataset=dataset,
             results_counter=results_counter,
             browser_log_enabled=browser_log_enabled,
+            crawl_state=crawl_state,
+            on_limit_reached=lambda: crawler.stop('Max results reached'),
+            metrics=metrics,
+            public_urls=public_urls,
+            trafilatura_config=trafilatura_config,
+            extraction_variants=extraction_variants,
         )
         crawler.router.default_handler(handler)
 
@@ -65,7 +173,174 @@ async def main() -> None:
             )
             for url in start_urls
         ]
-        await crawler.run(requests)
+        # Warm up trafilatura in a thread while the browser starts
+        warmup_task = asyncio.create_task(asyncio.to_thread(warmup))
+        sitemaps_key = f'{crawl_state.key}-SITEMAPS'
+        metrics_key = METRICS_KEY
+        if coordinator:
+            metrics_key = f'{METRICS_KEY}-SHARD-{coordinator.shard_index}'
+        reporter, server = await _start_metrics_reporting(
+            crawler, actor_input, kvs, metrics, metrics_key
+        )
+        syncer = None
+        if coordinator:
+            syncer = asyncio.create_task(sync_shards(coordinator, crawler, results_counter))
+        # Start URLs are queued first, so the seeder never sees an empty queue
+        # before the crawl has begun
+        await crawler.add_requests(requests)
+        seeder = None
+        if _uses_sitemaps(actor_input):
+            # Sitemap URLs are added while the crawl runs, so large sitemaps
+            # do not delay the first pages
+            seeder = asyncio.create_task(_seed_while_crawling(
+                crawler,
+                _seed_from_sitemaps(
+                    crawler, actor_input, config, start_urls, kvs, sitemaps_key, coordinator
+                ),
+            ))
+        try:
+            await crawler.run()
+            seeded_at = await seeder if seeder and seeder.done() else None
+            # Record the seeding time only for completed crawls, so an
+            # interrupted run does not hide pages from the next one
+            if seeded_at:
+                await kvs.set_value(sitemaps_key, {'seededAt': seeded_at})
+            if coordinator:
+                await _cancel_task(syncer)
+                await _finish_shard(coordinator, crawler, results_counter, actor_input)
+        finally:
+            await _cancel_task(seeder)
+            await _cancel_task(reporter)
+            await _cancel_task(syncer)
+            if server:
+                server.close()
+            if resource_cache:
+                Actor.log.info(f'Subresource cache: {resource_cache.stats()}')
+                await resource_cache.close()
+            await crawl_state.persist()
+            Actor.log.debug(f'Extraction warmup took {await warmup_task:.2f}s')
+
+
+async def _cancel_task(task: asyncio.Task | None) -> None:
+    """Cancel a background task and wait for it to end."""
+    if task:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+
+async def _start_metrics_reporting(
+    crawler: PlaywrightCrawler,
+    actor_input: dict,
+    kvs: object,
+    metrics: CrawlMetrics,
+    metrics_key: str = METRICS_KEY,
+) -> tuple[asyncio.Task | None, asyncio.Server | None]:
+    """Start the periodic metrics flush and the optional metrics endpoint.
+
+    Returns:
+        Reporter task and HTTP server, each None if disabled.
+    """
+    reporter = None
+    interval = actor_input.get('metricsIntervalSecs', 30)
+    if interval > 0:
+        request_manager = await crawler.get_request_manager()
+        reporter = asyncio.create_task(
+            report_metrics(metrics, kvs, request_manager, interval, metrics_key)
+        )
+
+    server = None
+    if actor_input.get('metricsServer', False):
+        port = Actor.configuration.web_server_port
+        server = await start_metrics_server(metrics, port)
+        Actor.log.info(f'Serving metrics on port {port}')
+    return reporter, server
+
+
+def _uses_sitemaps(actor_input: dict) -> bool:
+    """Check if the crawl is seeded from sitemaps."""
+    return actor_input.get('useSitemaps', False) or any(
+        s.get('url') for s in actor_input.get('sitemapUrls', [])
+    )
+
+
+async def _seed_while_crawling(
+    crawler: PlaywrightCrawler,
+    seeding: Awaitable[str | None],
+) -> str | None:
+    """Run the sitemap seeding alongside the crawl, then let the crawler finish.
+
+    The crawler is kept alive while seeding, since its queue may run empty
+    between two sitemap batches. Once seeding is done, it is stopped as soon as
+    the queue is drained.
+
+    Args:
+        crawler: Crawler created with `keep_alive`.
+        seeding: Seeding coroutine, see _seed_from_sitemaps().
+
+    Returns:
+        Result of the seeding.
+    """
+    try:
+        seeded_at = await seeding
+        request_manager = await crawler.get_request_manager()
+        while not await request_manager.is_finished():
+            await asyncio.sleep(SEED_DRAIN_POLL_SECS)
+    finally:
+        crawler.stop('Sitemap URLs crawled')
+    return seeded_at
+
+
+async def _seed_from_sitemaps(
+    crawler: PlaywrightCrawler,
+    actor_input: dict,
+    config: dict,
+    start_urls: list[str],
+    kvs: object,
+    state_key: str,
+    coordinator: ShardCoordinator | None = None,
+) -> str | None:
+    """Add URLs from sitemaps to the crawl if configured.
+
+    Args:
+        crawler: Crawler to add the requests to.
+        actor_input: Raw actor input dictionary.
+        config: Crawl configuration stored in each request.
+        start_urls: Start URLs, whose hosts are checked for robots.txt sitemaps.
+        kvs: Key-value store holding the time of the previous seeding.
+        state_key: Key of the previous seeding time.
+        coordinator: Shard coordinator; only URLs of this shard's hosts are added.
+
+    Returns:
+        ISO time the seeding started, or None if sitemaps are not used.
+    """
+    sitemap_urls = [s.get('url') for s in actor_input.get('sitemapUrls', []) if s.get('url')]
+    if actor_input.get('useSitemaps', False):
+        sitemap_urls += await asyncio.to_thread(discover_sitemaps, start_urls)
+    if not sitemap_urls:
+        return None
+
+    seeded_at = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+    modified_since = parse_lastmod(actor_input.get('sitemapModifiedSince'))
+    if actor_input.get('skipUnchangedSitemapPages', False):
+        previous = await kvs.get_value(state_key) or {}
+        last_seeded = parse_lastmod(previous.get('seededAt'))
+        if last_seeded and (modified_since is None or last_seeded > modified_since):
+            modified_since = last_seeded
+
+    Actor.log.info(
+        f'Seeding from {len(sitemap_urls)} sitemaps'
+        + (f' (modified since {modified_since.isoformat()})' if modified_since else '')
+    )
+    added = await seed_from_sitemaps(
+        crawler.add_requests,
+        sitemap_urls,
+        config,
+        modified_since,
+        accept=coordinator.owns if coordinator else None,
+    )
+    Actor.log.info(f'Added {added} URLs from sitemaps')
+    return seeded_at
 
 
 async def _open_key_value_store(actor_input: dict) -> object:
@@ -76,16 +351,86 @@ async def _open_key_value_store(actor_input: dict) -> object:
     return await Actor.open_key_value_store()
 
 
-async def _open_dataset(actor_input: dict) -> object | None:
-    """Open named dataset if specified."""
+async def _open_dataset(
+    actor_input: dict,
+    coordinator: ShardCoordinator | None = None,
+) -> object | None:
+    """Open named dataset if specified.
+
+    A shard pushes to a dataset of its own, merged by shard 0 at the end.
+    """
     dataset_name = actor_input.get('datasetName')
+    if coordinator:
+        base = dataset_name or actor_input['keyValueStoreName']
+        return await Actor.open_dataset(name=shard_name(base, coordinator.shard_index))
     if dataset_name:
         return await Actor.open_dataset(name=dataset_name)
     return None
 
 
-async def _create_crawler(actor_input: dict) -> PlaywrightCrawler:
+async def _open_request_queue(
+    actor_input: dict,
+    coordinator: ShardCoordinator | None = None,
+) -> object | None:
+    """Open named request queue if specified.
+
+    A named queue outlives the run, so a new run with the same name resumes
+    the pending requests of the previous one. A shard always uses a queue of
+    its own, named after `requestQueueName` or else `keyValueStoreName`.
+    """
+    queue_name = actor_input.get('requestQueueName')
+    if coordinator:
+        name = shard_name(queue_name or actor_input['keyValueStoreName'], coordinator.shard_index)
+        return await Actor.open_request_queue(name=name)
+    if queue_name:
+        return await Actor.open_request_queue(name=queue_name)
+    return None
+
+
+def _create_coordinator(actor_input: dict, kvs: object) -> ShardCoordinator | None:
+    """Create the shard coordinator if the crawl is split into several shards."""
+    shard_count = actor_input.get('shardCount', 1)
+    if shard_count <= 1:
+        return None
+    if not actor_input.get('keyValueStoreName'):
+        raise ValueError('shardCount above 1 requires a keyValueStoreName shared by all shards')
+    return ShardCoordinator(
+        kvs,
+        key=f'{build_state_key(actor_input.get("requestQueueName"))}-SHARDS',
+        shard_index=actor_input.get('shardIndex', 0),
+        shard_count=shard_count,
+        max_pages=actor_input.get('maxPagesPerCrawl', 0),
+        max_results=actor_input.get('maxResultsPerCrawl', 0),
+    )
+
+
+async def _finish_shard(
+    coordinator: ShardCoordinator,
+    crawler: PlaywrightCrawler,
+    results_counter: ResultsCounter,
+    actor_input: dict,
+) -> None:
+    """Report this shard as finished; shard 0 then merges the results of all shards."""
+    request_manager = await crawler.get_request_manager()
+    await coordinator.publish(
+        await request_manager.get_handled_count(), results_counter.count, finished=True
+    )
+    if coordinator.shard_index != 0:
+        return
+
+    Actor.log.info(f'Waiting for all {coordinator.shard_count} shards to finish')
+    await coordinator.wait_for_shards()
+    target = await _open_dataset(actor_input) or await Actor.open_dataset()
+    base = actor_input.get('datasetName') or actor_input['keyValueStoreName']
+    merged = await coordinator.merge_results(base, target)
+    Actor.log.info(f'Merged {merged} results from {coordinator.shard_count} shards')
+
+
+async def _create_crawler(actor_input: dict, request_queue: object | None = None) -> PlaywrightCrawler:
     """Create and configure PlaywrightCrawler."""
+    # Imported here so Playwright bindings load only when a crawler is built
+    from crawlee.crawlers import PlaywrightCrawler
+
     # Configure proxy
     proxy_settings = actor_input.get('proxyConfiguration')
     proxy_cfg = None
@@ -99,6 +444,9 @@ async def _create_crawler(actor_input: dict) -> PlaywrightCrawler:
     # Create crawler
     max_pages = actor_input.get('maxPagesPerCrawl', 0)
     return PlaywrightCrawler(
+        request_manager=request_queue,
+        # Stopped by _seed_while_crawling() once sitemap seeding is done
+        keep_alive=_uses_sitemaps(actor_input),
         headless=actor_input.get('headless', True),
         browser_type=actor_input.get('launcher', 'CHROMIUM').lower(),
         max_requests_per_crawl=max_pages if max_pages > 0 else None,
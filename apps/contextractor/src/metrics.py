@@ -0,0 +1,300 @@
+"""Run-level throughput metrics.
+
+A small in-process collector of counters, gauges and histograms. Recording a
+sample is a dict update, so it is cheap enough for every page. A reporter task
+periodically refreshes the derived gauges and publishes a Prometheus text
+snapshot to the key-value store, a one-line summary to the actor status
+message and, optionally, the snapshot on a local HTTP endpoint.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import resource
+import sys
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from typing import Any
+from urllib.parse import urlsplit
+
+from apify import Actor
+
+# Key of the Prometheus snapshot in the key-value store
+METRICS_KEY = 'METRICS'
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Hosts tracked individually in per-host metrics, the rest share `other`
+MAX_HOST_LABELS = 100
+
+_SECONDS_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+_BYTES_BUCKETS = (10e3, 50e3, 100e3, 250e3, 500e3, 1e6, 2.5e6, 5e6, 10e6)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.help_text}'
+        yield f'# TYPE {self.name} {self.kind}'
+        yield from self._samples()
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help_text, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def total(self) -> float:
+        return sum(self.values.values())
+
+    def _samples(self) -> Iterator[str]:
+        for label_values, value in self.values.items():
+            yield f'{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}'
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, *label_values: str) -> None:
+        self.values[label_values] = value
+
+    def get(self, *label_values: str) -> float:
+        return self.values.get(label_values, 0)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets (no labels)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...]) -> None:
+        super().__init__(name, help_text)
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def _samples(self) -> Iterator[str]:
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{self.name}_bucket{{le="{_format_value(bound)}"}} {cumulative}'
+        yield f'{self.name}_bucket{{le="+Inf"}} {self.count}'
+        yield f'{self.name}_sum {_format_value(self.sum)}'
+        yield f'{self.name}_count {self.count}'
+
+
+class CrawlMetrics:
+    """Metrics of one actor run, recorded by the request handler."""
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self._hosts: set[str] = set()
+        self._last_flush = (self.started, 0.0, 0.0)  # (time, pages, busy seconds)
+        self._busy_seconds = 0.0
+
+        self.pages = Counter(
+            'contextractor_pages_total', 'Handled pages by outcome.', ('status',)
+        )
+        self.request_errors = Counter(
+            'contextractor_request_errors_total',
+            'Failed request attempts (including retried ones) by host.',
+            ('host',),
+        )
+        self.requests_failed = Counter(
+            'contextractor_requests_failed_total',
+            'Requests that failed after all retries, by host.',
+            ('host',),
+        )
+        self.page_seconds = Histogram(
+            'contextractor_page_duration_seconds',
+            'Request handler time per page (preparation, extraction, storage).',
+            _SECONDS_BUCKETS,
+        )
+        self.processing_seconds = Histogram(
+            'contextractor_page_processing_seconds',
+            'Extraction and storage time per page.',
+            _SECONDS_BUCKETS,
+        )
+        self.html_bytes = Histogram(
+            'contextractor_page_html_bytes', 'Size of the page HTML.', _BYTES_BUCKETS
+        )
+        self.in_progress = Gauge(
+            'contextractor_pages_in_progress', 'Pages currently in the request handler.'
+        )
+        self.queue_pending = Gauge(
+            'contextractor_queue_pending_requests', 'Requests waiting in the request queue.'
+        )
+        self.pages_per_minute = Gauge(
+            'contextractor_pages_per_minute', 'Handled pages per minute since the last flush.'
+        )
+        self.utilization = Gauge(
+            'contextractor_processing_utilization',
+            'Average number of pages in extraction and storage since the last flush.',
+        )
+        self.max_rss = Gauge(
+            'contextractor_process_max_rss_bytes', 'Peak resident memory of the actor process.'
+        )
+        self._metrics: list[_Metric] = [
+            self.pages, self.request_errors, self.requests_failed, self.page_seconds,
+            self.processing_seconds, self.html_bytes, self.in_progress, self.queue_pending,
+            self.pages_per_minute, self.utilization, self.max_rss,
+        ]
+
+    def host_label(self, url: str) -> str:
+        """Host of the URL, or `other` once MAX_HOST_LABELS hosts are tracked."""
+        host = urlsplit(url).hostname or ''
+        if host in self._hosts:
+            return host
+        if len(self._hosts) < MAX_HOST_LABELS:
+            self._hosts.add(host)
+            return host
+        return 'other'
+
+    def page_started(self) -> None:
+        self.in_progress.set(self.in_progress.get() + 1)
+
+    def page_finished(self, status: str, seconds: float) -> None:
+        """Record a page leaving the handler with `stored`, `skipped` or `error`."""
+        self.in_progress.set(self.in_progress.get() - 1)
+        self.pages.inc(status)
+        self.page_seconds.observe(seconds)
+
+    def page_skipped(self) -> None:
+        """Record a page skipped before it was loaded."""
+        self.pages.inc('skipped')
+
+    def page_processed(self, seconds: float, html_bytes: int) -> None:
+        self.processing_seconds.observe(seconds)
+        self.html_bytes.observe(html_bytes)
+        self._busy_seconds += seconds
+
+    def request_error(self, url: str) -> None:
+        self.request_errors.inc(self.host_label(url))
+
+    def request_failed(self, url: str) -> None:
+        self.requests_failed.inc(self.host_label(url))
+
+    def refresh(self, queue_pending: int | None = None) -> None:
+        """Update the derived gauges for the interval since the last refresh."""
+        now = time.monotonic()
+        last_time, last_pages, last_busy = self._last_flush
+        pages = self.pages.total()
+        elapsed = max(now - last_time, 1e-9)
+        self.pages_per_minute.set((pages - last_pages) * 60 / elapsed)
+        self.utilization.set((self._busy_seconds - last_busy) / elapsed)
+        if queue_pending is not None:
+            self.queue_pending.set(queue_pending)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.max_rss.set(rss if sys.platform == 'darwin' else rss * 1024)
+        self._last_flush = (now, pages, self._busy_seconds)
+
+    def render(self) -> str:
+        """Prometheus text exposition of all metrics."""
+        return '\n'.join(line for metric in self._metrics for line in metric.render()) + '\n'
+
+    def status_message(self) -> str:
+        """One-line run summary for the actor status message."""
+        handled = self.pages.total()
+        sizes = self.html_bytes
+        average_kb = sizes.sum / sizes.count / 1000 if sizes.count else 0
+        return (
+            f'{_format_value(handled)} pages ({self.pages_per_minute.get():.1f}/min), '
+            f'{_format_value(self.pages.values.get(("stored",), 0))} stored, '
+            f'{_format_value(self.requests_failed.total())} failed, '
+            f'queue {_format_value(self.queue_pending.get())}, '
+            f'avg {average_kb:.0f} kB/page'
+        )
+
+
+async def report_metrics(
+    metrics: CrawlMetrics,
+    kvs: Any,
+    request_manager: Any,
+    interval_secs: float,
+    key: str = METRICS_KEY,
+) -> None:
+    """Flush metrics every `interval_secs` until cancelled, and once more on cancel."""
+    try:
+        while True:
+            await asyncio.sleep(interval_secs)
+            await flush_metrics(metrics, kvs, request_manager, key)
+    finally:
+        with contextlib.suppress(Exception):
+            await asyncio.shield(flush_metrics(metrics, kvs, request_manager, key))
+
+
+async def flush_metrics(
+    metrics: CrawlMetrics,
+    kvs: Any,
+    request_manager: Any,
+    key: str = METRICS_KEY,
+) -> None:
+    """Refresh gauges and publish the snapshot and status message."""
+    pending = None
+    if request_manager is not None:
+        total = await request_manager.get_total_count()
+        pending = total - await request_manager.get_handled_count()
+    metrics.refresh(queue_pending=pending)
+    await kvs.set_value(key, metrics.render(), content_type=METRICS_CONTENT_TYPE)
+    await Actor.set_status_message(metrics.status_message())
+
+
+async def start_metrics_server(metrics: CrawlMetrics, port: int) -> asyncio.Server:
+    """Serve the current snapshot on `GET /metrics` (any path) on `port`."""
+
+    async def respond(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await reader.readuntil(b'\r\n\r\n')
+            body = metrics.render().encode('utf-8')
+            writer.write(
+                b'HTTP/1.1 200 OK\r\n'
+                + f'Content-Type: {METRICS_CONTENT_TYPE}\r\n'.encode()
+                + f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode()
+                + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(respond, host='0.0.0.0', port=port)
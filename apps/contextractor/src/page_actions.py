@@ -0,0 +1,257 @@
+"""In-page actions run before content extraction (scrolling, cookie modals, reading HTML)."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from typing import Any
+
+# Selectors for "accept" buttons of common consent managers (OneTrust, Cookiebot,
+# Didomi, Quantcast, TrustArc, Usercentrics, ...). Joined once at import time so
+# the browser resolves the whole set with a single querySelectorAll call.
+COOKIE_ACCEPT_SELECTORS: tuple[str, ...] = (
+    '#onetrust-accept-btn-handler',
+    '#CybotCookiebotDialogBodyLevelButtonLevelOptinAllowAll',
+    '#CybotCookiebotDialogBodyButtonAccept',
+    '#didomi-notice-agree-button',
+    '.qc-cmp2-summary-buttons button[mode="primary"]',
+    '#truste-consent-button',
+    '[data-testid="uc-accept-all-button"]',
+    '.cc-allow',
+    '.cc-accept',
+    '.cookie-consent-accept',
+    '.js-cookie-consent-agree',
+    'button[aria-label*="accept" i][aria-label*="cookie" i]',
+    'button[id*="cookie" i][id*="accept" i]',
+)
+
+# Overlay containers removed when no accept button could be clicked.
+COOKIE_OVERLAY_SELECTORS: tuple[str, ...] = (
+    '#onetrust-consent-sdk',
+    '#CybotCookiebotDialog',
+    '#didomi-host',
+    '.qc-cmp2-container',
+    '#truste-consent-track',
+    '#usercentrics-root',
+    '.cc-window',
+    '[id*="cookie-banner" i]',
+    '[class*="cookie-banner" i]',
+)
+
+_COOKIE_ACCEPT_SELECTOR = ', '.join(COOKIE_ACCEPT_SELECTORS)
+_COOKIE_OVERLAY_SELECTOR = ', '.join(COOKIE_OVERLAY_SELECTORS)
+
+_CLOSE_COOKIE_MODALS_JS = """
+([acceptSelector, overlaySelector]) => {
+    let clicked = 0;
+    for (const el of document.querySelectorAll(acceptSelector)) {
+        const rect = el.getBoundingClientRect();
+        if (rect.width > 0 && rect.height > 0) {
+            el.click();
+            clicked++;
+            break;
+        }
+    }
+    let removed = 0;
+    if (!clicked) {
+        for (const el of document.querySelectorAll(overlaySelector)) {
+            el.remove();
+            removed++;
+        }
+    }
+    if (clicked || removed) {
+        document.documentElement.style.overflow = '';
+        document.body && (document.body.style.overflow = '');
+    }
+    return {clicked, removed};
+}
+"""
+
+# Scrolls in viewport-sized steps. After each step it waits on a MutationObserver
+# until the DOM changes or `idleMs` passes without changes; when a step produces
+# no new content the page is considered fully loaded. The whole loop runs inside
+# one evaluate() call so there is no per-step round trip and no fixed sleep.
+_SCROLL_TO_LOAD_JS = """
+async ({maxScrollHeight, targetTextLength, idleMs, stepMs, timeoutMs}) => {
+    const root = document.scrollingElement || document.documentElement;
+    const deadline = Date.now() + timeoutMs;
+    let lastMutation = 0;
+    const observer = new MutationObserver(() => { lastMutation = Date.now(); });
+    observer.observe(document.body || root, {childList: true, subtree: true});
+
+    // Resolves once the document grew, or no mutation happened for idleMs, or
+    // after stepMs on pages that never stop mutating (carousels, ads, timers)
+    const settle = (heightBefore) => new Promise((resolve) => {
+        const started = Date.now();
+        const check = () => {
+            const now = Date.now();
+            if (root.scrollHeight > heightBefore) return resolve('grown');
+            if (now - Math.max(lastMutation, started) >= idleMs) return resolve('idle');
+            if (now - started >= stepMs || now >= deadline) return resolve('busy');
+            setTimeout(check, 50);
+        };
+        check();
+    });
+    const textLength = () => (document.body || root).textContent.length;
+
+    let scrolled = 0;
+    let reason = 'maxHeight';
+    try {
+        while (scrolled < maxScrollHeight) {
+            if (Date.now() >= deadline) { reason = 'timeout'; break; }
+            if (targetTextLength > 0 && textLength() >= targetTextLength) {
+                reason = 'textLength';
+                break;
+            }
+            const heightBefore = root.scrollHeight;
+            const step = Math.min(window.innerHeight || 800, maxScrollHeight - scrolled);
+            window.scrollBy(0, step);
+            scrolled += step;
+            const outcome = await settle(heightBefore);
+            const atBottom = root.scrollTop + window.innerHeight >= root.scrollHeight - 1;
+            if (outcome !== 'grown' && atBottom) {
+                reason = 'domStable';
+                break;
+            }
+        }
+    } finally {
+        observer.disconnect();
+    }
+    return {scrolled, height: root.scrollHeight, reason};
+}
+"""
+
+# Serializes the page like page.content(). Small pages are returned at once; large
+# ones are kept in the page and read back in chunks, so the Python side never
+# holds the whole document as one string.
+_SERIALIZE_HTML_JS = """
+(maxChars) => {
+    const doctype = document.doctype ? new XMLSerializer().serializeToString(document.doctype) : '';
+    const html = doctype + (document.documentElement ? document.documentElement.outerHTML : '');
+    if (html.length <= maxChars) return {length: html.length, html};
+    window.__contextractorHtml = html;
+    return {length: html.length, html: null};
+}
+"""
+
+# Returns the chunk and its end offset, never splitting a surrogate pair.
+_READ_HTML_CHUNK_JS = """
+([start, size]) => {
+    const html = window.__contextractorHtml;
+    let end = Math.min(start + size, html.length);
+    const code = html.charCodeAt(end - 1);
+    if (end < html.length && code >= 0xD800 && code <= 0xDBFF) end--;
+    return {chunk: html.slice(start, end), end};
+}
+"""
+
+_RELEASE_HTML_JS = '() => { delete window.__contextractorHtml; }'
+
+# Characters read from the page per round trip when streaming a large page.
+HTML_CHUNK_CHARS = 1 << 20
+
+# Quiet time without DOM mutations after which a scroll step is settled.
+SCROLL_IDLE_MS = 500
+
+# Maximum wait for a single scroll step on pages that keep mutating.
+SCROLL_STEP_MS = 1_000
+
+# Upper bound on total time spent scrolling a single page.
+SCROLL_TIMEOUT_MS = 15_000
+
+
+async def close_cookie_modals(page: Any) -> dict[str, int]:
+    """Dismiss cookie consent modals on the page.
+
+    Clicks the first visible accept button from the known selector set. If none
+    is found, known consent overlays are removed from the DOM instead.
+
+    Args:
+        page: Playwright page.
+
+    Returns:
+        Dictionary with number of clicked buttons and removed overlays.
+    """
+    return await page.evaluate(
+        _CLOSE_COOKIE_MODALS_JS,
+        [_COOKIE_ACCEPT_SELECTOR, _COOKIE_OVERLAY_SELECTOR],
+    )
+
+
+async def scroll_to_load(
+    page: Any,
+    max_scroll_height: int,
+    target_text_length: int = 0,
+    idle_ms: int = SCROLL_IDLE_MS,
+    step_ms: int = SCROLL_STEP_MS,
+    timeout_ms: int = SCROLL_TIMEOUT_MS,
+) -> dict[str, Any]:
+    """Scroll down the page to trigger lazy-loaded content.
+
+    After each step, waits until the document grows or no DOM mutation happened
+    for `idle_ms`. Stops as soon as a step neither grows the document nor leaves
+    room to scroll, the page text reaches `target_text_length` characters,
+    `max_scroll_height` pixels were scrolled, or `timeout_ms` elapsed.
+
+    Args:
+        page: Playwright page.
+        max_scroll_height: Maximum number of pixels to scroll. 0 disables scrolling.
+        target_text_length: Page text length that ends scrolling (0 for no target).
+        idle_ms: Quiet time without DOM mutations that settles a scroll step.
+        step_ms: Upper bound on a single step on pages that keep mutating.
+        timeout_ms: Upper bound on the total scrolling time.
+
+    Returns:
+        Dictionary with scrolled pixels, final document height and stop reason.
+    """
+    if max_scroll_height <= 0:
+        return {'scrolled': 0, 'height': None, 'reason': 'disabled'}
+    return await page.evaluate(
+        _SCROLL_TO_LOAD_JS,
+        {
+            'maxScrollHeight': max_scroll_height,
+            'targetTextLength': target_text_length,
+            'idleMs': idle_ms,
+            'stepMs': step_ms,
+            'timeoutMs': timeout_ms,
+        },
+    )
+
+
+async def read_page_html(page: Any, max_chars: int) -> tuple[str | None, int]:
+    """Serialize the page HTML, returning it only if it is small enough.
+
+    Args:
+        page: Playwright page.
+        max_chars: Maximum length of HTML returned at once.
+
+    Returns:
+        Tuple of the HTML (None if longer than `max_chars`, then it is kept in
+        the page for iter_page_html()) and its length in UTF-16 code units.
+    """
+    result = await page.evaluate(_SERIALIZE_HTML_JS, max_chars)
+    return result['html'], result['length']
+
+
+async def iter_page_html(
+    page: Any,
+    length: int,
+    chunk_chars: int = HTML_CHUNK_CHARS,
+) -> AsyncIterator[str]:
+    """Read HTML kept in the page by read_page_html() in chunks.
+
+    Args:
+        page: Playwright page.
+        length: Length returned by read_page_html().
+        chunk_chars: Characters read per round trip.
+
+    Yields:
+        Consecutive chunks of the HTML. The copy in the page is released at the end.
+    """
+    start = 0
+    try:
+        while start < length:
+            result = await page.evaluate(_READ_HTML_CHUNK_JS, [start, chunk_chars])
+            start = result['end']
+            yield result['chunk']
+    finally:
+        await page.evaluate(_RELEASE_HTML_JS)
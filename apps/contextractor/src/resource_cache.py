@@ -0,0 +1,208 @@
+"""Shared on-disk cache of browser subresources.
+
+Pages that need their JavaScript cannot block resources, so every page of a
+site downloads the same bundles, stylesheets and fonts again, and the browser
+cache is lost with every new browser context. With the cache enabled, GET
+requests for subresources are routed through Playwright and answered from one
+directory shared by all pages and browsers of the run. Bodies are stored once
+per content hash, and the total size is bounded by LRU eviction.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import shutil
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from apify import Actor
+
+# Playwright resource types served from the cache
+CACHED_RESOURCE_TYPES = frozenset(('script', 'stylesheet', 'font', 'image'))
+
+# Largest single response kept in the cache
+MAX_ENTRY_BYTES = 10 * 1024 * 1024
+
+# Response headers not replayed: the stored body is already decoded and sized
+_DROPPED_HEADERS = frozenset((
+    'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive',
+    'set-cookie',
+))
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    """Cached response of one URL; the body is stored under its SHA-256 digest."""
+
+    status: int
+    headers: dict[str, str]
+    digest: str
+    size: int
+
+
+def _is_cacheable(status: int, headers: dict[str, str], size: int) -> bool:
+    if status != 200 or size > MAX_ENTRY_BYTES:
+        return False
+    cache_control = headers.get('cache-control', '').lower()
+    if 'no-store' in cache_control or 'private' in cache_control:
+        return False
+    vary = headers.get('vary', '').lower()
+    return '*' not in vary and 'cookie' not in vary
+
+
+class ResourceCache:
+    """Content-addressed subresource cache with size-based LRU eviction.
+
+    Register `handle_route` on each page before navigation::
+
+        await page.route('**/*', cache.handle_route)
+
+    Concurrent requests for the same URL wait for the first download.
+
+    Args:
+        directory: Directory of the cached bodies, removed by close().
+        max_bytes: Maximum total size of the cached bodies.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._refs: dict[str, int] = {}  # digest -> number of URLs with that body
+        self._pending: dict[str, asyncio.Future[CachedResponse | None]] = {}
+        self._writing: dict[str, asyncio.Future[None]] = {}  # digest -> body write in progress
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / digest
+
+    async def handle_route(self, route: Any) -> None:
+        """Playwright route handler serving cacheable subresources from the cache."""
+        request = route.request
+        if request.method != 'GET' or request.resource_type not in CACHED_RESOURCE_TYPES:
+            await route.fallback()
+            return
+
+        url = request.url
+        entry = self._entries.get(url)
+        if entry is None and url in self._pending:
+            entry = await asyncio.shield(self._pending[url])
+        if entry is not None:
+            body = await self._read(url, entry)
+            if body is not None:
+                self.hits += 1
+                self.bytes_served += entry.size
+                await route.fulfill(status=entry.status, headers=entry.headers, body=body)
+                return
+        await self._fetch(route, url)
+
+    async def _fetch(self, route: Any, url: str) -> None:
+        future = self._pending.get(url)
+        owner = future is None
+        if owner:
+            future = self._pending[url] = asyncio.get_running_loop().create_future()
+        entry = None
+        try:
+            try:
+                response = await route.fetch()
+                body = await response.body()
+            except Exception as e:
+                Actor.log.debug(f'Subresource cache fetch failed for {url}: {e}')
+                await route.fallback()
+                return
+            self.misses += 1
+            if owner:
+                try:
+                    entry = await self._store(url, response.status, response.headers, body)
+                except Exception as e:
+                    Actor.log.debug(f'Subresource cache store failed for {url}: {e}')
+            await route.fulfill(response=response, body=body)
+        finally:
+            if owner:
+                del self._pending[url]
+                future.set_result(entry)
+
+    async def _read(self, url: str, entry: CachedResponse) -> bytes | None:
+        try:
+            body = await asyncio.to_thread(self._path(entry.digest).read_bytes)
+        except OSError:
+            self._remove(url)
+            return None
+        if url in self._entries:
+            self._entries.move_to_end(url)
+        return body
+
+    async def _store(
+        self,
+        url: str,
+        status: int,
+        headers: dict[str, str],
+        body: bytes,
+    ) -> CachedResponse | None:
+        headers = {k: v for k, v in headers.items() if k.lower() not in _DROPPED_HEADERS}
+        if not _is_cacheable(status, {k.lower(): v for k, v in headers.items()}, len(body)):
+            return None
+
+        # URLs with the same body (e.g. cache-busting query strings) share one
+        # write; later ones wait for it instead of writing the file again
+        digest = hashlib.sha256(body).hexdigest()
+        write = self._writing.get(digest)
+        if write is None and digest not in self._refs:
+            write = self._writing[digest] = asyncio.ensure_future(
+                asyncio.to_thread(self._write, self._path(digest), body)
+            )
+            try:
+                await write
+            finally:
+                del self._writing[digest]
+        elif write is not None:
+            await asyncio.shield(write)
+        if digest not in self._refs:
+            self._refs[digest] = 0
+            self.size += len(body)
+        self._refs[digest] += 1
+
+        self._remove(url)
+        entry = self._entries[url] = CachedResponse(status, headers, digest, len(body))
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+        return entry
+
+    @staticmethod
+    def _write(path: Path, body: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f'{path.name}.{uuid.uuid4().hex}.tmp')
+        temp_path.write_bytes(body)
+        temp_path.replace(path)
+
+    def _remove(self, url: str) -> None:
+        """Drop the entry of `url`, deleting its body once no URL references it."""
+        entry = self._entries.pop(url, None)
+        if entry is None:
+            return
+        self._refs[entry.digest] -= 1
+        if not self._refs[entry.digest]:
+            del self._refs[entry.digest]
+            self.size -= entry.size
+            self._path(entry.digest).unlink(missing_ok=True)
+
+    def stats(self) -> dict[str, int]:
+        """Hit and size counters for logging."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytesServed': self.bytes_served,
+            'entries': len(self._entries),
+            'bytesStored': self.size,
+        }
+
+    async def close(self) -> None:
+        """Remove the cache directory."""
+        await asyncio.to_thread(shutil.rmtree, self.directory, True)
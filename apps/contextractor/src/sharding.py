@@ -0,0 +1,236 @@
+"""Horizontal sharding of one crawl across several workers.
+
+Each worker is a separate actor run (or a local process) with the same input
+except `shardIndex`. Hosts are assigned to workers by a hash of the hostname,
+so a worker only crawls the start and sitemap URLs of its own hosts, and the
+links it follows stay on those hosts. Every worker is its own process with its
+own request queue and browser pool, and extracts its pages on its own event
+loop; the workers coordinate through status records in the shared key-value
+store:
+
+- each worker publishes its handled and stored page counts every few seconds
+  and stops when the summed counts reach `maxPagesPerCrawl` or
+  `maxResultsPerCrawl`,
+- each worker pushes results to its own dataset, and worker 0 merges them into
+  the configured dataset once all workers have finished.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timezone
+from typing import Any
+from urllib.parse import urlsplit
+
+from apify import Actor
+
+from .state import ResultsCounter
+
+# Seconds between two status exchanges of a worker
+SHARD_SYNC_SECS = 5
+
+# Workers silent for longer than this are given up when merging
+STALE_SHARD_SECS = 300
+
+# Dataset items copied per push when merging
+MERGE_BATCH_SIZE = 500
+
+
+def shard_of(url: str, shard_count: int) -> int:
+    """Index of the worker owning the host of `url`.
+
+    Args:
+        url: Absolute URL.
+        shard_count: Number of workers.
+
+    Returns:
+        Worker index in `[0, shard_count)`; stable across processes and runs.
+    """
+    hostname = (urlsplit(url).hostname or '').lower()
+    digest = hashlib.sha1(hostname.encode()).digest()
+    return int.from_bytes(digest[:8], 'big') % shard_count
+
+
+def shard_name(base: str, shard_index: int) -> str:
+    """Name of a per-worker storage derived from a shared storage name."""
+    return f'{base}-shard-{shard_index}'
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+class ShardCoordinator:
+    """Status exchange and global limits of one worker of a sharded crawl.
+
+    Args:
+        kvs: Key-value store shared by all workers.
+        key: Key prefix of the status records, one record per worker.
+        shard_index: Index of this worker.
+        shard_count: Number of workers.
+        max_pages: Global page limit (0 for no limit).
+        max_results: Global result limit (0 for no limit).
+    """
+
+    def __init__(
+        self,
+        kvs: Any,
+        key: str,
+        shard_index: int,
+        shard_count: int,
+        max_pages: int = 0,
+        max_results: int = 0,
+    ) -> None:
+        if not 0 <= shard_index < shard_count:
+            raise ValueError(f'shardIndex must be between 0 and {shard_count - 1}')
+        self.kvs = kvs
+        self.key = key
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.max_pages = max_pages
+        self.max_results = max_results
+
+    def owns(self, url: str) -> bool:
+        """Check if this worker crawls the host of `url`."""
+        return shard_of(url, self.shard_count) == self.shard_index
+
+    def status_key(self, shard_index: int) -> str:
+        """Key of the status record of a worker."""
+        return f'{self.key}-{shard_index}'
+
+    def merge_key(self) -> str:
+        """Key of the merge progress record, written by worker 0."""
+        return f'{self.key}-MERGE'
+
+    async def publish(self, handled: int, stored: int, finished: bool = False) -> None:
+        """Write the status record of this worker."""
+        await self.kvs.set_value(self.status_key(self.shard_index), {
+            'handled': handled,
+            'stored': stored,
+            'finished': finished,
+            'updatedAt': _now(),
+        })
+
+    async def read_statuses(self) -> list[dict | None]:
+        """Status records of all workers, None for workers that did not publish yet."""
+        return [await self.kvs.get_value(self.status_key(i)) for i in range(self.shard_count)]
+
+    async def sync(self, results_counter: ResultsCounter, request_manager: Any) -> str | None:
+        """Publish this worker's counts and apply the global limits.
+
+        The local result limit is narrowed to the results still missing
+        globally, so this worker alone cannot overshoot them; workers storing
+        concurrently may still overshoot by what they store within one sync
+        interval, which the merge trims from the dataset.
+
+        Returns:
+            Reason to stop this worker, or None to continue.
+        """
+        handled = await request_manager.get_handled_count()
+        await self.publish(handled, results_counter.count)
+        statuses = [status or {} for status in await self.read_statuses()]
+
+        total_handled = sum(status.get('handled', 0) for status in statuses)
+        if self.max_pages and total_handled >= self.max_pages:
+            return f'Max pages reached by all shards ({total_handled})'
+
+        if self.max_results:
+            remaining = self.max_results - sum(status.get('stored', 0) for status in statuses)
+            if remaining <= 0:
+                return f'Max results reached by all shards ({self.max_results})'
+            results_counter.max_results = results_counter.count + remaining
+        return None
+
+    async def wait_for_shards(self) -> None:
+        """Wait until all other workers have published a finished status.
+
+        Workers that did not update their status for `STALE_SHARD_SECS` are
+        given up with a warning, so a crashed run cannot block the merge.
+        """
+        started = time.monotonic()
+        while True:
+            pending = []
+            for index, status in enumerate(await self.read_statuses()):
+                if status and status.get('finished'):
+                    continue
+                if status:
+                    updated_at = datetime.fromisoformat(status['updatedAt'].replace('Z', '+00:00'))
+                    silent_secs = (datetime.now(timezone.utc) - updated_at).total_seconds()
+                else:
+                    silent_secs = time.monotonic() - started
+                if silent_secs > STALE_SHARD_SECS:
+                    Actor.log.warning(
+                        f'Shard {index} silent for {silent_secs:.0f}s, merging without it'
+                    )
+                    continue
+                pending.append(index)
+            if not pending:
+                return
+            Actor.log.debug(f'Waiting for shards {pending} to finish')
+            await asyncio.sleep(SHARD_SYNC_SECS)
+
+    async def merge_results(self, dataset_base: str, target: Any) -> int:
+        """Move the results of all workers into `target`, at most `max_results` items.
+
+        Workers are merged one after another and the progress (worker index,
+        items copied from its dataset and in total) is written to the
+        merge progress record after every pushed batch. A merge interrupted by
+        a restart continues from there; only a batch pushed right before the
+        interruption, whose progress was not recorded yet, is copied again.
+        Worker datasets are dropped once fully copied.
+
+        Args:
+            dataset_base: Base name of the per-worker datasets.
+            target: Dataset receiving the results.
+
+        Returns:
+            Number of items merged.
+        """
+        merge_key = self.merge_key()
+        progress = await self.kvs.get_value(merge_key) or {}
+        first = progress.get('shard', 0)
+        offset = progress.get('offset', 0)
+        merged = progress.get('merged', 0)
+        for index in range(first, self.shard_count):
+            dataset = await Actor.open_dataset(name=shard_name(dataset_base, index))
+            batch: list[dict] = []
+            async for item in dataset.iterate_items(offset=offset):
+                if self.max_results and merged + len(batch) >= self.max_results:
+                    break
+                batch.append(item)
+                if len(batch) >= MERGE_BATCH_SIZE:
+                    await target.push_data(batch)
+                    merged += len(batch)
+                    offset += len(batch)
+                    batch = []
+                    await self.kvs.set_value(
+                        merge_key, {'shard': index, 'offset': offset, 'merged': merged}
+                    )
+            if batch:
+                await target.push_data(batch)
+                merged += len(batch)
+            await dataset.drop()
+            offset = 0
+            await self.kvs.set_value(merge_key, {'shard': index + 1, 'offset': 0, 'merged': merged})
+        for index in range(self.shard_count):
+            await self.kvs.delete_value(self.status_key(index))
+        await self.kvs.delete_value(merge_key)
+        return merged
+
+
+async def sync_shards(
+    coordinator: ShardCoordinator,
+    crawler: Any,
+    results_counter: ResultsCounter,
+    interval_secs: float = SHARD_SYNC_SECS,
+) -> None:
+    """Exchange status every `interval_secs` until the global limits stop the crawler."""
+    request_manager = await crawler.get_request_manager()
+    while True:
+        reason = await coordinator.sync(results_counter, request_manager)
+        if reason:
+            crawler.stop(reason)
+            return
+        await asyncio.sleep(interval_secs)
@@ -0,0 +1,290 @@
+"""Sitemap-based URL discovery.
+
+Sitemaps are downloaded and parsed chunk by chunk with an incremental XML
+parser, so a sitemap with millions of URLs is never held in memory as a whole.
+Gzipped sitemaps (`.xml.gz`) are decompressed on the fly, sitemap indexes are
+followed, and plain-text sitemaps (one URL per line) are supported too.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import zlib
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from urllib.parse import urljoin, urlsplit
+from urllib.request import Request as UrlRequest
+from urllib.request import urlopen
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+from apify import Actor
+from crawlee import Request
+
+from .links import build_url_filter
+
+# Requests added to the queue per call
+SITEMAP_BATCH_SIZE = 1000
+
+# Maximum nesting of sitemap indexes, guards against sitemap loops
+MAX_SITEMAP_DEPTH = 10
+
+# Maximum decompressed size of one sitemap, per the sitemap protocol
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+_CHUNK_SIZE = 64 * 1024
+_TIMEOUT_SECS = 30
+_HEADERS = {
+    'Accept': 'application/xml, text/xml;q=0.9, text/plain;q=0.8, */*;q=0.5',
+    'User-Agent': 'Mozilla/5.0 (compatible; Contextractor)',
+}
+
+
+@dataclass(frozen=True)
+class SitemapEntry:
+    """URL entry of a sitemap (`kind='url'`) or a nested sitemap of an index."""
+
+    kind: str  # 'url' or 'sitemap'
+    loc: str
+    lastmod: datetime | None = None
+
+
+def parse_lastmod(value: str | None) -> datetime | None:
+    """Parse a W3C datetime (`2024-05-01` or `2024-05-01T10:00:00+02:00`).
+
+    Returns:
+        Timezone-aware datetime (UTC if no offset is given), or None if invalid.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def parse_robots_sitemaps(robots_txt: str, base_url: str) -> list[str]:
+    """Collect `Sitemap:` URLs from a robots.txt file."""
+    sitemaps = []
+    for line in robots_txt.splitlines():
+        key, _, value = line.partition(':')
+        if key.strip().lower() == 'sitemap' and value.strip():
+            sitemaps.append(urljoin(base_url, value.strip()))
+    return list(dict.fromkeys(sitemaps))
+
+
+class SitemapParser:
+    """Incremental parser for XML sitemaps, sitemap indexes and text sitemaps.
+
+    Feed raw (decompressed) bytes as they arrive; every call yields the
+    entries completed so far. Parsed elements are discarded immediately.
+    """
+
+    def __init__(self) -> None:
+        self._xml: XMLPullParser | None = None
+        self._text_buffer: bytes | None = None
+        self._root = None
+        self._loc: str | None = None
+        self._lastmod: str | None = None
+
+    def feed(self, data: bytes) -> Iterator[SitemapEntry]:
+        """Feed the next chunk and yield completed entries."""
+        if self._xml is None and self._text_buffer is None:
+            stripped = data.lstrip(b'\xef\xbb\xbf \t\r\n')
+            if not stripped:
+                return
+            if stripped.startswith(b'<'):
+                self._xml = XMLPullParser(events=('start', 'end'))
+            else:
+                # Drop the byte order mark, it would hide the first URL
+                self._text_buffer = b''
+                data = stripped
+        if self._xml is not None:
+            self._xml.feed(data)
+            yield from self._xml_entries()
+        else:
+            lines = (self._text_buffer + data).split(b'\n')
+            self._text_buffer = lines.pop()
+            yield from self._text_entries(lines)
+
+    def close(self) -> Iterator[SitemapEntry]:
+        """Flush the parser and yield the remaining entries."""
+        if self._xml is not None:
+            self._xml.close()
+            yield from self._xml_entries()
+        elif self._text_buffer:
+            yield from self._text_entries([self._text_buffer])
+
+    def _xml_entries(self) -> Iterator[SitemapEntry]:
+        assert self._xml is not None
+        for event, element in self._xml.read_events():
+            if event == 'start':
+                if self._root is None:
+                    self._root = element
+                continue
+            name = element.tag.rsplit('}', 1)[-1]
+            if name == 'loc':
+                self._loc = (element.text or '').strip()
+            elif name == 'lastmod':
+                self._lastmod = (element.text or '').strip()
+            elif name in ('url', 'sitemap'):
+                if self._loc:
+                    kind = 'url' if name == 'url' else 'sitemap'
+                    yield SitemapEntry(kind, self._loc, parse_lastmod(self._lastmod))
+                self._loc = self._lastmod = None
+                # Drop finished entries so the tree never grows
+                self._root.clear()
+
+    @staticmethod
+    def _text_entries(lines: list[bytes]) -> Iterator[SitemapEntry]:
+        for line in lines:
+            url = line.decode('utf-8', errors='replace').strip()
+            if url.startswith(('http://', 'https://')):
+                yield SitemapEntry('url', url)
+
+
+def _iter_chunks(url: str) -> Iterator[bytes]:
+    """Download a sitemap in chunks, decompressing gzip on the fly."""
+    request = UrlRequest(url, headers=_HEADERS)
+    with urlopen(request, timeout=_TIMEOUT_SECS) as response:
+        decompressor = None
+        total = 0
+        while chunk := response.read(_CHUNK_SIZE):
+            if decompressor is None and total == 0 and chunk.startswith(b'\x1f\x8b'):
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            if decompressor is not None:
+                # Bound each decompressed piece so a gzip bomb cannot blow up memory
+                chunk = decompressor.decompress(chunk, _CHUNK_SIZE * 16)
+            total += len(chunk)
+            if total > MAX_SITEMAP_BYTES:
+                Actor.log.warning(f'Sitemap {url} exceeds {MAX_SITEMAP_BYTES} bytes, truncated')
+                return
+            yield chunk
+            while decompressor is not None and decompressor.unconsumed_tail:
+                chunk = decompressor.decompress(decompressor.unconsumed_tail, _CHUNK_SIZE * 16)
+                total += len(chunk)
+                if total > MAX_SITEMAP_BYTES:
+                    return
+                yield chunk
+
+
+def _read_sitemap(url: str) -> Iterator[SitemapEntry]:
+    """Download and parse one sitemap, yielding entries as they are parsed."""
+    parser = SitemapParser()
+    for chunk in _iter_chunks(url):
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def _is_modified(entry: SitemapEntry, modified_since: datetime | None) -> bool:
+    return modified_since is None or entry.lastmod is None or entry.lastmod >= modified_since
+
+
+def iter_sitemap_urls(
+    sitemap_urls: list[str],
+    modified_since: datetime | None = None,
+) -> Iterator[str]:
+    """Stream page URLs from sitemaps, following sitemap indexes.
+
+    Args:
+        sitemap_urls: Sitemap or sitemap index URLs.
+        modified_since: Skip entries whose `lastmod` is older. Entries without
+            `lastmod` are always included.
+
+    Yields:
+        Page URLs in sitemap order. Sitemaps that fail to load are logged and skipped.
+    """
+    pending = deque((url, 0) for url in sitemap_urls)
+    visited: set[str] = set()
+    while pending:
+        sitemap_url, depth = pending.popleft()
+        if sitemap_url in visited:
+            continue
+        visited.add(sitemap_url)
+        count = 0
+        try:
+            for entry in _read_sitemap(sitemap_url):
+                count += 1
+                if not _is_modified(entry, modified_since):
+                    continue
+                if entry.kind == 'url':
+                    yield entry.loc
+                elif depth < MAX_SITEMAP_DEPTH:
+                    pending.append((entry.loc, depth + 1))
+                else:
+                    Actor.log.warning(f'Skipping sitemap {entry.loc}: nested too deep')
+        except (OSError, ParseError, zlib.error) as e:
+            Actor.log.warning(f'Failed to read sitemap {sitemap_url}: {e}')
+            continue
+        Actor.log.info(f'Read sitemap {sitemap_url} ({count} entries)')
+
+
+def discover_sitemaps(start_urls: list[str]) -> list[str]:
+    """Find sitemaps of the start URL hosts from their robots.txt.
+
+    Falls back to `/sitemap.xml` for hosts whose robots.txt lists none.
+    """
+    sitemaps: list[str] = []
+    origins = dict.fromkeys(
+        f'{parts.scheme}://{parts.netloc}'
+        for parts in map(urlsplit, start_urls)
+        if parts.scheme in ('http', 'https')
+    )
+    for origin in origins:
+        found: list[str] = []
+        try:
+            robots = b''.join(_iter_chunks(f'{origin}/robots.txt'))
+            found = parse_robots_sitemaps(robots.decode('utf-8', errors='replace'), origin)
+        except OSError as e:
+            Actor.log.debug(f'No robots.txt for {origin}: {e}')
+        sitemaps.extend(found or [f'{origin}/sitemap.xml'])
+    return sitemaps
+
+
+async def seed_from_sitemaps(
+    add_requests: Callable[[list[Request]], Awaitable[object]],
+    sitemap_urls: list[str],
+    config: dict,
+    modified_since: datetime | None = None,
+    accept: Callable[[str], bool] | None = None,
+) -> int:
+    """Add page URLs from sitemaps to the crawl in batches.
+
+    Download and parsing run in a worker thread, one batch at a time, so the
+    event loop stays responsive and at most one batch is held in memory.
+
+    Args:
+        add_requests: Callback adding a batch of requests, e.g. `crawler.add_requests`.
+        sitemap_urls: Sitemap or sitemap index URLs.
+        config: Crawl configuration stored in each request's user data.
+        modified_since: Skip entries with an older `lastmod`.
+        accept: Extra URL filter, e.g. the hosts of a shard.
+
+    Returns:
+        Number of requests added.
+    """
+    url_filter = build_url_filter(config.get('globs', []), config.get('excludes', []))
+    keep_fragments = config.get('keep_url_fragments', False)
+    urls = (
+        url
+        for url in iter_sitemap_urls(sitemap_urls, modified_since)
+        if url_filter(url) and (accept is None or accept(url))
+    )
+
+    def next_batch() -> list[str]:
+        return [url for _, url in zip(range(SITEMAP_BATCH_SIZE), urls)]
+
+    added = 0
+    while batch := await asyncio.to_thread(next_batch):
+        await add_requests([
+            Request.from_url(
+                url,
+                user_data={'config': config, 'depth': 0},
+                keep_url_fragment=keep_fragments,
+            )
+            for url in batch
+        ])
+        added += len(batch)
+    return added
@@ -0,0 +1,273 @@
+"""Crawl state persisted to the key-value store for crash-safe, resumable runs."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+from typing import Any
+
+from apify import Actor
+
+from contextractor_engine import BoilerplateTemplates, SimHashIndex
+
+STATE_KEY_PREFIX = 'CONTEXTRACTOR-STATE'
+
+# Stored page keys per persisted chunk (8 bytes each, 256 KiB per chunk)
+STORED_CHUNK_KEYS = 32_768
+
+# Longest delay between storing a result and persisting it
+PERSIST_DEBOUNCE_SECS = 2.0
+
+
+class ResultsCounter:
+    """Thread-safe counter for tracking results.
+
+    Requests reserve a slot under their unique key before the page is loaded
+    and commit it once the result is stored, so concurrent pages can never
+    exceed `max_results`. Releasing is idempotent, so a slot is given back
+    exactly once whether the handler or a crawler error handler gets to it.
+    """
+
+    def __init__(self, max_results: int, count: int = 0) -> None:
+        self.max_results = max_results
+        self._count = count
+        self._reserved: set[str] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        """Current number of stored results."""
+        return self._count
+
+    @property
+    def reserved(self) -> int:
+        """Number of slots held by pages in progress."""
+        return len(self._reserved)
+
+    def try_reserve(self, key: str) -> bool:
+        """Reserve a slot for the result of request `key`.
+
+        Returns:
+            True if `key` holds a slot, False if stored and in-flight results
+            already fill the limit.
+        """
+        with self._lock:
+            if key in self._reserved:
+                return True
+            if self.max_results > 0 and self._count + len(self._reserved) >= self.max_results:
+                return False
+            self._reserved.add(key)
+            return True
+
+    def holds(self, key: str) -> bool:
+        """Check if request `key` holds a reserved slot."""
+        return key in self._reserved
+
+    def commit(self, key: str) -> int:
+        """Turn the slot of `key` into a stored result and return new count."""
+        with self._lock:
+            self._reserved.discard(key)
+            self._count += 1
+            return self._count
+
+    def release(self, key: str) -> None:
+        """Give back the slot of `key` if it holds one; its page was not stored."""
+        with self._lock:
+            self._reserved.discard(key)
+
+    def restore(self, count: int) -> None:
+        """Reset the counter to a previously persisted value."""
+        with self._lock:
+            self._count = count
+
+    def is_limit_reached(self) -> bool:
+        """Check if max results limit is reached."""
+        return self.max_results > 0 and self._count >= self.max_results
+
+
+def build_state_key(request_queue_name: str | None) -> str:
+    """Build the key-value store key for persisted crawl state.
+
+    Runs sharing a named request queue share their state, so a resumed run
+    continues where the previous one stopped.
+
+    Args:
+        request_queue_name: Name of the request queue, if any.
+
+    Returns:
+        Key-value store key.
+    """
+    if not request_queue_name:
+        return STATE_KEY_PREFIX
+    safe_name = re.sub(r"[^a-zA-Z0-9!\-_.'()]", '-', request_queue_name)
+    return f'{STATE_KEY_PREFIX}-{safe_name}'
+
+
+class CrawlState:
+    """Crawl progress that survives restarts, migrations and resumed runs.
+
+    Holds the results counter, keys of pages already stored, the optional
+    near-duplicate index and the optional learned boilerplate templates. The
+    state is written to the key-value store on `persist()` and read back on
+    `restore()`.
+
+    Stored page keys (16 hex characters) are kept as 8 bytes each in the order
+    they were added and written in chunks of `STORED_CHUNK_KEYS` keys under
+    `{key}-STORED-{n}`, so a persist rewrites only the last chunk. Marking a
+    page stored schedules a persist of the counter and the keys within
+    `PERSIST_DEBOUNCE_SECS`, so a crash loses at most that interval. A
+    restored near-duplicate index keeps its fingerprints but uses the
+    `max_distance` of the current run.
+    """
+
+    def __init__(
+        self,
+        kvs: Any,
+        key: str,
+        results_counter: ResultsCounter,
+        near_duplicates: SimHashIndex | None = None,
+        templates: BoilerplateTemplates | None = None,
+    ) -> None:
+        self.kvs = kvs
+        self.key = key
+        self.results_counter = results_counter
+        self.near_duplicates = near_duplicates
+        self.templates = templates
+        self._stored: set[bytes] = set()
+        self._stored_log = bytearray()
+        self._persisted_chunks = 0
+        self._persist_lock = asyncio.Lock()
+        self._scheduled: asyncio.Task | None = None
+
+    @property
+    def near_duplicates_key(self) -> str:
+        """Key of the serialized near-duplicate index."""
+        return f'{self.key}-SIMHASH'
+
+    @property
+    def templates_key(self) -> str:
+        """Key of the learned boilerplate templates."""
+        return f'{self.key}-TEMPLATES'
+
+    def stored_chunk_key(self, index: int) -> str:
+        """Key of a chunk of stored page keys."""
+        return f'{self.key}-STORED-{index}'
+
+    @property
+    def stored_count(self) -> int:
+        """Number of pages recorded as stored."""
+        return len(self._stored)
+
+    def is_stored(self, key_base: str) -> bool:
+        """Check if the page with given key was already stored."""
+        return bytes.fromhex(key_base) in self._stored
+
+    def mark_stored(self, key_base: str) -> None:
+        """Record that the page with given key was stored and schedule a persist."""
+        key = bytes.fromhex(key_base)
+        if key in self._stored:
+            return
+        self._stored.add(key)
+        self._stored_log += key
+        if self._scheduled is None or self._scheduled.done():
+            self._scheduled = asyncio.get_running_loop().create_task(self._persist_later())
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert state to a JSON-serializable dict."""
+        return {
+            'resultsCount': self.results_counter.count,
+            'storedCount': self.stored_count,
+            'storedChunks': self._chunk_count(),
+        }
+
+    async def persist(self) -> None:
+        """Write the current state, the near-duplicate index and templates."""
+        if self._scheduled is not None:
+            # Everything the scheduled persist would write is written here
+            self._scheduled.cancel()
+            self._scheduled = None
+        await self.persist_progress()
+        if self.near_duplicates is not None:
+            await self.kvs.set_value(
+                self.near_duplicates_key,
+                self.near_duplicates.to_bytes(),
+                content_type='application/octet-stream',
+            )
+        if self.templates is not None:
+            await self.kvs.set_value(self.templates_key, self.templates.to_dict())
+
+    async def persist_progress(self) -> None:
+        """Write the results count and the stored keys not written yet.
+
+        Chunks are written before the state record, so a persisted count never
+        refers to keys that were not persisted.
+        """
+        async with self._persist_lock:
+            state = self.to_dict()
+            chunk_bytes = STORED_CHUNK_KEYS * 8
+            for index in range(self._persisted_chunks, state['storedChunks']):
+                chunk = bytes(self._stored_log[index * chunk_bytes : (index + 1) * chunk_bytes])
+                await self.kvs.set_value(
+                    self.stored_chunk_key(index), chunk, content_type='application/octet-stream'
+                )
+            # The last chunk is rewritten until it is full
+            self._persisted_chunks = self.stored_count // STORED_CHUNK_KEYS
+            await self.kvs.set_value(self.key, state)
+
+    async def _persist_later(self) -> None:
+        await asyncio.sleep(PERSIST_DEBOUNCE_SECS)
+        try:
+            await self.persist_progress()
+        except Exception as e:
+            # The next commit or PERSIST_STATE event writes the state again
+            Actor.log.warning(f'Could not persist crawl state: {e}')
+
+    def _chunk_count(self) -> int:
+        return -(-self.stored_count // STORED_CHUNK_KEYS)
+
+    async def clear(self) -> None:
+        """Delete the persisted state, so the crawl starts from scratch."""
+        data = await self.kvs.get_value(self.key) or {}
+        for index in range(data.get('storedChunks', 0)):
+            await self.kvs.delete_value(self.stored_chunk_key(index))
+        for key in (self.key, self.near_duplicates_key, self.templates_key):
+            await self.kvs.delete_value(key)
+
+    async def restore(self) -> bool:
+        """Load previously persisted state from the key-value store.
+
+        Returns:
+            True if a persisted state was found and loaded.
+        """
+        data = await self.kvs.get_value(self.key)
+        if not data:
+            return False
+        self.results_counter.restore(data.get('resultsCount', 0))
+        self._stored_log = bytearray()
+        for index in range(data.get('storedChunks', 0)):
+            self._stored_log += await self.kvs.get_value(self.stored_chunk_key(index)) or b''
+        # State written before keys were chunked
+        for key_base in data.get('storedKeys', []):
+            self._stored_log += bytes.fromhex(key_base)
+        self._stored = {
+            bytes(self._stored_log[i : i + 8]) for i in range(0, len(self._stored_log), 8)
+        }
+        # Legacy keys are not in chunk records yet, so every chunk is written again
+        legacy = 'storedKeys' in data
+        self._persisted_chunks = 0 if legacy else self.stored_count // STORED_CHUNK_KEYS
+        if self.near_duplicates is not None:
+            index_data = await self.kvs.get_value(self.near_duplicates_key)
+            if index_data:
+                self.near_duplicates = SimHashIndex.from_bytes(
+                    index_data, max_distance=self.near_duplicates.max_distance
+                )
+        if self.templates is not None:
+            templates_data = await self.kvs.get_value(self.templates_key)
+            if templates_data:
+                self.templates.load_dict(templates_data)
+        Actor.log.info(
+            f'Restored crawl state: {self.results_counter.count} results, '
+            f'{self.stored_count} stored pages'
+        )
+        return True
@@ -0,0 +1,224 @@
+"""Tests for content encoding, inlining and storage in the key-value store."""
+
+import asyncio
+import gzip
+import hashlib
+from urllib.parse import quote
+
+import brotli
+import pytest
+
+from src.extraction import (
+    PublicUrlTemplate,
+    StreamedContent,
+    compress_content,
+    save_content_to_kvs,
+    save_streamed_to_kvs,
+)
+
+URL_BASE = 'https://api.example.com/v2/key-value-stores/abc/records/'
+
+CONTENT = ('<p>Lorem ipsum dolor sit amet, ž. </p>\n' * 500).encode('utf-8')
+
+
+class FakeKeyValueStore:
+    """In-memory key-value store with API-style public URLs."""
+
+    def __init__(self, url_base: str = URL_BASE) -> None:
+        self.url_base = url_base
+        self.values: dict = {}
+        self.content_types: dict[str, str] = {}
+        self.url_calls = 0
+
+    async def set_value(self, key: str, value, content_type: str | None = None) -> None:
+        self.values[key] = value
+        self.content_types[key] = content_type
+
+    async def get_public_url(self, key: str) -> str:
+        self.url_calls += 1
+        return self.url_base + key
+
+
+def _decompress(body: bytes, compression: str) -> bytes:
+    return gzip.decompress(body) if compression == 'gzip' else brotli.decompress(body)
+
+
+class TestCompression:
+    """Compressed records decode to the original content under suffixed keys."""
+
+    @pytest.mark.parametrize('compression', ['gzip', 'br'])
+    def test_compress_round_trip(self, compression: str) -> None:
+        """compress_content() output decompresses to its input."""
+        body = compress_content(CONTENT, compression)
+        assert len(body) < len(CONTENT)
+        assert _decompress(body, compression) == CONTENT
+
+    def test_gzip_is_deterministic(self) -> None:
+        """gzip output carries no timestamp, so equal content gives equal records."""
+        assert compress_content(CONTENT, 'gzip') == compress_content(CONTENT, 'gzip')
+
+    def test_unsupported_compression(self) -> None:
+        """Unknown encodings are rejected."""
+        with pytest.raises(ValueError):
+            compress_content(CONTENT, 'zstd')
+        with pytest.raises(ValueError):
+            StreamedContent('zstd')
+
+    @pytest.mark.parametrize('compression', [None, 'gzip', 'br'])
+    def test_streamed_round_trip(self, compression: str | None) -> None:
+        """Content written in chunks decodes to the whole and hashes like it."""
+        content = StreamedContent(compression)
+        for start in range(0, len(CONTENT), 1000):
+            content.write(CONTENT[start : start + 1000])
+        body = content.getvalue()
+        assert (_decompress(body, compression) if compression else body) == CONTENT
+        assert content.info() == {'hash': hashlib.md5(CONTENT).hexdigest(), 'length': len(CONTENT)}
+
+    def test_streamed_without_keeping(self) -> None:
+        """With keep=False only the hash and length are available."""
+        content = StreamedContent('gzip', keep=False)
+        content.write(CONTENT)
+        assert content.compression is None
+        assert content.info()['length'] == len(CONTENT)
+        with pytest.raises(ValueError):
+            content.getvalue()
+
+    @pytest.mark.parametrize(
+        ('compression', 'suffix', 'content_type'),
+        [('gzip', '.gz', 'application/gzip'), ('br', '.br', 'application/x-brotli')],
+    )
+    def test_key_suffix(self, compression: str, suffix: str, content_type: str) -> None:
+        """Compressed records get a suffixed key and report their encoding."""
+
+        async def run():
+            kvs = FakeKeyValueStore()
+            info = await save_content_to_kvs(
+                kvs, 'page-text', CONTENT.decode('utf-8'), 'text/plain', compression=compression
+            )
+            assert info['key'] == f'page-text{suffix}'
+            assert kvs.content_types[info['key']] == content_type
+            assert info['contentType'] == 'text/plain'
+            assert info['contentEncoding'] == compression
+            assert info['length'] == len(CONTENT)
+            assert info['encodedLength'] == len(kvs.values[info['key']])
+            assert _decompress(kvs.values[info['key']], compression) == CONTENT
+
+            streamed = StreamedContent(compression)
+            streamed.write(CONTENT)
+            streamed_info = await save_streamed_to_kvs(kvs, 'page-html', streamed, 'text/html')
+            assert streamed_info['key'] == f'page-html{suffix}'
+            assert streamed_info['hash'] == info['hash']
+
+        asyncio.run(run())
+
+
+class TestInlineContent:
+    """Content up to inline_max_bytes is returned instead of stored."""
+
+    def test_threshold(self) -> None:
+        """The limit is inclusive and measured in UTF-8 bytes."""
+
+        async def run():
+            kvs = FakeKeyValueStore()
+            text = 'ž' * 5  # 10 bytes
+            info = await save_content_to_kvs(kvs, 'small', text, 'text/plain', inline_max_bytes=10)
+            assert info['content'] == text
+            assert 'key' not in info
+            assert info['length'] == 10
+            assert kvs.values == {}
+
+            info = await save_content_to_kvs(kvs, 'large', text, 'text/plain', inline_max_bytes=9)
+            assert info['key'] == 'large'
+            assert kvs.values['large'] == text.encode('utf-8')
+
+        asyncio.run(run())
+
+    def test_disabled(self) -> None:
+        """A threshold of 0 stores even empty content."""
+
+        async def run():
+            kvs = FakeKeyValueStore()
+            info = await save_content_to_kvs(kvs, 'empty', '', 'text/plain')
+            assert info['key'] == 'empty'
+            assert 'content' not in info
+
+        asyncio.run(run())
+
+    def test_inline_ignores_compression(self) -> None:
+        """Inlined content is returned uncompressed."""
+
+        async def run():
+            kvs = FakeKeyValueStore()
+            info = await save_content_to_kvs(
+                kvs, 'small', 'hello', 'text/plain', compression='gzip', inline_max_bytes=100
+            )
+            assert info['content'] == 'hello'
+            assert 'contentEncoding' not in info
+
+        asyncio.run(run())
+
+
+class TestPublicUrlTemplate:
+    """Record URLs are built locally, without a call per key."""
+
+    def test_matches_store_urls(self) -> None:
+        """Built URLs equal the store's, including escaped keys and query strings."""
+
+        async def run():
+            kvs = FakeKeyValueStore()
+            template = await PublicUrlTemplate.create(kvs)
+            assert kvs.url_calls == 1
+            for key in ('page-text.gz', 'a b/c', 'ž'):
+                assert template.url(key) == URL_BASE + quote(key, safe='')
+
+            kvs = FakeKeyValueStore()
+            kvs.get_public_url = _with_query(kvs.get_public_url, '?token=x&empty=')
+            template = await PublicUrlTemplate.create(kvs)
+            assert template.url('key') == URL_BASE + 'key?token=x&empty='
+
+        asyncio.run(run())
+
+    def test_signed_urls_not_templated(self) -> None:
+        """Stores with signed URLs keep asking the store for each key."""
+
+        async def run():
+            kvs = FakeKeyValueStore()
+            kvs.get_public_url = _with_query(kvs.get_public_url, '?signature=abc')
+            assert await PublicUrlTemplate.create(kvs) is None
+
+        asyncio.run(run())
+
+    def test_unexpected_url_not_templated(self) -> None:
+        """URLs not ending with the key cannot be templated."""
+
+        async def run():
+            kvs = FakeKeyValueStore()
+
+            async def get_public_url(key: str) -> str:
+                return 'file:///storage/record'
+
+            kvs.get_public_url = get_public_url
+            assert await PublicUrlTemplate.create(kvs) is None
+
+        asyncio.run(run())
+
+    def test_used_for_stored_records(self) -> None:
+        """save_content_to_kvs() takes the URL from the template."""
+
+        async def run():
+            kvs = FakeKeyValueStore()
+            template = await PublicUrlTemplate.create(kvs)
+            info = await save_content_to_kvs(
+                kvs, 'page', 'x' * 100, 'text/plain', compression='br', public_urls=template
+            )
+            assert info['url'] == URL_BASE + 'page.br'
+            assert kvs.url_calls == 1
+
+        asyncio.run(run())
+
+
+def _with_query(get_public_url, query: str):
+    async def wrapper(key: str) -> str:
+        return await get_public_url(key) + query
+
+    return wrapper
@@ -0,0 +1,100 @@
+"""Tests for page loading and processing in the request handler."""
+
+import asyncio
+from types import SimpleNamespace
+
+from crawlee import Request
+
+from contextractor_engine import TrafilaturaConfig
+
+from src.handler import _load_page, _process_page
+
+
+class FakePage:
+    """Page whose evaluate() serves the HTML snippets of page_actions in small chunks."""
+
+    def __init__(self, html: str, chunk_chars: int = 64) -> None:
+        self.html = html
+        self.chunk_chars = chunk_chars
+
+    async def evaluate(self, script: str, arg=None):
+        if 'XMLSerializer' in script:
+            if len(self.html) <= arg:
+                return {'length': len(self.html), 'html': self.html}
+            return {'length': len(self.html), 'html': None}
+        if 'slice' in script:
+            start, size = arg
+            end = min(start + min(size, self.chunk_chars), len(self.html))
+            return {'chunk': self.html[start:end], 'end': end}
+        return None
+
+
+def _context(html: str) -> SimpleNamespace:
+    return SimpleNamespace(page=FakePage(html), request=Request.from_url('https://example.com/'))
+
+
+def _load_and_process(html: str, threshold: int) -> tuple[str, object, dict | None]:
+    async def run():
+        context = _context(html)
+        config = {'large_page_threshold': threshold, 'save_text': True}
+        page_html, tree, raw_html = await _load_page(context, config)
+        data = await _process_page(
+            context, None, 'key', page_html, tree, config, raw_html=raw_html
+        )
+        return page_html, tree, data
+
+    return asyncio.run(run())
+
+
+class TestStreamedPage:
+    """Tests for pages streamed out of the browser in chunks."""
+
+    def test_unparseable_streamed_page_is_skipped(self) -> None:
+        """A streamed page without a tree is skipped, not extracted from its first chunk."""
+        html = '<!-- ' + 'x' * 200 + ' -->'
+        _, tree, data = _load_and_process(html, threshold=50)
+
+        assert tree is None
+        assert data is not None
+        assert data['skipReason']['type'] == 'unparseable'
+        assert 'extractedText' not in data
+
+    def test_streamed_page_is_parsed(self) -> None:
+        """A parseable streamed page gives a tree of the whole document."""
+        html = '<html><body>' + '<p>Paragraph of text.</p>' * 20 + '<p>Last</p></body></html>'
+
+        async def run():
+            return await _load_page(_context(html), {'large_page_threshold': 50})
+
+        head, tree, raw_html = asyncio.run(run())
+
+        assert len(head) < len(html)
+        assert tree is not None
+        assert tree.xpath('string(//p[last()])') == 'Last'
+        assert raw_html.length == len(html.encode())
+
+
+class TestExtractionConfig:
+    """The extraction config built once per run reaches every page."""
+
+    def test_config_is_applied(self) -> None:
+        """A target language from the passed config rejects pages in other languages."""
+        html = (
+            '<html lang="en"><body><article>'
+            + '<p>The quick brown fox jumps over the lazy dog near the river bank.</p>' * 20
+            + '</article></body></html>'
+        )
+
+        async def run():
+            context = _context(html)
+            config = {'large_page_threshold': 1_000_000}
+            page_html, tree, raw_html = await _load_page(context, config)
+            return await _process_page(
+                context, None, 'key', page_html, tree, config, raw_html=raw_html,
+                trafilatura_config=TrafilaturaConfig(target_language='de'),
+            )
+
+        data = asyncio.run(run())
+
+        assert data['skipReason']['type'] == 'language'
+        assert data['skipReason']['targetLanguage'] == 'de'
@@ -0,0 +1,98 @@
+"""Tests for link extraction and URL canonicalization."""
+
+import lxml.html
+
+from src.links import build_url_filter, canonicalize_url, extract_links
+
+
+class TestCanonicalizeUrl:
+    """Tests for canonicalize_url."""
+
+    def test_scheme_host_port(self) -> None:
+        """Scheme and host are lowercased and default ports dropped."""
+        assert canonicalize_url('HTTPS://Example.COM:443') == 'https://example.com/'
+        assert canonicalize_url('http://example.com:8080/a') == 'http://example.com:8080/a'
+
+    def test_tracking_params(self) -> None:
+        """Tracking parameters are removed, other parameters keep their order."""
+        url = 'https://example.com/a?b=2&utm_source=x&a=1&fbclid=y&empty='
+        assert canonicalize_url(url) == 'https://example.com/a?b=2&a=1&empty='
+
+    def test_query_untouched_without_tracking(self) -> None:
+        """A query without tracking parameters is kept as is."""
+        assert canonicalize_url('https://example.com/?q=a%20b') == 'https://example.com/?q=a%20b'
+
+    def test_fragment(self) -> None:
+        """Fragments are dropped unless kept."""
+        assert canonicalize_url('https://example.com/a#top') == 'https://example.com/a'
+        assert canonicalize_url('https://example.com/a#top', True) == 'https://example.com/a#top'
+
+    def test_ipv6_and_credentials(self) -> None:
+        """IPv6 hosts stay bracketed and credentials are preserved."""
+        assert canonicalize_url('http://[::1]:8000/') == 'http://[::1]:8000/'
+        assert canonicalize_url('https://user:pw@Example.com/') == 'https://user:pw@example.com/'
+
+    def test_rejected(self) -> None:
+        """Non-HTTP(S) and malformed URLs give None."""
+        assert canonicalize_url('ftp://example.com/') is None
+        assert canonicalize_url('/relative/path') is None
+        assert canonicalize_url('http://example.com:99999/') is None
+
+
+class TestExtractLinks:
+    """Tests for extract_links."""
+
+    def test_resolves_and_deduplicates(self) -> None:
+        """Links are resolved against the page, canonicalized and unique in document order."""
+        tree = lxml.html.fromstring(
+            '<html><body>'
+            '<a href="/b">B</a>'
+            '<a href="a?utm_medium=email">A</a>'
+            '<a href="https://example.com/b#x">B again</a>'
+            '<a href="javascript:void(0)">JS</a>'
+            '<a href="mailto:me@example.com">Mail</a>'
+            '<a>No href</a>'
+            '</body></html>'
+        )
+        assert extract_links(tree, 'a[href]', 'https://example.com/dir/page') == [
+            'https://example.com/b',
+            'https://example.com/dir/a',
+        ]
+
+    def test_base_href(self) -> None:
+        """Relative links are resolved against <base href>."""
+        tree = lxml.html.fromstring(
+            '<html><head><base href="https://cdn.example.com/docs/"></head>'
+            '<body><a href="intro">Intro</a></body></html>'
+        )
+        assert extract_links(tree, 'a', 'https://example.com/') == [
+            'https://cdn.example.com/docs/intro',
+        ]
+
+    def test_selector_and_fragments(self) -> None:
+        """Only selected elements are used, fragments are kept if requested."""
+        tree = lxml.html.fromstring(
+            '<html><body><nav><a href="/nav">Nav</a></nav>'
+            '<main><a href="/post#comments">Post</a></main></body></html>'
+        )
+        assert extract_links(tree, 'main a', 'https://example.com/', keep_fragments=True) == [
+            'https://example.com/post#comments',
+        ]
+
+
+class TestBuildUrlFilter:
+    """Tests for build_url_filter."""
+
+    def test_globs_and_excludes(self) -> None:
+        """URLs must match a glob, if any, and no exclude."""
+        matches = build_url_filter(
+            [{'glob': 'https://example.com/blog/**'}],
+            [{'glob': 'https://example.com/blog/drafts/**'}],
+        )
+        assert matches('https://example.com/blog/post')
+        assert not matches('https://example.com/about')
+        assert not matches('https://example.com/blog/drafts/post')
+
+    def test_no_globs(self) -> None:
+        """Without globs every URL matches."""
+        assert build_url_filter([], [])('https://example.com/')
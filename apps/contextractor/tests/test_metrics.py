@@ -0,0 +1,71 @@
+"""Tests for the Prometheus text rendering of run metrics."""
+
+from src.metrics import MAX_HOST_LABELS, Counter, CrawlMetrics, Gauge, Histogram
+
+
+class TestRendering:
+    """Metrics render in the Prometheus text exposition format."""
+
+    def test_counter_labels(self) -> None:
+        """Label values are escaped and integral values have no decimals."""
+        counter = Counter('pages_total', 'Pages.', ('host',))
+        counter.inc('a"b\\c\nd')
+        counter.inc('plain', amount=2.5)
+        assert list(counter.render()) == [
+            '# HELP pages_total Pages.',
+            '# TYPE pages_total counter',
+            'pages_total{host="a\\"b\\\\c\\nd"} 1',
+            'pages_total{host="plain"} 2.5',
+        ]
+
+    def test_gauge_without_labels(self) -> None:
+        """A gauge without labels renders a bare sample."""
+        gauge = Gauge('in_progress', 'Pages in progress.')
+        gauge.set(3)
+        gauge.set(gauge.get() - 1)
+        assert list(gauge.render())[1:] == ['# TYPE in_progress gauge', 'in_progress 2']
+
+    def test_histogram_buckets(self) -> None:
+        """Buckets are cumulative, inclusive of their bound and end with +Inf."""
+        histogram = Histogram('seconds', 'Duration.', (0.5, 1, 5))
+        for value in (0.1, 0.5, 0.7, 3, 60):
+            histogram.observe(value)
+        assert list(histogram.render())[2:] == [
+            'seconds_bucket{le="0.5"} 2',
+            'seconds_bucket{le="1"} 3',
+            'seconds_bucket{le="5"} 4',
+            'seconds_bucket{le="+Inf"} 5',
+            'seconds_sum 64.3',
+            'seconds_count 5',
+        ]
+
+    def test_crawl_metrics(self) -> None:
+        """The snapshot lists every metric once and ends with a newline."""
+        metrics = CrawlMetrics()
+        metrics.page_started()
+        metrics.page_finished('stored', 0.2)
+        metrics.page_skipped()
+        metrics.request_failed('https://example.com/a')
+        metrics.refresh(queue_pending=7)
+        text = metrics.render()
+
+        assert text.endswith('\n')
+        lines = text.splitlines()
+        types = [line.split()[2] for line in lines if line.startswith('# TYPE')]
+        assert len(types) == len(set(types)) == 11
+        assert 'contextractor_pages_total{status="stored"} 1' in lines
+        assert 'contextractor_pages_total{status="skipped"} 1' in lines
+        assert 'contextractor_requests_failed_total{host="example.com"} 1' in lines
+        assert 'contextractor_queue_pending_requests 7' in lines
+        assert 'contextractor_pages_in_progress 0' in lines
+        assert all(line.startswith('#') or len(line.split()) == 2 for line in lines)
+
+    def test_host_labels_are_capped(self) -> None:
+        """Hosts past MAX_HOST_LABELS share the `other` label."""
+        metrics = CrawlMetrics()
+        for i in range(MAX_HOST_LABELS + 5):
+            metrics.request_error(f'https://host-{i}.example.com/')
+        metrics.request_error('https://host-0.example.com/')
+        assert len(metrics.request_errors.values) == MAX_HOST_LABELS + 1
+        assert metrics.request_errors.values[('other',)] == 5
+        assert metrics.request_errors.values[('host-0.example.com',)] == 2
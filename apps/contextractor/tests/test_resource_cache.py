@@ -0,0 +1,118 @@
+"""Tests for the shared subresource cache."""
+
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+from src.resource_cache import ResourceCache
+
+
+class FakeRoute:
+    """Playwright route of a GET subresource request answered with a fixed body."""
+
+    def __init__(self, url: str, body: bytes, resource_type: str = 'script') -> None:
+        self.request = SimpleNamespace(method='GET', resource_type=resource_type, url=url)
+        self.body = body
+        self.fetched = 0
+        self.fulfilled: bytes | None = None
+        self.fell_back = False
+
+    async def fetch(self):
+        self.fetched += 1
+        await asyncio.sleep(0.01)
+        body = self.body
+
+        async def read_body() -> bytes:
+            return body
+
+        headers = {'content-type': 'text/javascript'}
+        return SimpleNamespace(status=200, headers=headers, body=read_body)
+
+    async def fulfill(self, status=200, headers=None, body: bytes = b'', response=None) -> None:
+        self.fulfilled = body
+
+    async def fallback(self) -> None:
+        self.fell_back = True
+
+
+def _files(cache: ResourceCache) -> list[str]:
+    return sorted(path.name for path in cache.directory.rglob('*') if path.is_file())
+
+
+class TestResourceCache:
+    """Bodies are stored once per digest and evicted least recently used first."""
+
+    def test_hit_after_miss(self, tmp_path) -> None:
+        """A second request for a URL is served from the cache."""
+
+        async def run():
+            cache = ResourceCache(tmp_path / 'cache', 1000)
+            await cache.handle_route(FakeRoute('https://example.com/a.js', b'a' * 10))
+            route = FakeRoute('https://example.com/a.js', b'changed')
+            await cache.handle_route(route)
+            assert route.fetched == 0
+            assert route.fulfilled == b'a' * 10
+            assert cache.stats()['hits'] == 1
+
+            document = FakeRoute('https://example.com/', b'<html>', resource_type='document')
+            await cache.handle_route(document)
+            assert document.fell_back
+
+        asyncio.run(run())
+
+    def test_lru_eviction(self, tmp_path) -> None:
+        """Adding past max_bytes evicts the least recently used entries."""
+
+        async def run():
+            cache = ResourceCache(tmp_path / 'cache', 25)
+            for name in ('a', 'b'):
+                route = FakeRoute(f'https://example.com/{name}.js', name.encode() * 10)
+                await cache.handle_route(route)
+            # Using a makes b the least recently used entry
+            await cache.handle_route(FakeRoute('https://example.com/a.js', b''))
+            await cache.handle_route(FakeRoute('https://example.com/c.js', b'c' * 10))
+
+            assert set(cache._entries) == {'https://example.com/a.js', 'https://example.com/c.js'}
+            assert cache.size == 20
+            assert _files(cache) == sorted(
+                hashlib.sha256(body).hexdigest() for body in (b'a' * 10, b'c' * 10)
+            )
+
+        asyncio.run(run())
+
+    def test_concurrent_same_digest(self, tmp_path) -> None:
+        """URLs with the same body fetched at once share one file and its size."""
+
+        async def run():
+            cache = ResourceCache(tmp_path / 'cache', 1000)
+            body = b'x' * 100
+            routes = [FakeRoute(f'https://example.com/app.js?v={i}', body) for i in range(5)]
+            await asyncio.gather(*(cache.handle_route(route) for route in routes))
+
+            assert all(route.fulfilled == body for route in routes)
+            assert cache.size == 100
+            assert cache.stats()['entries'] == 5
+            assert _files(cache) == [hashlib.sha256(body).hexdigest()]
+
+            # The body is deleted with the last URL referencing it
+            for i in range(4):
+                cache._remove(f'https://example.com/app.js?v={i}')
+            assert _files(cache)
+            cache._remove('https://example.com/app.js?v=4')
+            assert _files(cache) == []
+            assert cache.size == 0
+
+        asyncio.run(run())
+
+    def test_concurrent_same_url(self, tmp_path) -> None:
+        """Concurrent requests for one URL wait for the first download."""
+
+        async def run():
+            cache = ResourceCache(tmp_path / 'cache', 1000)
+            routes = [FakeRoute('https://example.com/a.js', b'a' * 10) for _ in range(3)]
+            await asyncio.gather(*(cache.handle_route(route) for route in routes))
+
+            assert sum(route.fetched for route in routes) == 1
+            assert all(route.fulfilled == b'a' * 10 for route in routes)
+
+        asyncio.run(run())
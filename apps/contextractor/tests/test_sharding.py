@@ -0,0 +1,144 @@
+"""Tests for host sharding and the merge of shard results."""
+
+import asyncio
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from src import sharding
+from src.sharding import ShardCoordinator, shard_name, shard_of
+
+
+class FakeKeyValueStore:
+    """In-memory key-value store."""
+
+    def __init__(self) -> None:
+        self.values: dict = {}
+
+    async def get_value(self, key: str):
+        return self.values.get(key)
+
+    async def set_value(self, key: str, value, content_type: str | None = None) -> None:
+        self.values[key] = value
+
+    async def delete_value(self, key: str) -> None:
+        self.values.pop(key, None)
+
+
+class FakeDataset:
+    """Dataset held in a list; push_data() can be made to fail after some pushes."""
+
+    def __init__(self, items: list | None = None) -> None:
+        self.items = list(items or [])
+        self.dropped = False
+        self.fail_after: int | None = None
+
+    async def iterate_items(self, offset: int = 0):
+        for item in self.items[offset:]:
+            yield item
+
+    async def push_data(self, data: list) -> None:
+        if self.fail_after is not None:
+            if not self.fail_after:
+                raise RuntimeError('Migrated')
+            self.fail_after -= 1
+        self.items.extend(data)
+
+    async def drop(self) -> None:
+        self.dropped = True
+
+
+def _use_datasets(monkeypatch, datasets: dict[str, FakeDataset]) -> None:
+    async def open_dataset(name: str) -> FakeDataset:
+        return datasets[name]
+
+    monkeypatch.setattr(sharding, 'Actor', SimpleNamespace(open_dataset=open_dataset))
+
+
+class TestShardOf:
+    """Hosts map to the same shard in every process."""
+
+    def test_same_host_same_shard(self) -> None:
+        """Paths, schemes, ports and hostname case do not change the shard."""
+        shard = shard_of('https://example.com/a', 7)
+        for url in ('http://example.com/b?q=1', 'https://EXAMPLE.com:8443/', 'https://example.com'):
+            assert shard_of(url, 7) == shard
+
+    def test_range_and_spread(self) -> None:
+        """Shards are in range and every shard gets some of many hosts."""
+        shards = [shard_of(f'https://host-{i}.example.com/', 4) for i in range(200)]
+        assert set(shards) == {0, 1, 2, 3}
+
+    def test_stable_across_processes(self) -> None:
+        """The hash does not depend on the interpreter's hash seed."""
+        urls = [f'https://host-{i}.example.com/' for i in range(20)]
+        script = (
+            'from src.sharding import shard_of; '
+            f'print([shard_of(u, 5) for u in {urls!r}])'
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', script],
+            capture_output=True, text=True, check=True,
+            env={**os.environ, 'PYTHONHASHSEED': '123', 'PYTHONPATH': os.pathsep.join(sys.path)},
+        ).stdout
+        assert output.strip() == str([shard_of(u, 5) for u in urls])
+
+    def test_invalid_index(self) -> None:
+        """The shard index must be below the shard count."""
+        with pytest.raises(ValueError):
+            ShardCoordinator(FakeKeyValueStore(), 'SHARDS', 2, 2)
+
+
+class TestMergeResults:
+    """Shard datasets are merged once, resuming from the recorded offset."""
+
+    def test_merge_with_limit(self, monkeypatch) -> None:
+        """Items are merged in shard order up to max_results and records are removed."""
+        datasets = {
+            shard_name('results', i): FakeDataset([{'shard': i, 'n': n} for n in range(3)])
+            for i in range(2)
+        }
+        _use_datasets(monkeypatch, datasets)
+
+        async def run():
+            kvs = FakeKeyValueStore()
+            coordinator = ShardCoordinator(kvs, 'SHARDS', 0, 2, max_results=4)
+            await coordinator.publish(0, 0, finished=True)
+            target = FakeDataset()
+            assert await coordinator.merge_results('results', target) == 4
+            assert [item['shard'] for item in target.items] == [0, 0, 0, 1]
+            assert all(dataset.dropped for dataset in datasets.values())
+            assert kvs.values == {}
+
+        asyncio.run(run())
+
+    def test_resume_from_offset(self, monkeypatch) -> None:
+        """A merge interrupted after some batches continues without duplicates."""
+        monkeypatch.setattr(sharding, 'MERGE_BATCH_SIZE', 2)
+        datasets = {
+            shard_name('results', i): FakeDataset([{'shard': i, 'n': n} for n in range(5)])
+            for i in range(2)
+        }
+        _use_datasets(monkeypatch, datasets)
+
+        async def run():
+            kvs = FakeKeyValueStore()
+            coordinator = ShardCoordinator(kvs, 'SHARDS', 0, 2)
+            target = FakeDataset()
+            # Shard 0 is merged, the second batch of shard 1 fails
+            target.fail_after = 4
+            with pytest.raises(RuntimeError):
+                await coordinator.merge_results('results', target)
+            assert kvs.values[coordinator.merge_key()] == {'shard': 1, 'offset': 2, 'merged': 7}
+
+            target.fail_after = None
+            assert await coordinator.merge_results('results', target) == 10
+            assert [(item['shard'], item['n']) for item in target.items] == [
+                (shard, n) for shard in range(2) for n in range(5)
+            ]
+            assert coordinator.merge_key() not in kvs.values
+
+        asyncio.run(run())
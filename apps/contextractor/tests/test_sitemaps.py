@@ -0,0 +1,112 @@
+"""Tests for sitemap parsing."""
+
+from datetime import datetime, timezone
+
+from src.sitemaps import SitemapEntry, SitemapParser, parse_lastmod, parse_robots_sitemaps
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/a</loc><lastmod>2024-05-01</lastmod></url>
+  <url><loc> https://example.com/b </loc></url>
+  <url><lastmod>2024-05-01</lastmod></url>
+</urlset>
+"""
+
+SITEMAP_INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/sitemap-1.xml.gz</loc></sitemap>
+</sitemapindex>
+"""
+
+
+def _parse(data: bytes, chunk_size: int | None = None) -> list[SitemapEntry]:
+    parser = SitemapParser()
+    size = chunk_size or len(data) or 1
+    entries = []
+    for start in range(0, len(data), size):
+        entries.extend(parser.feed(data[start : start + size]))
+    entries.extend(parser.close())
+    return entries
+
+
+class TestSitemapParser:
+    """Tests for the incremental sitemap parser."""
+
+    def test_urlset(self) -> None:
+        """URL entries are yielded with their lastmod; entries without loc are skipped."""
+        assert _parse(URLSET) == [
+            SitemapEntry('url', 'https://example.com/a', datetime(2024, 5, 1, tzinfo=timezone.utc)),
+            SitemapEntry('url', 'https://example.com/b'),
+        ]
+
+    def test_sitemap_index(self) -> None:
+        """Nested sitemaps of an index are yielded as sitemap entries."""
+        assert _parse(SITEMAP_INDEX) == [
+            SitemapEntry('sitemap', 'https://example.com/sitemap-1.xml.gz'),
+        ]
+
+    def test_small_chunks(self) -> None:
+        """Chunk boundaries inside tags do not change the result."""
+        assert _parse(URLSET, chunk_size=7) == _parse(URLSET)
+
+    def test_entries_yielded_incrementally(self) -> None:
+        """An entry is yielded as soon as its element is closed."""
+        parser = SitemapParser()
+        head, tail = URLSET.split(b'</url>', 1)
+        assert list(parser.feed(head)) == []
+        assert [e.loc for e in parser.feed(b'</url>')] == ['https://example.com/a']
+        assert [e.loc for e in parser.feed(tail)] == ['https://example.com/b']
+        assert list(parser.close()) == []
+
+    def test_text_sitemap(self) -> None:
+        """Text sitemaps yield one URL per line, ignoring the BOM and other lines."""
+        data = b'\xef\xbb\xbfhttps://example.com/a\r\n# comment\n\nhttps://example.com/b'
+        assert [e.loc for e in _parse(data, chunk_size=5)] == [
+            'https://example.com/a',
+            'https://example.com/b',
+        ]
+
+    def test_leading_whitespace_chunk(self) -> None:
+        """A chunk with only whitespace does not decide the format."""
+        parser = SitemapParser()
+        assert list(parser.feed(b'\n  ')) == []
+        entries = [*parser.feed(SITEMAP_INDEX), *parser.close()]
+        assert [e.kind for e in entries] == ['sitemap']
+
+
+class TestParseLastmod:
+    """Tests for W3C datetime parsing."""
+
+    def test_date(self) -> None:
+        """A date without time is midnight UTC."""
+        assert parse_lastmod('2024-05-01') == datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+    def test_offset(self) -> None:
+        """Offsets and the Z suffix are honored."""
+        assert parse_lastmod('2024-05-01T10:00:00+02:00') == datetime(
+            2024, 5, 1, 8, tzinfo=timezone.utc
+        )
+        assert parse_lastmod('2024-05-01T08:00:00Z') == datetime(2024, 5, 1, 8, tzinfo=timezone.utc)
+
+    def test_invalid(self) -> None:
+        """Missing or invalid values give None."""
+        assert parse_lastmod(None) is None
+        assert parse_lastmod('yesterday') is None
+
+
+class TestParseRobotsSitemaps:
+    """Tests for robots.txt sitemap discovery."""
+
+    def test_sitemap_lines(self) -> None:
+        """Sitemap lines are collected case-insensitively, resolved and deduplicated."""
+        robots_txt = (
+            'User-agent: *\n'
+            'Disallow: /private\n'
+            'Sitemap: https://example.com/sitemap.xml\n'
+            'sitemap: /news-sitemap.xml\n'
+            'SITEMAP: https://example.com/sitemap.xml\n'
+        )
+        assert parse_robots_sitemaps(robots_txt, 'https://example.com/robots.txt') == [
+            'https://example.com/sitemap.xml',
+            'https://example.com/news-sitemap.xml',
+        ]
@@ -0,0 +1,177 @@
+"""Tests for the results counter and the persisted crawl state."""
+
+import asyncio
+import threading
+
+from contextractor_engine import SimHashIndex
+
+from src import state
+from src.state import CrawlState, ResultsCounter
+
+
+class FakeKeyValueStore:
+    """In-memory key-value store recording every write."""
+
+    def __init__(self) -> None:
+        self.values: dict = {}
+        self.writes: list[str] = []
+
+    async def get_value(self, key: str):
+        return self.values.get(key)
+
+    async def set_value(self, key: str, value, content_type: str | None = None) -> None:
+        self.values[key] = value
+        self.writes.append(key)
+
+    async def delete_value(self, key: str) -> None:
+        self.values.pop(key, None)
+
+
+def _key_base(i: int) -> str:
+    return f'{i:016x}'
+
+
+class TestResultsCounter:
+    """Slots are reserved per request and never exceed the limit."""
+
+    def test_reserve_commit_release(self) -> None:
+        """Reserving is idempotent per key and released slots can be reused."""
+        counter = ResultsCounter(2)
+        assert counter.try_reserve('a')
+        assert counter.try_reserve('a')
+        assert counter.try_reserve('b')
+        assert not counter.try_reserve('c')
+        assert counter.reserved == 2
+
+        counter.release('b')
+        counter.release('b')
+        assert counter.reserved == 1
+        assert counter.try_reserve('c')
+
+        assert counter.commit('a') == 1
+        assert not counter.holds('a')
+        assert not counter.is_limit_reached()
+        assert counter.commit('c') == 2
+        assert counter.is_limit_reached()
+        assert not counter.try_reserve('d')
+
+    def test_concurrent_reservations(self) -> None:
+        """Threads racing for slots get exactly max_results of them."""
+        counter = ResultsCounter(10)
+        granted: list[str] = []
+        barrier = threading.Barrier(8)
+
+        def reserve(worker: int) -> None:
+            barrier.wait()
+            for i in range(50):
+                key = f'{worker}-{i}'
+                if counter.try_reserve(key):
+                    granted.append(key)
+                    if i % 2:
+                        counter.release(key)
+                        granted.remove(key)
+                    else:
+                        counter.commit(key)
+
+        threads = [threading.Thread(target=reserve, args=(w,)) for w in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert counter.count == 10
+        assert counter.reserved == 0
+        assert len(granted) == 10
+
+    def test_unlimited(self) -> None:
+        """A limit of 0 never refuses a slot."""
+        counter = ResultsCounter(0)
+        for i in range(100):
+            assert counter.try_reserve(str(i))
+            counter.commit(str(i))
+        assert not counter.is_limit_reached()
+
+
+class TestCrawlState:
+    """Stored keys are persisted in chunks, soon after each commit."""
+
+    def test_round_trip_in_chunks(self, monkeypatch) -> None:
+        """Only chunks with new keys are rewritten and all keys are restored."""
+        monkeypatch.setattr(state, 'STORED_CHUNK_KEYS', 4)
+
+        async def run():
+            kvs = FakeKeyValueStore()
+            crawl_state = CrawlState(kvs, 'STATE', ResultsCounter(0))
+            for i in range(6):
+                crawl_state.mark_stored(_key_base(i))
+            await crawl_state.persist()
+            assert kvs.values['STATE'] == {'resultsCount': 0, 'storedCount': 6, 'storedChunks': 2}
+            assert len(kvs.values['STATE-STORED-0']) == 32
+
+            kvs.writes.clear()
+            crawl_state.mark_stored(_key_base(6))
+            await crawl_state.persist()
+            assert kvs.writes == ['STATE-STORED-1', 'STATE']
+
+            restored = CrawlState(kvs, 'STATE', ResultsCounter(0))
+            assert await restored.restore()
+            assert restored.stored_count == 7
+            assert all(restored.is_stored(_key_base(i)) for i in range(7))
+            assert not restored.is_stored(_key_base(7))
+
+            await restored.clear()
+            assert kvs.values == {}
+
+        asyncio.run(run())
+
+    def test_persists_after_commit(self, monkeypatch) -> None:
+        """Marking a page stored writes the state within the debounce interval."""
+        monkeypatch.setattr(state, 'PERSIST_DEBOUNCE_SECS', 0.01)
+
+        async def run():
+            kvs = FakeKeyValueStore()
+            counter = ResultsCounter(0)
+            crawl_state = CrawlState(kvs, 'STATE', counter)
+            counter.try_reserve('a')
+            counter.commit('a')
+            crawl_state.mark_stored(_key_base(1))
+            crawl_state.mark_stored(_key_base(2))
+            await asyncio.sleep(0.05)
+            assert kvs.values['STATE']['resultsCount'] == 1
+            assert kvs.values['STATE']['storedCount'] == 2
+            assert kvs.writes.count('STATE') == 1
+
+        asyncio.run(run())
+
+    def test_restores_legacy_key_list(self) -> None:
+        """State written as a storedKeys list is still restored."""
+
+        async def run():
+            kvs = FakeKeyValueStore()
+            kvs.values['STATE'] = {'resultsCount': 2, 'storedKeys': [_key_base(1), _key_base(2)]}
+            crawl_state = CrawlState(kvs, 'STATE', ResultsCounter(0))
+            assert await crawl_state.restore()
+            assert crawl_state.results_counter.count == 2
+            assert crawl_state.is_stored(_key_base(2))
+
+            await crawl_state.persist()
+            assert kvs.values['STATE']['storedChunks'] == 1
+            assert len(kvs.values['STATE-STORED-0']) == 16
+
+        asyncio.run(run())
+
+    def test_restore_uses_current_distance(self) -> None:
+        """The restored near-duplicate index takes this run's max_distance."""
+
+        async def run():
+            kvs = FakeKeyValueStore()
+            previous = CrawlState(kvs, 'STATE', ResultsCounter(0), SimHashIndex(max_distance=3))
+            previous.near_duplicates.add(1, 'https://example.com/')
+            await previous.persist()
+
+            crawl_state = CrawlState(kvs, 'STATE', ResultsCounter(0), SimHashIndex(max_distance=8))
+            assert await crawl_state.restore()
+            assert crawl_state.near_duplicates.max_distance == 8
+            assert len(crawl_state.near_duplicates) == 1
+
+        asyncio.run(run())
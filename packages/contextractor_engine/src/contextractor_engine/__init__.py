@@ -2,8 +2,17 @@
 
 from typing import Any
 
-from .extractor import ContentExtractor
-from .models import ExtractionResult, MetadataResult, TrafilaturaConfig
+from .dedup import SimHashIndex, simhash
+from .extractor import (
+    ContentExtractor,
+    HtmlStreamParser,
+    extract_variants,
+    parse_html,
+    warmup,
+)
+from .language import LanguageCheck, find_language_alternates
+from .models import ExtractionResult, MetadataResult, TrafilaturaConfig, VariantResult
+from .templates import BoilerplateTemplates
 from .utils import normalize_config_keys
 
 
@@ -17,6 +26,16 @@ __all__ = [
     "TrafilaturaConfig",
     "ExtractionResult",
     "MetadataResult",
+    "VariantResult",
+    "extract_variants",
+    "parse_html",
+    "HtmlStreamParser",
     "normalize_config_keys",
     "get_default_config",
+    "warmup",
+    "SimHashIndex",
+    "simhash",
+    "LanguageCheck",
+    "find_language_alternates",
+    "BoilerplateTemplates",
 ]
@@ -0,0 +1,7 @@
+"""Allow running the bulk extractor with `python -m contextractor_engine`."""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
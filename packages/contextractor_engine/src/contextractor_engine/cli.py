@@ -0,0 +1,324 @@
+"""Command-line bulk extractor for directories of HTML files.
+
+Walks a directory or glob of `.html`/`.htm`/`.html.gz` files, extracts them in
+parallel on all cores and writes outputs mirroring the input tree:
+
+    contextractor-engine ./pages -o ./out --formats markdown,txt --config config.json
+
+The config file is a JSON object with camelCase or snake_case TrafilaturaConfig
+keys (same as the actor `trafilaturaConfig` input). Every processed file is
+recorded in a manifest in the output directory; with `--resume`, files recorded
+with the same size, modification time, config and formats are skipped.
+"""
+
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import TextIO
+
+from .extractor import ContentExtractor
+from .models import TrafilaturaConfig
+
+HTML_SUFFIXES = (".html", ".htm", ".html.gz", ".htm.gz")
+
+# Output format -> file extension (same as the actor key-value store keys)
+FORMAT_EXTENSIONS = {
+    "txt": "txt",
+    "markdown": "md",
+    "json": "json",
+    "xml": "xml",
+    "xmltei": "tei.xml",
+    "html": "extracted.html",
+    "csv": "csv",
+}
+
+# Manifest of processed files in the output directory, read by --resume
+MANIFEST_NAME = ".contextractor-manifest.jsonl"
+
+_extractor: ContentExtractor | None = None
+
+
+def _init_worker(config_json: str) -> None:
+    """Create the extractor once per worker process."""
+    global _extractor
+    _extractor = ContentExtractor(config=TrafilaturaConfig.from_json_dict(json.loads(config_json)))
+
+
+def _process_file(source: str, outputs: dict[str, str]) -> tuple[str, int, int, list[str]]:
+    """Extract one file and write its outputs.
+
+    Returns:
+        Tuple of (status, input bytes, output bytes, produced formats), status
+        is `ok` or `empty`.
+    """
+    assert _extractor is not None
+    raw = Path(source).read_bytes()
+    if source.endswith(".gz"):
+        raw = gzip.decompress(raw)
+    html = raw.decode("utf-8", errors="replace")
+
+    written = 0
+
+    def write(fmt: str, data: bytes) -> None:
+        nonlocal written
+        target = Path(outputs[fmt])
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        written += len(data)
+
+    produced = _extractor.extract_to_sink(html, write, formats=list(outputs))
+    return ("ok" if written else "empty"), len(raw), written, produced
+
+
+def find_html_files(inputs: list[str]) -> list[tuple[Path, Path]]:
+    """Resolve directories and glob patterns to HTML files.
+
+    Returns:
+        Sorted list of (file, root) pairs, where root is the directory the
+        output tree is mirrored from.
+    """
+    found: dict[Path, Path] = {}
+    for pattern in inputs:
+        path = Path(pattern)
+        if path.is_dir():
+            for file in path.rglob("*"):
+                if file.is_file() and file.name.lower().endswith(HTML_SUFFIXES):
+                    found.setdefault(file, path)
+        elif path.is_file():
+            found.setdefault(path, path.parent)
+        else:
+            matches = [Path(m) for m in glob.glob(pattern, recursive=True)]
+            files = [m for m in matches if m.is_file() and m.name.lower().endswith(HTML_SUFFIXES)]
+            if not files:
+                continue
+            root = Path(os.path.commonpath([f.parent for f in files]))
+            for file in files:
+                found.setdefault(file, root)
+    return sorted(found.items())
+
+
+def output_paths(
+    source: Path,
+    root: Path,
+    output_dir: Path,
+    formats: list[str],
+) -> dict[str, Path]:
+    """Map an input file to its output file per format, mirroring the input tree."""
+    relative = source.relative_to(root)
+    name = relative.name
+    for suffix in HTML_SUFFIXES:
+        if name.lower().endswith(suffix):
+            name = name[: -len(suffix)]
+            break
+    base = output_dir / relative.parent / name
+    return {fmt: base.with_name(f"{base.name}.{FORMAT_EXTENSIONS[fmt]}") for fmt in formats}
+
+
+def config_hash(config: TrafilaturaConfig, formats: list[str]) -> str:
+    """Hash of the extraction settings that decide the outputs of a file."""
+    settings = {"config": config.to_json_dict(), "formats": sorted(formats)}
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class Manifest:
+    """Processed files of an output directory, one JSON line per file.
+
+    An entry records the size and modification time of the input, the config
+    hash and the formats produced. Inputs that produced no output are recorded
+    too, so `--resume` does not extract them again. The last entry of a file
+    wins; a line cut off by an interrupted run is ignored.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.entries: dict[str, dict] = {}
+        self._file: TextIO | None = None
+        if path.exists():
+            for line in path.read_text(encoding="utf-8").splitlines():
+                try:
+                    entry = json.loads(line)
+                    self.entries[entry["source"]] = entry
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+    def is_up_to_date(
+        self,
+        source: Path,
+        stat: os.stat_result,
+        outputs: dict[str, Path],
+        settings_hash: str,
+    ) -> bool:
+        """Check if `source` was processed unchanged, with the same settings."""
+        entry = self.entries.get(str(source.resolve()))
+        if (
+            entry is None
+            or entry.get("config") != settings_hash
+            or entry.get("size") != stat.st_size
+            or entry.get("mtimeNs") != stat.st_mtime_ns
+        ):
+            return False
+        return all(outputs[fmt].exists() for fmt in entry.get("formats", []) if fmt in outputs)
+
+    def record(
+        self,
+        source: Path,
+        stat: os.stat_result,
+        settings_hash: str,
+        formats: list[str],
+    ) -> None:
+        """Append the entry of a processed file."""
+        entry = {
+            "source": str(source.resolve()),
+            "size": stat.st_size,
+            "mtimeNs": stat.st_mtime_ns,
+            "config": settings_hash,
+            "formats": formats,
+        }
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="utf-8")
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        self.entries[entry["source"]] = entry
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Progress:
+    """Single-line progress and throughput display."""
+
+    def __init__(self, total: int, stream: TextIO | None, interval: float = 0.5) -> None:
+        self.total = total
+        self.stream = stream
+        self.interval = interval
+        self.started = time.monotonic()
+        self.last_render = 0.0
+        self.counts = {"ok": 0, "empty": 0, "skipped": 0, "failed": 0}
+        self.input_bytes = 0
+
+    @property
+    def done(self) -> int:
+        return sum(self.counts.values())
+
+    def update(self, status: str, input_bytes: int = 0) -> None:
+        self.counts[status] += 1
+        self.input_bytes += input_bytes
+        now = time.monotonic()
+        if now - self.last_render >= self.interval or self.done == self.total:
+            self.last_render = now
+            self.render()
+
+    def render(self, final: bool = False) -> None:
+        if self.stream is None:
+            return
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        processed = self.counts["ok"] + self.counts["empty"] + self.counts["failed"]
+        line = (
+            f"{self.done}/{self.total} files | {processed / elapsed:.1f} files/s | "
+            f"{self.input_bytes / elapsed / 1e6:.2f} MB/s | skipped {self.counts['skipped']} | "
+            f"empty {self.counts['empty']} | failed {self.counts['failed']}"
+        )
+        self.stream.write(f"\r{line}" + ("\n" if final else ""))
+        self.stream.flush()
+
+
+def _load_config(path: str | None) -> TrafilaturaConfig:
+    if not path:
+        return TrafilaturaConfig.balanced()
+    return TrafilaturaConfig.from_json_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Console entry point. Returns process exit code."""
+    parser = argparse.ArgumentParser(
+        prog="contextractor-engine",
+        description="Extract content from directories of HTML files in parallel.",
+    )
+    parser.add_argument("inputs", nargs="+", help="Directories, files or glob patterns")
+    parser.add_argument("-o", "--output-dir", required=True, help="Output directory")
+    parser.add_argument(
+        "-f", "--formats", default="markdown",
+        help=f"Comma-separated output formats ({', '.join(FORMAT_EXTENSIONS)})",
+    )
+    parser.add_argument("-c", "--config", help="JSON file with trafilatura config")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Skip files processed unchanged with the same config and formats",
+    )
+    parser.add_argument("--no-progress", action="store_true", help="Disable the progress display")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in FORMAT_EXTENSIONS]
+    if unknown:
+        parser.error(f"unsupported formats: {', '.join(unknown)}")
+    try:
+        config = _load_config(args.config)
+    except (OSError, ValueError, TypeError) as e:
+        parser.error(f"invalid config: {e}")
+
+    output_dir = Path(args.output_dir)
+    files = find_html_files(args.inputs)
+    progress = Progress(len(files), None if args.no_progress else sys.stderr)
+    workers = args.workers or os.cpu_count() or 1
+    config_json = json.dumps(config.to_json_dict())
+    settings_hash = config_hash(config, formats)
+    manifest = Manifest(output_dir / MANIFEST_NAME)
+    failures: list[tuple[Path, BaseException]] = []
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(config_json,)
+    ) as pool:
+        pending: dict[Future, tuple[Path, os.stat_result]] = {}
+
+        def collect(done: set[Future]) -> None:
+            for future in done:
+                source, stat = pending.pop(future)
+                try:
+                    status, input_bytes, _, produced = future.result()
+                except Exception as e:
+                    failures.append((source, e))
+                    progress.update("failed")
+                else:
+                    manifest.record(source, stat, settings_hash, produced)
+                    progress.update(status, input_bytes)
+
+        # Keep a bounded window of submitted files so huge trees do not queue all at once
+        for source, root in files:
+            outputs = output_paths(source, root, output_dir, formats)
+            # Taken before extraction, so a file changed meanwhile is not recorded as done
+            stat = source.stat()
+            if args.resume and manifest.is_up_to_date(source, stat, outputs, settings_hash):
+                progress.update("skipped")
+                continue
+            if len(pending) >= workers * 4:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            future = pool.submit(
+                _process_file, str(source), {fmt: str(path) for fmt, path in outputs.items()}
+            )
+            pending[future] = (source, stat)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+    manifest.close()
+
+    progress.render(final=True)
+    for source, error in failures:
+        print(f"Failed {source}: {error}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
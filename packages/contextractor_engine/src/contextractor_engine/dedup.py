@@ -0,0 +1,183 @@
+"""Near-duplicate detection for extracted text using SimHash.
+
+Text is split into overlapping word shingles, each shingle hashed to 64 bits,
+and the fingerprint bit is set where most shingle hashes have it set. Pages
+whose fingerprints differ in at most a few bits are near-duplicates, e.g. the
+same article with different ads, timestamps or navigation.
+
+SimHashIndex stores fingerprints in a flat `array('Q')` and finds candidates
+through band tables: with `max_distance + 1` bands, two fingerprints within
+`max_distance` bits must agree on at least one band (pigeonhole principle).
+"""
+
+import re
+import struct
+import sys
+from array import array
+from collections import Counter
+from hashlib import blake2b
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_HEADER = struct.Struct("<4sHI")
+_MAGIC = b"SH01"
+
+
+def simhash(text: str, shingle_size: int = 3) -> int | None:
+    """Compute a 64-bit SimHash fingerprint of text.
+
+    Args:
+        text: Extracted text.
+        shingle_size: Number of words per shingle.
+
+    Returns:
+        Fingerprint, or None if the text has no words.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return None
+    if len(words) <= shingle_size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {
+            " ".join(words[i : i + shingle_size]) for i in range(len(words) - shingle_size + 1)
+        }
+
+    digests = [blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles]
+    # Count set bits per position byte-wise: 8 Counter passes instead of 64 bit tests per shingle
+    weights = [0] * 64
+    for byte_index in range(8):
+        for value, count in Counter(d[byte_index] for d in digests).items():
+            base = (7 - byte_index) * 8
+            for bit in range(8):
+                if value >> bit & 1:
+                    weights[base + bit] += count
+
+    half = len(digests) / 2
+    fingerprint = 0
+    for position, weight in enumerate(weights):
+        if weight > half:
+            fingerprint |= 1 << position
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return (a ^ b).bit_count()
+
+
+class SimHashIndex:
+    """Compact index of SimHash fingerprints for near-duplicate lookup.
+
+    Args:
+        max_distance: Maximum Hamming distance considered a near-duplicate.
+    """
+
+    def __init__(self, max_distance: int = 3) -> None:
+        if not 0 <= max_distance < 64:
+            raise ValueError("max_distance must be between 0 and 63")
+        self.max_distance = max_distance
+        self._fingerprints = array("Q")
+        self._keys: list[str] = []
+        self._bands = self._band_masks(max_distance + 1)
+        self._tables: list[dict[int, list[int]]] = [{} for _ in self._bands]
+
+    @staticmethod
+    def _band_masks(bands: int) -> list[tuple[int, int]]:
+        """Split 64 bits into `bands` (shift, mask) pairs, last band takes the rest."""
+        width = 64 // bands
+        masks = []
+        for band in range(bands):
+            shift = band * width
+            bits = 64 - shift if band == bands - 1 else width
+            masks.append((shift, (1 << bits) - 1))
+        return masks
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def add(self, fingerprint: int, key: str) -> None:
+        """Add a fingerprint with the key (e.g. URL) of its page."""
+        position = len(self._fingerprints)
+        self._fingerprints.append(fingerprint)
+        self._keys.append(key)
+        for table, (shift, mask) in zip(self._tables, self._bands):
+            table.setdefault(fingerprint >> shift & mask, []).append(position)
+
+    def find(self, fingerprint: int, exclude_key: str | None = None) -> tuple[str, int] | None:
+        """Find the closest indexed fingerprint within `max_distance`.
+
+        Entries added with `exclude_key` are ignored.
+
+        Returns:
+            Tuple of (key, distance), or None if there is no near-duplicate.
+        """
+        best: tuple[str, int] | None = None
+        seen: set[int] = set()
+        for table, (shift, mask) in zip(self._tables, self._bands):
+            for position in table.get(fingerprint >> shift & mask, ()):
+                if position in seen:
+                    continue
+                seen.add(position)
+                if self._keys[position] == exclude_key:
+                    continue
+                distance = hamming_distance(fingerprint, self._fingerprints[position])
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (self._keys[position], distance)
+                    if distance == 0:
+                        return best
+        return best
+
+    def check_and_add(self, fingerprint: int, key: str) -> tuple[str, int] | None:
+        """Return the near-duplicate of `fingerprint`, or add it if there is none.
+
+        Entries of `key` itself are ignored, so checking the same page again
+        (e.g. a retried request) neither matches it nor adds it twice.
+        """
+        match = self.find(fingerprint, exclude_key=key)
+        if match is None and not self._contains(fingerprint, key):
+            self.add(fingerprint, key)
+        return match
+
+    def _contains(self, fingerprint: int, key: str) -> bool:
+        shift, mask = self._bands[0]
+        return any(
+            self._fingerprints[position] == fingerprint and self._keys[position] == key
+            for position in self._tables[0].get(fingerprint >> shift & mask, ())
+        )
+
+    def to_bytes(self) -> bytes:
+        """Serialize the index (fingerprints as little-endian uint64, then keys)."""
+        fingerprints = array("Q", self._fingerprints)
+        if sys.byteorder == "big":
+            fingerprints.byteswap()
+        return b"".join((
+            _HEADER.pack(_MAGIC, self.max_distance, len(fingerprints)),
+            fingerprints.tobytes(),
+            "\n".join(self._keys).encode("utf-8"),
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes, max_distance: int | None = None) -> "SimHashIndex":
+        """Load an index serialized with to_bytes().
+
+        Args:
+            data: Serialized index.
+            max_distance: Threshold of the loaded index. Defaults to the
+                threshold the index was serialized with.
+        """
+        magic, stored_distance, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a serialized SimHashIndex")
+        if max_distance is None:
+            max_distance = stored_distance
+        index = cls(max_distance=max_distance)
+        offset = _HEADER.size
+        fingerprints = array("Q")
+        fingerprints.frombytes(data[offset : offset + count * 8])
+        if sys.byteorder == "big":
+            fingerprints.byteswap()
+        keys_blob = data[offset + count * 8 :]
+        keys = keys_blob.decode("utf-8").split("\n") if count else []
+        for fingerprint, key in zip(fingerprints, keys):
+            index.add(fingerprint, key)
+        return index
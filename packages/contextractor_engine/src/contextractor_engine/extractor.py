@@ -1,8 +1,106 @@
-"""Content extraction wrapper using trafilatura."""
+"""Content extraction wrapper using trafilatura.
 
-import trafilatura
+trafilatura (with its lxml/justext/htmldate/courlan stack) is imported on first
+use rather than at module load, so importing the package stays cheap for code
+paths that only need the config models.
 
-from .models import ExtractionResult, MetadataResult, TrafilaturaConfig
+Extraction accepts either an HTML string or a tree from parse_html() or
+HtmlStreamParser. trafilatura copies a given tree before cleaning it, so one
+parsed tree can be shared by several formats or config variants of the same page.
+"""
+
+import time
+from collections.abc import Callable, Iterator
+from types import ModuleType
+from typing import TYPE_CHECKING, Union
+
+from .language import LanguageCheck, check_language
+from .models import ExtractionResult, MetadataResult, TrafilaturaConfig, VariantResult
+
+if TYPE_CHECKING:
+    from lxml.html import HtmlElement
+
+# Raw HTML or a tree returned by parse_html()
+HtmlInput = Union[str, "HtmlElement"]
+
+_WARMUP_HTML = """
+<html lang="en"><head><title>Warmup</title>
+<meta name="author" content="Warmup"><meta property="og:site_name" content="Warmup">
+</head><body><nav><a href="/">Home</a></nav><article><h1>Warmup</h1>
+<p>This paragraph exists only to initialize the extraction pipeline once.</p>
+<p>It is long enough to pass the minimum extracted size checks of trafilatura.</p>
+<table><tr><td>cell</td></tr></table><p>Published 2024-01-01.</p>
+</article><footer>Footer</footer></body></html>
+"""
+
+
+def _trafilatura() -> ModuleType:
+    """Import trafilatura on first use."""
+    import trafilatura
+
+    return trafilatura
+
+
+def parse_html(html: HtmlInput) -> "HtmlElement | None":
+    """Parse HTML into a tree reusable across extraction calls.
+
+    Applies the same size limit as trafilatura. Returns None for empty or
+    oversized documents. An already parsed tree is returned unchanged.
+    """
+    from trafilatura.settings import DEFAULT_CONFIG
+
+    max_size = DEFAULT_CONFIG.getint("DEFAULT", "MAX_FILE_SIZE")
+    return _trafilatura().load_html(html, max_size)
+
+
+# Elements that never hold extractable content, dropped by HtmlStreamParser
+STREAM_PRUNED_TAGS = (
+    "script", "style", "noscript", "template", "svg", "math", "iframe", "object", "embed",
+    "canvas", "map", "select", "textarea",
+)
+
+
+class HtmlStreamParser:
+    """Incremental HTML parser for pages too large to hold as one string.
+
+    Feed UTF-8 chunks as they arrive. Elements in `pruned_tags` are dropped as
+    soon as they are complete and comments are not kept, so the tree holds
+    little more than the page text. Unlike parse_html() no size limit applies.
+    """
+
+    def __init__(self, pruned_tags: tuple[str, ...] = STREAM_PRUNED_TAGS) -> None:
+        from lxml import etree
+        from lxml.html import HtmlElementClassLookup
+
+        self._parser = etree.HTMLPullParser(
+            events=("end",),
+            tag=pruned_tags,
+            encoding="utf-8",
+            remove_comments=True,
+            remove_pis=True,
+        )
+        self._parser.set_element_class_lookup(HtmlElementClassLookup())
+        self.pruned = 0
+
+    def feed(self, data: bytes) -> None:
+        """Parse the next chunk and drop completed pruned elements."""
+        self._parser.feed(data)
+        self._prune()
+
+    def close(self) -> "HtmlElement | None":
+        """Finish parsing and return the tree, or None for an empty document."""
+        root = self._parser.close()
+        self._prune()
+        if root is None or not len(root):
+            return None
+        return root
+
+    def _prune(self) -> None:
+        for _, element in self._parser.read_events():
+            if element.getparent() is not None:
+                # Keeps the element's tail text
+                element.drop_tree()
+                self.pruned += 1
 
 
 class ContentExtractor:
@@ -15,13 +113,13 @@ class ContentExtractor:
 
     def extract(
         self,
-        html: str,
+        html: HtmlInput,
         url: str | None = None,
         output_format: str = "txt",
     ) -> ExtractionResult | None:
         """Extract content in specified format."""
         kwargs = self.config.to_trafilatura_kwargs()
-        result = trafilatura.extract(
+        result = _trafilatura().extract(
             html,
             url=url,
             output_format=output_format,
@@ -31,13 +129,24 @@ class ContentExtractor:
             return None
         return ExtractionResult(content=result, output_format=output_format)
 
-    def extract_metadata(self, html: str, url: str | None = None) -> MetadataResult:
+    def check_language(self, html: str, url: str | None = None) -> LanguageCheck | None:
+        """Cheap language pre-filter for configs with `target_language`.
+
+        Run before extract() to skip pages that confidently do not match the
+        target language without paying for full extraction.
+        Returns None if no target language is configured.
+        """
+        if not self.config.target_language:
+            return None
+        return check_language(html, self.config.target_language, url=url)
+
+    def extract_metadata(self, html: HtmlInput, url: str | None = None) -> MetadataResult:
         """Extract metadata from HTML.
 
         Note: bare_extraction returns a Document object with attributes,
         not a dict. Use getattr() to access fields safely.
         """
-        raw = trafilatura.bare_extraction(html, url=url, with_metadata=True)
+        raw = _trafilatura().bare_extraction(html, url=url, with_metadata=True)
         if not raw:
             return MetadataResult()  # All fields default to None
         # bare_extraction returns a Document object with attributes
@@ -50,9 +159,49 @@ class ContentExtractor:
             language=getattr(raw, "language", None),
         )
 
+    def iter_formats(
+        self,
+        html: HtmlInput,
+        url: str | None = None,
+        formats: list[str] | None = None,
+    ) -> Iterator[ExtractionResult]:
+        """Extract formats one at a time.
+
+        Each result is produced only after the previous one was consumed, so a
+        caller that hands results off (and drops them) keeps at most one format
+        of the page in memory. Failed extractions are skipped. The HTML is
+        parsed once for all formats.
+        """
+        tree = parse_html(html)
+        if tree is None:
+            return
+        for fmt in formats or self.DEFAULT_FORMATS:
+            result = self.extract(tree, url=url, output_format=fmt)
+            if result is not None:
+                yield result
+
+    def extract_to_sink(
+        self,
+        html: HtmlInput,
+        sink: Callable[[str, bytes], object],
+        url: str | None = None,
+        formats: list[str] | None = None,
+    ) -> list[str]:
+        """Extract formats and pass each to `sink` as UTF-8 bytes.
+
+        `sink(output_format, data)` is called before the next format is
+        extracted, e.g. to write a file, a socket or a storage record.
+        Returns the list of formats that were produced.
+        """
+        produced = []
+        for result in self.iter_formats(html, url=url, formats=formats):
+            sink(result.output_format, result.to_bytes())
+            produced.append(result.output_format)
+        return produced
+
     def extract_all_formats(
         self,
-        html: str,
+        html: HtmlInput,
         url: str | None = None,
         formats: list[str] | None = None,
     ) -> dict[str, ExtractionResult]:
@@ -60,11 +209,65 @@ class ContentExtractor:
 
         Default formats: ["txt", "markdown", "json", "xml"]
         Returns dict keyed by format name. Failed extractions are omitted.
+        Holds all formats in memory; prefer iter_formats() for large pages.
         """
-        formats = formats or self.DEFAULT_FORMATS
-        results: dict[str, ExtractionResult] = {}
-        for fmt in formats:
-            result = self.extract(html, url=url, output_format=fmt)
-            if result is not None:
-                results[fmt] = result
-        return results
+        return {
+            result.output_format: result
+            for result in self.iter_formats(html, url=url, formats=formats)
+        }
+
+
+def extract_variants(
+    html: HtmlInput,
+    configs: dict[str, TrafilaturaConfig],
+    url: str | None = None,
+    formats: list[str] | None = None,
+) -> dict[str, VariantResult]:
+    """Extract one document with several configs for side-by-side comparison.
+
+    The HTML is parsed once and the tree is shared by all variants; only the
+    config-dependent cleaning and extraction run per variant.
+
+    Args:
+        html: Raw HTML or a tree from parse_html().
+        configs: Config variants keyed by name, e.g. {"balanced": ..., "recall": ...}.
+        url: Source URL.
+        formats: Output formats per variant (default: ContentExtractor.DEFAULT_FORMATS).
+
+    Returns:
+        VariantResult per variant name, in the order of `configs`. Variants
+        that produced nothing have empty `results`.
+    """
+    tree = parse_html(html)
+    variants = {}
+    for name, config in configs.items():
+        start = time.perf_counter()
+        results = (
+            ContentExtractor(config=config).extract_all_formats(tree, url=url, formats=formats)
+            if tree is not None
+            else {}
+        )
+        variants[name] = VariantResult(
+            name=name,
+            config=config,
+            results=results,
+            elapsed=time.perf_counter() - start,
+        )
+    return variants
+
+
+def warmup() -> float:
+    """Import trafilatura and run one small extraction.
+
+    Loads the lazily initialized parts of the extraction stack (lxml cleaner,
+    justext stoplists, htmldate and courlan tables) so the first real page
+    does not pay for them. Safe to call from a background thread.
+
+    Returns:
+        Elapsed time in seconds.
+    """
+    start = time.perf_counter()
+    extractor = ContentExtractor()
+    extractor.extract(_WARMUP_HTML, url="https://example.com/warmup", output_format="markdown")
+    extractor.extract_metadata(_WARMUP_HTML, url="https://example.com/warmup")
+    return time.perf_counter() - start
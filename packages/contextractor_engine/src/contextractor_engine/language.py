@@ -0,0 +1,160 @@
+"""Cheap language pre-filter run before full extraction.
+
+Checks the languages a page declares (`<html lang>`, `og:locale`,
+`Content-Language` meta, self-referencing `hreflang`) and, when py3langid is
+installed, a language guess on a few samples of the visible text. Only pages
+that confidently do not match the target language are rejected; anything
+uncertain goes through full extraction, where trafilatura applies its own
+`target_language` check.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from urllib.parse import urljoin
+
+_HEAD_LIMIT = 65_536
+_TEXT_LIMIT = 400_000
+_SAMPLE_SIZE = 700
+_MIN_SAMPLE_CHARS = 200
+
+# Minimum normalized probability for a text guess to count as confident
+TEXT_CONFIDENCE = 0.9
+
+_HTML_LANG_RE = re.compile(r"<html\b[^>]*?\blang\s*=\s*[\"']?([A-Za-z0-9_-]+)", re.IGNORECASE)
+_TAG_RE = re.compile(r"<(meta|link)\b[^>]*>", re.IGNORECASE)
+_ATTR_RE = re.compile(r"([a-zA-Z:-]+)\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>]+))")
+_STRIP_BLOCKS_RE = re.compile(
+    r"<(script|style|noscript|template|svg)\b.*?</\1\s*>|<!--.*?-->", re.IGNORECASE | re.DOTALL
+)
+_STRIP_TAGS_RE = re.compile(r"<[^>]+>")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@dataclass(slots=True, frozen=True)
+class LanguageCheck:
+    """Outcome of the language pre-filter.
+
+    `matches` is True or False when the page confidently does or does not match
+    the target language, and None when the pre-filter cannot tell.
+    """
+
+    matches: bool | None
+    language: str | None = None
+    source: str | None = None  # "declared" or "text"
+
+    @property
+    def rejected(self) -> bool:
+        """True if the page can be skipped without full extraction."""
+        return self.matches is False
+
+    @property
+    def reason(self) -> str:
+        """Human-readable explanation of the outcome."""
+        if self.matches is None:
+            return "language undetermined"
+        verb = "matches" if self.matches else "does not match"
+        return f"{self.source} language {self.language} {verb} target"
+
+
+def primary_subtag(language: str) -> str:
+    """Normalize `en-US`, `en_us` or `EN` to `en`."""
+    return re.split(r"[-_]", language.strip(), maxsplit=1)[0].lower()
+
+
+def _attributes(tag: str) -> dict[str, str]:
+    # Only one of the three value groups matches, the others are empty
+    return {name.lower(): "".join(values) for name, *values in _ATTR_RE.findall(tag)}
+
+
+def find_language_alternates(html: str, base_url: str | None = None) -> dict[str, str]:
+    """Collect `<link rel="alternate" hreflang>` URLs of a page.
+
+    Returns:
+        Mapping of absolute URL to its hreflang value (`x-default` included).
+    """
+    alternates: dict[str, str] = {}
+    for match in _TAG_RE.finditer(html[:_HEAD_LIMIT]):
+        if match.group(1).lower() != "link":
+            continue
+        attrs = _attributes(match.group(0))
+        if "hreflang" in attrs and "href" in attrs and "alternate" in attrs.get("rel", "").lower():
+            url = urljoin(base_url, attrs["href"]) if base_url else attrs["href"]
+            alternates[url] = attrs["hreflang"]
+    return alternates
+
+
+def declared_languages(html: str, url: str | None = None) -> list[str]:
+    """Languages the page declares about itself, as primary subtags."""
+    head = html[:_HEAD_LIMIT]
+    found: list[str] = []
+    html_lang = _HTML_LANG_RE.search(head)
+    if html_lang:
+        found.append(html_lang.group(1))
+    for match in _TAG_RE.finditer(head):
+        attrs = _attributes(match.group(0))
+        if match.group(1).lower() == "meta":
+            key = attrs.get("property") or attrs.get("name") or attrs.get("http-equiv") or ""
+            if key.lower() in ("og:locale", "content-language", "language", "dc.language"):
+                found.extend(part for part in attrs.get("content", "").split(",") if part.strip())
+    if url:
+        # A hreflang entry pointing at the page itself names the page's language
+        for alternate_url, hreflang in find_language_alternates(html, url).items():
+            if alternate_url.rstrip("/") == url.rstrip("/") and hreflang != "x-default":
+                found.append(hreflang)
+    return list(dict.fromkeys(primary_subtag(lang) for lang in found if lang.strip()))
+
+
+def sample_text(html: str) -> str:
+    """Take a few samples of visible text spread over the page body."""
+    text = _STRIP_BLOCKS_RE.sub(" ", html[:_TEXT_LIMIT])
+    text = _WHITESPACE_RE.sub(" ", _STRIP_TAGS_RE.sub(" ", text)).strip()
+    if len(text) <= _SAMPLE_SIZE * 3:
+        return text
+    return " ".join(
+        text[int(len(text) * fraction) : int(len(text) * fraction) + _SAMPLE_SIZE]
+        for fraction in (0.25, 0.5, 0.75)
+    )
+
+
+def guess_text_language(text: str) -> tuple[str, float] | None:
+    """Guess language of text with py3langid, if installed.
+
+    Returns:
+        Tuple of (language, normalized probability), or None if py3langid is
+        not available or the text is too short.
+    """
+    if len(text) < _MIN_SAMPLE_CHARS:
+        return None
+    try:
+        import py3langid
+    except ImportError:
+        return None
+    ranking = py3langid.rank(text)
+    if not ranking:
+        return None
+    top_language, top_score = ranking[0]
+    probability = 1 / sum(math.exp(score - top_score) for _, score in ranking)
+    return top_language, probability
+
+
+def check_language(html: str, target_language: str, url: str | None = None) -> LanguageCheck:
+    """Decide cheaply whether a page is in the target language.
+
+    Declared languages decide when present, unless a confident text guess
+    contradicts them. Without declarations, a confident text guess decides.
+    """
+    target = primary_subtag(target_language)
+    declared = declared_languages(html, url)
+    if target in declared:
+        return LanguageCheck(matches=True, language=target, source="declared")
+
+    guess = guess_text_language(sample_text(html))
+    confident_guess = guess if guess and guess[1] >= TEXT_CONFIDENCE else None
+    if confident_guess and confident_guess[0] == target:
+        return LanguageCheck(matches=True, language=target, source="text")
+    if declared:
+        return LanguageCheck(matches=False, language=declared[0], source="declared")
+    if confident_guess:
+        return LanguageCheck(matches=False, language=confident_guess[0], source="text")
+    return LanguageCheck(matches=None)
@@ -3,6 +3,8 @@
 from dataclasses import dataclass, field
 from typing import Any
 
+from .utils import normalize_config_keys
+
 
 @dataclass
 class TrafilaturaConfig:
@@ -112,21 +114,41 @@ class TrafilaturaConfig:
             result["dateExtractionParams"] = self.date_extraction_params
         return result
 
+    @classmethod
+    def from_json_dict(cls, raw: dict[str, Any] | None) -> "TrafilaturaConfig":
+        """Build config from a JSON dict with camelCase or snake_case keys.
+
+        Empty or missing dict returns balanced defaults. None values are ignored
+        and blacklists given as JSON arrays are converted to sets.
+        """
+        if not raw:
+            return cls.balanced()
+        normalized = normalize_config_keys(raw)
+        filtered = {k: v for k, v in normalized.items() if v is not None}
+        for key in ("url_blacklist", "author_blacklist"):
+            if isinstance(filtered.get(key), list):
+                filtered[key] = set(filtered[key])
+        return cls(**filtered)
+
     @classmethod
     def get_default_json(cls) -> dict[str, Any]:
         """Get default config as JSON-serializable dict with camelCase keys."""
         return cls().to_json_dict()
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ExtractionResult:
     """Result from a single format extraction."""
 
     content: str
     output_format: str  # "txt", "json", "markdown", "xml", "xmltei"
 
+    def to_bytes(self) -> bytes:
+        """Return content encoded as UTF-8."""
+        return self.content.encode("utf-8")
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class MetadataResult:
     """Extracted metadata from HTML."""
 
@@ -136,3 +158,13 @@ class MetadataResult:
     description: str | None = None
     sitename: str | None = None
     language: str | None = None
+
+
+@dataclass(slots=True, frozen=True)
+class VariantResult:
+    """Extraction results of one config variant, with its extraction time."""
+
+    name: str
+    config: TrafilaturaConfig
+    results: dict[str, ExtractionResult]  # keyed by output format
+    elapsed: float  # seconds, excluding the shared parse
@@ -0,0 +1,405 @@
+"""Local HTTP extraction service backed by a warm process pool.
+
+Endpoints:
+    POST /extract  JSON body {"html", "url", "trafilaturaConfig", "formats"}
+                   -> {"formats": {format: content}, "metadata": {...}, "timingMs"}
+    GET  /health   -> {"status": "ok"}
+    GET  /stats    -> queue, batching and worker counters
+
+Worker processes are started and warmed up (trafilatura imported, one extraction
+run) before the server accepts connections, and keep a ContentExtractor per
+distinct config. Small documents are grouped into micro-batches so one pool
+round trip serves several requests. When more than `max_pending` requests are
+queued the service answers 429 instead of buffering without bound.
+
+Run with:
+    contextractor-engine-service --port 8080 --workers 4
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict
+from functools import lru_cache
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from .extractor import ContentExtractor, parse_html, warmup
+from .models import TrafilaturaConfig
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = frozenset({"txt", "markdown", "json", "xml", "xmltei", "html", "csv"})
+
+# (html, url, config_json, formats)
+Job = tuple[str, str | None, str, tuple[str, ...]]
+
+
+class ServiceOverloaded(Exception):
+    """Raised when the pending request queue is full."""
+
+
+def _init_worker() -> None:
+    """Warm up the extraction stack once per worker process."""
+    warmup()
+
+
+@lru_cache(maxsize=32)
+def _get_extractor(config_json: str) -> ContentExtractor:
+    """Return a cached extractor for a canonical config JSON string."""
+    return ContentExtractor(config=TrafilaturaConfig.from_json_dict(json.loads(config_json)))
+
+
+def _extract_document(
+    html: str,
+    url: str | None,
+    config_json: str,
+    formats: tuple[str, ...],
+) -> dict[str, Any]:
+    """Extract all requested formats and metadata from one document.
+
+    The HTML is parsed once and the tree shared by all extraction passes.
+    """
+    start = time.perf_counter()
+    extractor = _get_extractor(config_json)
+    contents: dict[str, str | None] = dict.fromkeys(formats)
+    tree = parse_html(html)
+    metadata = extractor.extract_metadata(html if tree is None else tree, url=url)
+    if tree is not None:
+        for result in extractor.iter_formats(tree, url=url, formats=list(formats)):
+            contents[result.output_format] = result.content
+    return {
+        "formats": contents,
+        "metadata": asdict(metadata),
+        "timingMs": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def _extract_batch(jobs: list[Job]) -> list[dict[str, Any]]:
+    """Extract a batch of documents in a worker process.
+
+    Errors are returned per document so one bad page does not fail the batch.
+    """
+    results = []
+    for job in jobs:
+        try:
+            results.append(_extract_document(*job))
+        except Exception as e:
+            results.append({"error": f"{type(e).__name__}: {e}"})
+    return results
+
+
+class ExtractionService:
+    """Process pool with micro-batching and bounded admission.
+
+    Args:
+        workers: Number of worker processes. Defaults to CPU count.
+        max_pending: Maximum accepted but unfinished requests before rejecting.
+        batch_size: Maximum number of small documents per batch.
+        batch_window: Seconds to wait for more small documents before dispatching.
+        small_document_chars: Documents up to this size are batched, larger ones
+            are dispatched on their own.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_pending: int = 256,
+        batch_size: int = 16,
+        batch_window: float = 0.005,
+        small_document_chars: int = 32_768,
+    ) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.small_document_chars = small_document_chars
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._batch_queue: queue.Queue[tuple[Job, Future] | None] = queue.Queue()
+        self._pool: ProcessPoolExecutor | None = None
+        self._batcher: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._counters = {
+            "accepted": 0,
+            "rejected": 0,
+            "completed": 0,
+            "failed": 0,
+            "pending": 0,
+            "batches": 0,
+            "batchedDocuments": 0,
+            "inFlightBatches": 0,
+        }
+
+    def start(self) -> None:
+        """Start and warm up all worker processes, then the batcher thread."""
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        # Force every worker to start (and run the initializer) before serving
+        for future in [self._pool.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+        self._batcher = threading.Thread(
+            target=self._run_batcher, name="extraction-batcher", daemon=True
+        )
+        self._batcher.start()
+        self._started_at = time.monotonic()
+
+    def close(self) -> None:
+        """Stop the batcher and shut down the worker pool."""
+        if self._batcher:
+            self._batch_queue.put(None)
+            self._batcher.join()
+            self._batcher = None
+        if self._pool:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def submit(
+        self,
+        html: str,
+        url: str | None = None,
+        config: TrafilaturaConfig | None = None,
+        formats: list[str] | None = None,
+    ) -> Future:
+        """Queue one document for extraction.
+
+        Returns:
+            Future resolving to a dict with `formats`, `metadata` and `timingMs`.
+
+        Raises:
+            ServiceOverloaded: If `max_pending` requests are already queued.
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise ServiceOverloaded(f"More than {self.max_pending} pending requests")
+
+        config = config or TrafilaturaConfig.balanced()
+        config_json = json.dumps(config.to_json_dict(), sort_keys=True)
+        job: Job = (html, url, config_json, tuple(formats or ContentExtractor.DEFAULT_FORMATS))
+        future: Future = Future()
+        future.add_done_callback(self._on_request_done)
+        self._count("accepted")
+        self._count("pending")
+
+        if len(html) <= self.small_document_chars:
+            self._batch_queue.put((job, future))
+        else:
+            self._dispatch([(job, future)])
+        return future
+
+    def stats(self) -> dict[str, Any]:
+        """Return a snapshot of service counters."""
+        with self._lock:
+            counters = dict(self._counters)
+        batches = counters["batches"]
+        return {
+            **counters,
+            "workers": self.workers,
+            "maxPending": self.max_pending,
+            "queuedForBatching": self._batch_queue.qsize(),
+            "avgBatchSize": round(counters["batchedDocuments"] / batches, 2) if batches else 0,
+            "uptimeSecs": round(time.monotonic() - self._started_at, 1),
+        }
+
+    def _count(self, name: str, delta: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += delta
+
+    def _on_request_done(self, future: Future) -> None:
+        self._count("pending", -1)
+        self._count("failed" if future.exception() else "completed")
+        self._slots.release()
+
+    def _dispatch(self, items: list[tuple[Job, Future]]) -> None:
+        """Send a batch to the pool and resolve request futures when done."""
+        assert self._pool is not None, "ExtractionService.start() was not called"
+        self._count("batches")
+        self._count("batchedDocuments", len(items))
+        self._count("inFlightBatches")
+        pool_future = self._pool.submit(_extract_batch, [job for job, _ in items])
+
+        def resolve(done: Future) -> None:
+            self._count("inFlightBatches", -1)
+            try:
+                results = done.result()
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                return
+            for (_, future), result in zip(items, results):
+                if "error" in result:
+                    future.set_exception(RuntimeError(result["error"]))
+                else:
+                    future.set_result(result)
+
+        pool_future.add_done_callback(resolve)
+
+    def _run_batcher(self) -> None:
+        """Group small documents arriving within `batch_window` into batches."""
+        while True:
+            item = self._batch_queue.get()
+            if item is None:
+                return
+            items = [item]
+            deadline = time.monotonic() + self.batch_window
+            stop = False
+            while len(items) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    next_item = self._batch_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if next_item is None:
+                    stop = True
+                    break
+                items.append(next_item)
+            self._dispatch(items)
+            if stop:
+                return
+
+
+class ExtractionServer(ThreadingHTTPServer):
+    """Threading HTTP server bound to an ExtractionService."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        service: ExtractionService,
+        request_timeout: float = 60.0,
+    ) -> None:
+        super().__init__(address, _RequestHandler)
+        self.service = service
+        self.request_timeout = request_timeout
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """JSON API handler. Uses HTTP/1.1 so clients can keep connections alive."""
+
+    protocol_version = "HTTP/1.1"
+    server: ExtractionServer
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(HTTPStatus.OK, {"status": "ok"})
+        elif self.path == "/stats":
+            self._send_json(HTTPStatus.OK, self.server.service.stats())
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Not found: {self.path}"})
+
+    def do_POST(self) -> None:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            # The body cannot be delimited, so the connection cannot be reused
+            self.close_connection = True
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": "Invalid Content-Length header"})
+            return
+        body = self.rfile.read(length)
+        if self.path != "/extract":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Not found: {self.path}"})
+            return
+
+        try:
+            payload = json.loads(body)
+            html = payload["html"]
+            if not isinstance(html, str):
+                raise TypeError("'html' must be a string")
+            config = TrafilaturaConfig.from_json_dict(payload.get("trafilaturaConfig"))
+            formats = payload.get("formats") or ContentExtractor.DEFAULT_FORMATS
+            unsupported = set(formats) - SUPPORTED_FORMATS
+            if unsupported:
+                raise ValueError(f"Unsupported formats: {sorted(unsupported)}")
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": f"Invalid request: {e}"})
+            return
+
+        try:
+            future = self.server.service.submit(
+                html, url=payload.get("url"), config=config, formats=formats
+            )
+        except ServiceOverloaded as e:
+            self._send_json(
+                HTTPStatus.TOO_MANY_REQUESTS, {"error": str(e)}, headers={"Retry-After": "1"}
+            )
+            return
+
+        try:
+            result = future.result(timeout=self.server.request_timeout)
+        except TimeoutError:
+            self._send_json(HTTPStatus.GATEWAY_TIMEOUT, {"error": "Extraction timed out"})
+            return
+        except Exception as e:
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+            return
+        self._send_json(HTTPStatus.OK, result)
+
+    def _send_json(
+        self,
+        status: HTTPStatus,
+        payload: Any,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Console entry point for the extraction service."""
+    parser = argparse.ArgumentParser(description="Contextractor extraction service")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind")
+    parser.add_argument("--port", type=int, default=8080, help="Port to bind")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--max-pending", type=int, default=256, help="Pending requests before 429")
+    parser.add_argument("--batch-size", type=int, default=16, help="Max small documents per batch")
+    parser.add_argument("--batch-window-ms", type=float, default=5.0, help="Batch wait time (ms)")
+    parser.add_argument("--request-timeout", type=float, default=60.0, help="Request timeout (s)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    service = ExtractionService(
+        workers=args.workers,
+        max_pending=args.max_pending,
+        batch_size=args.batch_size,
+        batch_window=args.batch_window_ms / 1000,
+    )
+    service.start()
+    server = ExtractionServer((args.host, args.port), service, request_timeout=args.request_timeout)
+    logger.info(
+        "Serving on http://%s:%d with %d workers", args.host, server.server_port, service.workers
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
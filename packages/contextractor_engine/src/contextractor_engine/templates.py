@@ -0,0 +1,247 @@
+"""Per-host boilerplate templates learned from full extractions.
+
+Pages of one site share a layout, so blocks that never contribute to the
+extracted text on the first pages of a host (menus, sidebars, footers) are
+turned into `prune_xpath` rules. Later pages of the host are pruned before
+trafilatura scores the tree. Every `validate_every` pages the pruned result is
+compared with a full extraction; when they diverge the template is dropped and
+learned again.
+
+Hosts are kept in a bounded LRU, serializable with to_dict()/load_dict().
+"""
+
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Any
+from urllib.parse import urlsplit
+
+from .extractor import ContentExtractor, HtmlInput, parse_html
+from .models import TrafilaturaConfig
+
+# Block elements that make up page templates
+_BLOCK_TAGS = ("div", "section", "aside", "nav", "header", "footer", "ul", "form", "table")
+# Semantic tags that are usable as rules even without id or class
+_LANDMARK_TAGS = frozenset(("aside", "nav", "header", "footer", "form"))
+_IDENT_RE = re.compile(r"[A-Za-z][\w-]{0,63}")
+_CLASS_RE = re.compile(r"[A-Za-z][\w -]{0,127}")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Candidate blocks considered per page
+_MAX_CANDIDATES = 300
+
+
+def _host(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+def _bigrams(text: str) -> set[tuple[str, str]]:
+    words = _WORD_RE.findall(text.lower())
+    return set(zip(words, words[1:]))
+
+
+def _similarity(a: str | None, b: str | None) -> float:
+    """Jaccard similarity of word bigrams, 1.0 for two empty texts."""
+    a_grams, b_grams = _bigrams(a or ""), _bigrams(b or "")
+    if not a_grams and not b_grams:
+        return 1.0
+    return len(a_grams & b_grams) / len(a_grams | b_grams)
+
+
+def candidate_blocks(tree: Any) -> dict[str, str]:
+    """Map an XPath rule for each identifiable block of the page to its text.
+
+    Blocks are identified by tag and `id`, tag and exact `class`, or by a
+    landmark tag (nav, aside, ...) alone. Elements matching the same rule have
+    their texts joined.
+    """
+    blocks: dict[str, list[str]] = {}
+    for element in tree.iter(*_BLOCK_TAGS):
+        tag = element.tag
+        ident = (element.get("id") or "").strip()
+        classes = " ".join((element.get("class") or "").split())
+        if ident and _IDENT_RE.fullmatch(ident):
+            rule = f'//{tag}[@id="{ident}"]'
+        elif classes and _CLASS_RE.fullmatch(classes):
+            rule = f'//{tag}[@class="{classes}"]'
+        elif tag in _LANDMARK_TAGS:
+            rule = f"//{tag}"
+        else:
+            continue
+        if rule not in blocks and len(blocks) >= _MAX_CANDIDATES:
+            continue
+        blocks.setdefault(rule, []).append(element.text_content())
+    return {rule: " ".join(texts) for rule, texts in blocks.items()}
+
+
+def classify_blocks(blocks: dict[str, str], extracted_text: str) -> dict[str, bool]:
+    """Classify blocks as boilerplate (True) or content (False).
+
+    A block is boilerplate when almost none of its word bigrams occur in the
+    extracted text. Blocks with fewer than two bigrams are not classified.
+    """
+    content = _bigrams(extracted_text)
+    classified = {}
+    for rule, text in blocks.items():
+        grams = _bigrams(text)
+        if len(grams) < 2:
+            continue
+        matched = len(grams & content)
+        classified[rule] = matched <= max(1, len(grams) // 50)
+    return classified
+
+
+@dataclass(slots=True)
+class HostTemplate:
+    """Learning progress or learned rules of one host."""
+
+    pages: int = 0
+    # rule -> [boilerplate votes, content votes], only while learning
+    votes: dict[str, list[int]] = field(default_factory=dict)
+    rules: list[str] | None = None  # None while learning
+    since_validation: int = 0
+
+
+class BoilerplateTemplates:
+    """Bounded per-host LRU of learned prune rules.
+
+    Typical use per page::
+
+        config = templates.config_for(url, base_config)
+        ...extract with ContentExtractor(config)...
+        templates.observe(url, tree, base_config)
+
+    Args:
+        learn_pages: Pages of a host fully extracted before rules are fixed.
+        min_support: Pages on which a block must be boilerplate to become a rule.
+        validate_every: Validate the template against full extraction every N pages.
+        min_similarity: Minimum text similarity of a pruned and a full extraction.
+        max_hosts: Hosts kept in the LRU.
+        max_rules: Rules kept per host, most frequently confirmed first.
+    """
+
+    def __init__(
+        self,
+        learn_pages: int = 5,
+        min_support: int = 3,
+        validate_every: int = 25,
+        min_similarity: float = 0.9,
+        max_hosts: int = 500,
+        max_rules: int = 20,
+    ) -> None:
+        if min_support > learn_pages:
+            raise ValueError("min_support cannot exceed learn_pages")
+        self.learn_pages = learn_pages
+        self.min_support = min_support
+        self.validate_every = validate_every
+        self.min_similarity = min_similarity
+        self.max_hosts = max_hosts
+        self.max_rules = max_rules
+        self._hosts: OrderedDict[str, HostTemplate] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._hosts)
+
+    def _get(self, host: str, create: bool = False) -> HostTemplate | None:
+        template = self._hosts.get(host)
+        if template is None and create:
+            template = self._hosts[host] = HostTemplate()
+            while len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+        if template is not None:
+            self._hosts.move_to_end(host)
+        return template
+
+    def rules_for(self, url: str) -> list[str]:
+        """Learned prune rules for the host of `url` (empty while learning)."""
+        template = self._get(_host(url))
+        return list(template.rules or ()) if template else []
+
+    def config_for(self, url: str, config: TrafilaturaConfig) -> TrafilaturaConfig:
+        """Return `config` with the host's rules added to `prune_xpath`."""
+        rules = self.rules_for(url)
+        if not rules:
+            return config
+        existing = config.prune_xpath or []
+        if isinstance(existing, str):
+            existing = [existing]
+        return replace(config, prune_xpath=[*existing, *rules])
+
+    def observe(self, url: str, html: HtmlInput, config: TrafilaturaConfig) -> str:
+        """Learn from or validate against a page after it was extracted.
+
+        Runs a full extraction with `config` (the config without learned rules)
+        only on learning and validation pages.
+
+        Returns:
+            `learning`, `learned`, `pruned`, `validated`, `drift` or `skipped`.
+        """
+        template = self._get(_host(url), create=True)
+        assert template is not None
+
+        if template.rules is not None:
+            template.since_validation += 1
+            if template.since_validation < self.validate_every:
+                return "pruned"
+            template.since_validation = 0
+            tree = parse_html(html)
+            if tree is None:
+                return "skipped"
+            full = ContentExtractor(config=config).extract(tree, url=url)
+            pruned = ContentExtractor(config=self.config_for(url, config)).extract(tree, url=url)
+            full_text = full.content if full else None
+            pruned_text = pruned.content if pruned else None
+            if _similarity(full_text, pruned_text) >= self.min_similarity:
+                return "validated"
+            self._hosts[_host(url)] = HostTemplate()
+            return "drift"
+
+        tree = parse_html(html)
+        if tree is None:
+            return "skipped"
+        result = ContentExtractor(config=config).extract(tree, url=url)
+        if result is None:
+            return "skipped"
+        for rule, boilerplate in classify_blocks(candidate_blocks(tree), result.content).items():
+            counts = template.votes.setdefault(rule, [0, 0])
+            counts[0 if boilerplate else 1] += 1
+        template.pages += 1
+        if template.pages < self.learn_pages:
+            return "learning"
+
+        confirmed = [
+            (boilerplate, rule)
+            for rule, (boilerplate, content) in template.votes.items()
+            if boilerplate >= self.min_support and content == 0
+        ]
+        confirmed.sort(key=lambda item: -item[0])
+        template.rules = [rule for _, rule in confirmed[: self.max_rules]]
+        template.votes = {}
+        return "learned"
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to a JSON-serializable dict, least recently used host first."""
+        return {
+            "hosts": {
+                host: {
+                    "pages": t.pages,
+                    "votes": t.votes,
+                    "rules": t.rules,
+                    "sinceValidation": t.since_validation,
+                }
+                for host, t in self._hosts.items()
+            }
+        }
+
+    def load_dict(self, data: dict[str, Any]) -> None:
+        """Replace the hosts with ones from to_dict() output."""
+        self._hosts.clear()
+        for host, raw in (data.get("hosts") or {}).items():
+            self._hosts[host] = HostTemplate(
+                pages=raw.get("pages", 0),
+                votes={rule: list(counts) for rule, counts in (raw.get("votes") or {}).items()},
+                rules=raw.get("rules"),
+                since_validation=raw.get("sinceValidation", 0),
+            )
+        while len(self._hosts) > self.max_hosts:
+            self._hosts.popitem(last=False)
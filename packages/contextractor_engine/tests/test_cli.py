@@ -0,0 +1,116 @@
+"""Tests for the bulk extraction command line."""
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from contextractor_engine.cli import find_html_files, main, output_paths
+
+SAMPLE_HTML = """
+<!DOCTYPE html>
+<html lang="en">
+<head><title>CLI Test</title></head>
+<body>
+    <article>
+        <h1>CLI Test Article</h1>
+        <p>This is a test paragraph with enough words to be extracted by trafilatura.</p>
+        <p>Another paragraph here for more content to extract from the document body.</p>
+    </article>
+</body>
+</html>
+"""
+
+
+@pytest.fixture
+def input_dir(tmp_path: Path) -> Path:
+    """Directory with a plain and a gzipped HTML file in a subdirectory."""
+    root = tmp_path / "pages"
+    (root / "sub").mkdir(parents=True)
+    (root / "a.html").write_text(SAMPLE_HTML, encoding="utf-8")
+    (root / "sub" / "b.html.gz").write_bytes(gzip.compress(SAMPLE_HTML.encode()))
+    (root / "notes.txt").write_text("not html", encoding="utf-8")
+    return root
+
+
+class TestFindHtmlFiles:
+    """Tests for input discovery and output mapping."""
+
+    def test_directory(self, input_dir: Path) -> None:
+        """Directories are walked recursively for HTML files only."""
+        files = find_html_files([str(input_dir)])
+        assert [f.relative_to(input_dir).as_posix() for f, _ in files] == ["a.html", "sub/b.html.gz"]
+
+    def test_glob(self, input_dir: Path) -> None:
+        """Glob patterns resolve relative to their common directory."""
+        files = find_html_files([str(input_dir / "**" / "*.gz")])
+        assert [(f.name, root) for f, root in files] == [("b.html.gz", input_dir / "sub")]
+
+    def test_output_paths_mirror_tree(self, input_dir: Path, tmp_path: Path) -> None:
+        """Outputs mirror the input tree with format extensions."""
+        outputs = output_paths(
+            input_dir / "sub" / "b.html.gz", input_dir, tmp_path / "out", ["markdown", "xmltei"]
+        )
+        assert outputs == {
+            "markdown": tmp_path / "out" / "sub" / "b.md",
+            "xmltei": tmp_path / "out" / "sub" / "b.tei.xml",
+        }
+
+
+class TestMain:
+    """Tests for the command-line entry point."""
+
+    def test_extracts_and_resumes(self, input_dir: Path, tmp_path: Path, capsys) -> None:
+        """Files are extracted in parallel and skipped on --resume."""
+        out = tmp_path / "out"
+        config = tmp_path / "config.json"
+        config.write_text(json.dumps({"includeLinks": False}), encoding="utf-8")
+        args = [str(input_dir), "-o", str(out), "-f", "markdown,txt", "-c", str(config), "-w", "2"]
+
+        assert main(args) == 0
+        assert "CLI Test Article" in (out / "a.md").read_text(encoding="utf-8")
+        assert (out / "sub" / "b.txt").exists()
+
+        assert main([*args, "--resume"]) == 0
+        assert "skipped 2" in capsys.readouterr().err
+
+    def test_resume_skips_empty_files(self, input_dir: Path, tmp_path: Path, capsys) -> None:
+        """Files that produced no output are recorded and skipped on --resume."""
+        (input_dir / "empty.html").write_text("<html><body></body></html>", encoding="utf-8")
+        args = [str(input_dir), "-o", str(tmp_path / "out"), "-w", "1"]
+
+        assert main(args) == 0
+        assert "empty 1" in capsys.readouterr().err
+
+        assert main([*args, "--resume"]) == 0
+        assert "skipped 3" in capsys.readouterr().err
+
+    def test_resume_after_settings_change(self, input_dir: Path, tmp_path: Path, capsys) -> None:
+        """A changed config, format list or input file is extracted again."""
+        out = tmp_path / "out"
+        config = tmp_path / "config.json"
+        config.write_text(json.dumps({"includeLinks": False}), encoding="utf-8")
+        args = [str(input_dir), "-o", str(out), "-c", str(config), "-w", "1", "--resume"]
+
+        assert main(args) == 0
+        assert main(args) == 0
+        assert "skipped 2" in capsys.readouterr().err
+
+        config.write_text(json.dumps({"includeLinks": True}), encoding="utf-8")
+        assert main(args) == 0
+        assert "skipped 0" in capsys.readouterr().err
+
+        assert main([*args, "-f", "markdown,txt"]) == 0
+        assert "skipped 0" in capsys.readouterr().err
+
+        (input_dir / "a.html").write_text(SAMPLE_HTML + "<!-- edited -->", encoding="utf-8")
+        assert main([*args, "-f", "markdown,txt"]) == 0
+        assert "skipped 1" in capsys.readouterr().err
+
+    def test_invalid_config(self, input_dir: Path, tmp_path: Path) -> None:
+        """Unknown config keys exit with a usage error."""
+        config = tmp_path / "config.json"
+        config.write_text(json.dumps({"noSuchOption": True}), encoding="utf-8")
+        with pytest.raises(SystemExit):
+            main([str(input_dir), "-o", str(tmp_path / "out"), "-c", str(config)])
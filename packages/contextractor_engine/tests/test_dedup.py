@@ -0,0 +1,91 @@
+"""Tests for near-duplicate detection."""
+
+import random
+
+import pytest
+
+from contextractor_engine import SimHashIndex, simhash
+from contextractor_engine.dedup import hamming_distance
+
+
+def _article(seed: int, words: int = 800) -> str:
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(3000)]
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+class TestSimhash:
+    """Tests for simhash fingerprints."""
+
+    def test_empty_text(self) -> None:
+        """Text without words has no fingerprint."""
+        assert simhash("  ...  ") is None
+
+    def test_deterministic(self) -> None:
+        """Same text gives the same fingerprint."""
+        assert simhash(_article(1)) == simhash(_article(1))
+
+    def test_small_change_is_close(self) -> None:
+        """Appending a short ad changes only a few bits."""
+        text = _article(1)
+        assert hamming_distance(simhash(text), simhash(text + " buy now limited offer")) <= 3
+
+    def test_different_text_is_far(self) -> None:
+        """Unrelated texts differ in many bits."""
+        assert hamming_distance(simhash(_article(1)), simhash(_article(2))) > 10
+
+
+class TestSimHashIndex:
+    """Tests for SimHashIndex."""
+
+    def test_check_and_add(self) -> None:
+        """Near-duplicates are reported, new pages are added."""
+        index = SimHashIndex(max_distance=3)
+        original = simhash(_article(1))
+        assert index.check_and_add(original, "https://example.com/a") is None
+        assert index.check_and_add(original ^ 0b101, "https://example.com/b") == (
+            "https://example.com/a",
+            2,
+        )
+        assert index.check_and_add(simhash(_article(2)), "https://example.com/c") is None
+        assert len(index) == 2
+
+    def test_check_and_add_same_key(self) -> None:
+        """Checking a page again does not match its own entry or add it twice."""
+        index = SimHashIndex(max_distance=3)
+        fingerprint = simhash(_article(1))
+        assert index.check_and_add(fingerprint, "https://example.com/a") is None
+        assert index.check_and_add(fingerprint, "https://example.com/a") is None
+        assert len(index) == 1
+        index.add(fingerprint ^ 0b1, "https://example.com/b")
+        assert index.check_and_add(fingerprint, "https://example.com/a") == (
+            "https://example.com/b",
+            1,
+        )
+
+    def test_round_trip(self) -> None:
+        """to_bytes()/from_bytes() keep fingerprints and keys."""
+        index = SimHashIndex(max_distance=4)
+        index.add(simhash(_article(1)), "https://example.com/a")
+        index.add(simhash(_article(2)), "https://example.com/b")
+
+        loaded = SimHashIndex.from_bytes(index.to_bytes())
+        assert loaded.max_distance == 4
+        assert len(loaded) == 2
+        assert loaded.find(simhash(_article(2))) == ("https://example.com/b", 0)
+
+    def test_round_trip_with_new_distance(self) -> None:
+        """from_bytes() can load the fingerprints under another threshold."""
+        index = SimHashIndex(max_distance=0)
+        index.add(simhash(_article(1)), "https://example.com/a")
+        near = simhash(_article(1)) ^ 0b111
+
+        assert SimHashIndex.from_bytes(index.to_bytes()).find(near) is None
+        loaded = SimHashIndex.from_bytes(index.to_bytes(), max_distance=3)
+        assert loaded.max_distance == 3
+        assert loaded.find(near) == ("https://example.com/a", 3)
+
+    def test_invalid_distance(self) -> None:
+        """max_distance must fit in 64 bits."""
+        with pytest.raises(ValueError):
+            SimHashIndex(max_distance=64)
@@ -1,14 +1,22 @@
 """Tests for contextractor-engine."""
 
+import subprocess
+import sys
+
 import pytest
 
 from contextractor_engine import (
     ContentExtractor,
     ExtractionResult,
+    HtmlStreamParser,
     MetadataResult,
     TrafilaturaConfig,
+    VariantResult,
+    extract_variants,
     get_default_config,
     normalize_config_keys,
+    parse_html,
+    warmup,
 )
 
 
@@ -206,6 +214,162 @@ class TestContentExtractor:
             assert isinstance(result, ExtractionResult)
             assert result.output_format == fmt
 
+    def test_iter_formats(self) -> None:
+        """iter_formats() yields a result per format in requested order."""
+        extractor = ContentExtractor()
+        results = list(extractor.iter_formats(self.SAMPLE_HTML, formats=["markdown", "txt"]))
+
+        assert [r.output_format for r in results] == ["markdown", "txt"]
+        assert all(r.content for r in results)
+
+    def test_extract_to_sink(self) -> None:
+        """extract_to_sink() passes UTF-8 bytes per format to the sink."""
+        extractor = ContentExtractor()
+        received: list[tuple[str, bytes]] = []
+        produced = extractor.extract_to_sink(
+            self.SAMPLE_HTML, lambda fmt, data: received.append((fmt, data)), formats=["txt"]
+        )
+
+        assert produced == [fmt for fmt, _ in received]
+        for _, data in received:
+            assert isinstance(data, bytes)
+            data.decode("utf-8")
+
+
+class TestVariants:
+    """Tests for shared-parse extraction of config variants."""
+
+    ARTICLE_HTML = (
+        "<html><head><title>Variants</title></head><body>"
+        "<nav><a href='/'>Home</a> <a href='/about'>About</a></nav><article><h1>Variants</h1>"
+        + "".join(
+            f"<p>Paragraph {i} of the article, long enough to be kept as main text.</p>"
+            for i in range(20)
+        )
+        + "<table><tr><td>Table cell content</td></tr></table>"
+        "</article><footer>Copyright footer</footer></body></html>"
+    )
+
+    def test_parse_html(self) -> None:
+        """parse_html() returns a tree, and passes a tree through unchanged."""
+        tree = parse_html(self.ARTICLE_HTML)
+        assert tree is not None
+        assert parse_html(tree) is tree
+        assert parse_html("") is None
+
+    def test_tree_reuse_matches_string(self) -> None:
+        """Extracting from a shared tree gives the same output and leaves it intact."""
+        extractor = ContentExtractor()
+        tree = parse_html(self.ARTICLE_HTML)
+        expected = extractor.extract(self.ARTICLE_HTML, output_format="markdown")
+        assert extractor.extract(tree, output_format="markdown") == expected
+        assert extractor.extract(tree, output_format="markdown") == expected
+
+    def test_extract_variants(self) -> None:
+        """Each variant matches a separate extraction with its config."""
+        configs = {
+            "balanced": TrafilaturaConfig.balanced(),
+            "precision": TrafilaturaConfig.precision(),
+            "no_tables": TrafilaturaConfig(include_tables=False),
+        }
+        variants = extract_variants(self.ARTICLE_HTML, configs, formats=["txt", "markdown"])
+
+        assert list(variants) == list(configs)
+        for name, variant in variants.items():
+            assert isinstance(variant, VariantResult)
+            assert variant.name == name
+            assert variant.elapsed >= 0
+            expected = ContentExtractor(config=configs[name]).extract_all_formats(
+                self.ARTICLE_HTML, formats=["txt", "markdown"]
+            )
+            assert variant.results == expected
+        assert "Table cell" in variants["balanced"].results["txt"].content
+        assert "Table cell" not in variants["no_tables"].results["txt"].content
+
+    def test_extract_variants_empty_document(self) -> None:
+        """Unparseable input gives empty results for every variant."""
+        variants = extract_variants("", {"balanced": TrafilaturaConfig.balanced()})
+        assert variants["balanced"].results == {}
+
+
+class TestHtmlStreamParser:
+    """Tests for incremental parsing of large pages."""
+
+    PAGE_HTML = (
+        "<!DOCTYPE html><html lang='en'><head><title>Streamed</title>"
+        "<style>body { color: red; }</style><script>var s = '</p>';</script></head><body>"
+        "<article><h1>Streamed</h1>"
+        + "".join(
+            f"<p>Paragraph {i} of a long page, long enough to be kept as main text."
+            f"<svg><path d='M0 0'/></svg> after the icon.<!-- note --></p>"
+            for i in range(30)
+        )
+        + "</article><script>trackPageView();</script></body></html>"
+    )
+
+    def _parse(self, chunk_size: int) -> HtmlStreamParser:
+        parser = HtmlStreamParser()
+        data = self.PAGE_HTML.encode("utf-8")
+        for start in range(0, len(data), chunk_size):
+            parser.feed(data[start : start + chunk_size])
+        return parser
+
+    def test_prunes_non_content_elements(self) -> None:
+        """Scripts, styles, inline SVG and comments are dropped, tail text is kept."""
+        from lxml.html import tostring
+
+        parser = self._parse(chunk_size=50)
+        tree = parser.close()
+        assert tree is not None
+        markup = tostring(tree, encoding="unicode")
+        assert "<script" not in markup and "<style" not in markup
+        assert "<svg" not in markup and "<!--" not in markup
+        assert "after the icon." in markup
+        assert tree.get("lang") == "en"
+        assert parser.pruned == 33
+
+    def test_extraction_matches_parse_html(self) -> None:
+        """The streamed tree extracts the same content as a fully parsed page."""
+        extractor = ContentExtractor()
+        tree = self._parse(chunk_size=97).close()
+        expected = extractor.extract(parse_html(self.PAGE_HTML), output_format="markdown")
+        assert extractor.extract(tree, output_format="markdown") == expected
+        assert extractor.extract_metadata(tree).title == "Streamed"
+
+    def test_multibyte_characters_split_across_chunks(self) -> None:
+        """UTF-8 sequences split between chunks are decoded correctly."""
+        parser = HtmlStreamParser()
+        data = "<html><body><p>Žluťoučký kůň úpěl ďábelské ódy</p></body></html>".encode()
+        for start in range(0, len(data), 3):
+            parser.feed(data[start : start + 3])
+        tree = parser.close()
+        assert tree is not None
+        assert "Žluťoučký kůň" in tree.text_content()
+
+    def test_empty_document(self) -> None:
+        """An empty stream gives None like parse_html()."""
+        parser = HtmlStreamParser()
+        parser.feed(b"")
+        assert parser.close() is None
+
+
+class TestStartup:
+    """Tests for lazy imports and warmup."""
+
+    def test_import_does_not_load_trafilatura(self) -> None:
+        """Importing the package does not import trafilatura."""
+        code = "import sys, contextractor_engine; print('trafilatura' in sys.modules)"
+        completed = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        assert completed.stdout.strip() == "False"
+
+    def test_warmup(self) -> None:
+        """warmup() loads trafilatura and returns elapsed time."""
+        elapsed = warmup()
+        assert elapsed >= 0
+        assert "trafilatura" in sys.modules
+
 
 class TestExtractionResult:
     """Tests for ExtractionResult dataclass."""
@@ -216,6 +380,14 @@ class TestExtractionResult:
         assert result.content == "Hello"
         assert result.output_format == "txt"
 
+    def test_frozen_and_slotted(self) -> None:
+        """ExtractionResult is immutable and has no instance dict."""
+        result = ExtractionResult(content="Hello", output_format="txt")
+        with pytest.raises(AttributeError):
+            result.content = "Changed"  # type: ignore[misc]
+        assert not hasattr(result, "__dict__")
+        assert result.to_bytes() == b"Hello"
+
 
 class TestMetadataResult:
     """Tests for MetadataResult dataclass."""
@@ -0,0 +1,79 @@
+"""Tests for the language pre-filter."""
+
+from contextractor_engine import ContentExtractor, TrafilaturaConfig, find_language_alternates
+from contextractor_engine.language import (
+    LanguageCheck,
+    check_language,
+    declared_languages,
+    primary_subtag,
+)
+
+HEAD = """<html{lang}><head>
+<meta property="og:locale" content="{locale}">
+<link rel="alternate" hreflang="en" href="/en/page">
+<link rel="alternate" hreflang="de-DE" href="https://example.com/de/page">
+<link rel="alternate" hreflang="x-default" href="/page">
+</head><body><p>Short.</p></body></html>"""
+
+
+def _page(lang: str = "", locale: str = "") -> str:
+    return HEAD.format(lang=f' lang="{lang}"' if lang else "", locale=locale)
+
+
+class TestDeclaredLanguages:
+    """Tests for language declarations."""
+
+    def test_primary_subtag(self) -> None:
+        """Region and case are dropped."""
+        assert primary_subtag("en-US") == "en"
+        assert primary_subtag("DE_at") == "de"
+
+    def test_html_lang_and_locale(self) -> None:
+        """`<html lang>` and og:locale are both read, deduplicated."""
+        assert declared_languages(_page("en-GB", "en_GB")) == ["en"]
+        assert declared_languages(_page("fr", "de_DE")) == ["fr", "de"]
+
+    def test_self_referencing_hreflang(self) -> None:
+        """A hreflang link to the page itself declares its language."""
+        assert declared_languages(_page(), "https://example.com/de/page") == ["de"]
+
+    def test_alternates(self) -> None:
+        """Relative alternates are resolved against the page URL."""
+        alternates = find_language_alternates(_page(), "https://example.com/de/page")
+        assert alternates == {
+            "https://example.com/en/page": "en",
+            "https://example.com/de/page": "de-DE",
+            "https://example.com/page": "x-default",
+        }
+
+
+class TestCheckLanguage:
+    """Tests for check_language."""
+
+    def test_declared_match(self) -> None:
+        """Declared target language is accepted."""
+        result = check_language(_page("de"), "de")
+        assert result == LanguageCheck(matches=True, language="de", source="declared")
+        assert not result.rejected
+
+    def test_declared_mismatch(self) -> None:
+        """Declared other language with little text is rejected."""
+        result = check_language(_page("fr"), "de")
+        assert result.rejected
+        assert result.language == "fr"
+        assert "does not match" in result.reason
+
+    def test_undetermined(self) -> None:
+        """No declaration and too little text cannot be decided."""
+        result = check_language("<html><body><p>Hi</p></body></html>", "en")
+        assert result.matches is None
+        assert not result.rejected
+
+    def test_extractor_without_target_language(self) -> None:
+        """Pre-filter is off without target_language."""
+        assert ContentExtractor().check_language(_page("fr")) is None
+
+    def test_extractor_with_target_language(self) -> None:
+        """Extractor uses its configured target language."""
+        extractor = ContentExtractor(config=TrafilaturaConfig(target_language="en"))
+        assert extractor.check_language(_page("fr")).rejected
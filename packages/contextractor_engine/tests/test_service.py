@@ -0,0 +1,150 @@
+"""Tests for the extraction service."""
+
+import http.client
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from contextractor_engine import ContentExtractor, TrafilaturaConfig
+from contextractor_engine.service import (
+    ExtractionServer,
+    ExtractionService,
+    ServiceOverloaded,
+    _extract_document,
+)
+
+SAMPLE_HTML = """
+<!DOCTYPE html>
+<html lang="en">
+<head><title>Service Test</title></head>
+<body>
+    <article>
+        <h1>Service Test Article</h1>
+        <p>This is a test paragraph with enough words to be extracted by trafilatura.</p>
+        <p>Another paragraph here for more content to extract from the document body.</p>
+    </article>
+</body>
+</html>
+"""
+
+
+@pytest.fixture(scope="module")
+def server():
+    """Start a one-worker service on a free port."""
+    service = ExtractionService(workers=1, max_pending=8)
+    service.start()
+    server = ExtractionServer(("127.0.0.1", 0), service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def _request(server: ExtractionServer, path: str, payload: dict | None = None) -> tuple[int, dict]:
+    url = f"http://127.0.0.1:{server.server_port}{path}"
+    data = json.dumps(payload).encode() if payload is not None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data)) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+class TestExtractionService:
+    """Tests for ExtractionService admission and batching."""
+
+    def test_rejects_when_queue_full(self) -> None:
+        """submit() raises ServiceOverloaded above max_pending."""
+        service = ExtractionService(workers=1, max_pending=1)
+        service.submit(SAMPLE_HTML)
+        with pytest.raises(ServiceOverloaded):
+            service.submit(SAMPLE_HTML)
+        assert service.stats()["rejected"] == 1
+
+    def test_submit_returns_formats_and_metadata(self, server: ExtractionServer) -> None:
+        """Submitted documents resolve to formats and metadata."""
+        future = server.service.submit(SAMPLE_HTML, formats=["txt", "markdown"])
+        result = future.result(timeout=30)
+        assert set(result["formats"]) == {"txt", "markdown"}
+        assert result["metadata"]["title"].startswith("Service Test")
+
+    def test_document_parsed_once(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """All formats are extracted from one parsed tree, not from the HTML string."""
+        documents = []
+        extract = ContentExtractor.extract
+
+        def recording_extract(self, html, url=None, output_format="txt"):
+            documents.append(html)
+            return extract(self, html, url=url, output_format=output_format)
+
+        monkeypatch.setattr(ContentExtractor, "extract", recording_extract)
+        result = _extract_document(SAMPLE_HTML, None, "{}", ("txt", "markdown"))
+
+        assert result["formats"]["txt"] and result["formats"]["markdown"]
+        assert len(documents) == 2
+        assert documents[0] is documents[1]
+        assert not isinstance(documents[0], str)
+
+
+class TestExtractionServer:
+    """Tests for the HTTP API."""
+
+    def test_health(self, server: ExtractionServer) -> None:
+        """GET /health answers ok."""
+        assert _request(server, "/health") == (200, {"status": "ok"})
+
+    def test_extract(self, server: ExtractionServer) -> None:
+        """POST /extract accepts camelCase trafilaturaConfig."""
+        status, body = _request(server, "/extract", {
+            "html": SAMPLE_HTML,
+            "url": "https://example.com/article",
+            "trafilaturaConfig": {"favorPrecision": True, "includeLinks": False},
+            "formats": ["txt"],
+        })
+        assert status == 200
+        assert "txt" in body["formats"]
+        assert body["metadata"]["title"].startswith("Service Test")
+
+    def test_invalid_config(self, server: ExtractionServer) -> None:
+        """Unknown config keys are rejected with 400."""
+        status, _ = _request(server, "/extract", {
+            "html": SAMPLE_HTML,
+            "trafilaturaConfig": {"noSuchOption": True},
+        })
+        assert status == 400
+
+    def test_invalid_content_length(self, server: ExtractionServer) -> None:
+        """A non-numeric Content-Length is rejected with 400."""
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+        connection.putrequest("POST", "/extract")
+        connection.putheader("Content-Length", "abc")
+        connection.endheaders()
+        response = connection.getresponse()
+        assert response.status == 400
+        assert "Content-Length" in json.loads(response.read())["error"]
+        connection.close()
+
+    def test_stats(self, server: ExtractionServer) -> None:
+        """GET /stats reports counters."""
+        status, body = _request(server, "/stats")
+        assert status == 200
+        assert body["workers"] == 1
+        assert body["accepted"] >= body["completed"]
+
+
+class TestConfigFromJson:
+    """Tests for TrafilaturaConfig.from_json_dict."""
+
+    def test_empty_returns_balanced(self) -> None:
+        """Empty dict returns balanced defaults."""
+        assert TrafilaturaConfig.from_json_dict({}) == TrafilaturaConfig.balanced()
+
+    def test_round_trip(self) -> None:
+        """to_json_dict() output is accepted back, blacklists become sets."""
+        config = TrafilaturaConfig(favor_recall=True, url_blacklist={"spam.com"})
+        assert TrafilaturaConfig.from_json_dict(config.to_json_dict()) == config
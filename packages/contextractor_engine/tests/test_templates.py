@@ -0,0 +1,127 @@
+"""Tests for per-host boilerplate templates."""
+
+import json
+
+import pytest
+
+from contextractor_engine import BoilerplateTemplates, ContentExtractor, TrafilaturaConfig
+from contextractor_engine.extractor import parse_html
+from contextractor_engine.templates import candidate_blocks, classify_blocks
+
+CONFIG = TrafilaturaConfig.balanced()
+
+
+def _page(i: int, sidebar_is_content: bool = False) -> str:
+    article = "".join(
+        f"<p>Article {i} paragraph {j} tells a different story about topic {i * 7 + j}.</p>"
+        for j in range(12)
+    )
+    sidebar = (
+        f"<div class='widget-area'>{article}</div>"
+        if sidebar_is_content
+        else "<div class='widget-area'><p>Popular posts and newsletter signup links "
+        "for all readers of the site here</p></div>"
+    )
+    main = "" if sidebar_is_content else f"<article><h1>Title {i}</h1>{article}</article>"
+    return (
+        "<html><body>"
+        "<nav id='menu'><a href='/'>Home page</a> <a href='/a'>About our company</a> "
+        "<a href='/c'>Contact the team</a></nav>"
+        f"{sidebar}{main}"
+        "<footer><p>Copyright by the example company, all rights reserved worldwide</p></footer>"
+        "</body></html>"
+    )
+
+
+def _learn(templates: BoilerplateTemplates, host: str = "example.com") -> list[str]:
+    for i in range(templates.learn_pages):
+        templates.observe(f"https://{host}/post-{i}", _page(i), CONFIG)
+    return templates.rules_for(f"https://{host}/")
+
+
+class TestClassification:
+    """Tests for block candidates and classification."""
+
+    def test_candidate_blocks(self) -> None:
+        """Blocks with id, class or a landmark tag become rules."""
+        blocks = candidate_blocks(parse_html(_page(0)))
+        assert '//nav[@id="menu"]' in blocks
+        assert '//div[@class="widget-area"]' in blocks
+        assert "//footer" in blocks
+
+    def test_classify_blocks(self) -> None:
+        """Blocks absent from the extracted text are boilerplate."""
+        blocks = {
+            "//nav": "Home page About us Contact",
+            "//article": "one two three four five",
+            "//tiny": "word",
+        }
+        classified = classify_blocks(blocks, "text with one two three four five inside")
+        assert classified == {"//nav": True, "//article": False}
+
+
+class TestBoilerplateTemplates:
+    """Tests for BoilerplateTemplates."""
+
+    def test_learns_rules(self) -> None:
+        """After learn_pages pages, template blocks become prune rules."""
+        templates = BoilerplateTemplates(learn_pages=3, min_support=3)
+        assert templates.observe("https://example.com/1", _page(1), CONFIG) == "learning"
+        assert templates.rules_for("https://example.com/1") == []
+
+        rules = _learn(templates)
+        assert '//nav[@id="menu"]' in rules
+        assert '//div[@class="widget-area"]' in rules
+        assert not any("article" in rule for rule in rules)
+        assert templates.rules_for("https://other.org/") == []
+
+    def test_config_for(self) -> None:
+        """Learned rules are appended to prune_xpath and keep the main content."""
+        templates = BoilerplateTemplates(learn_pages=3, min_support=3)
+        rules = _learn(templates)
+        base = TrafilaturaConfig(prune_xpath="//script")
+        config = templates.config_for("https://example.com/new", base)
+        assert config.prune_xpath == ["//script", *rules]
+        assert base.prune_xpath == "//script"
+
+        result = ContentExtractor(config=config).extract(_page(9), url="https://example.com/new")
+        assert result is not None
+        assert "Article 9 paragraph 3" in result.content
+        assert "newsletter" not in result.content
+
+    def test_validation_and_drift(self) -> None:
+        """Validation keeps a matching template and drops a drifted one."""
+        templates = BoilerplateTemplates(learn_pages=3, min_support=3, validate_every=1)
+        _learn(templates)
+        assert templates.observe("https://example.com/10", _page(10), CONFIG) == "validated"
+
+        drifted = _page(11, sidebar_is_content=True)
+        assert templates.observe("https://example.com/11", drifted, CONFIG) == "drift"
+        assert templates.rules_for("https://example.com/") == []
+
+    def test_lru_eviction(self) -> None:
+        """Least recently used hosts are evicted beyond max_hosts."""
+        templates = BoilerplateTemplates(learn_pages=1, min_support=1, max_hosts=2)
+        for host in ("a.com", "b.com"):
+            _learn(templates, host)
+        templates.rules_for("https://a.com/")
+        _learn(templates, "c.com")
+        assert len(templates) == 2
+        assert templates.rules_for("https://a.com/")
+        assert templates.rules_for("https://b.com/") == []
+
+    def test_serialization(self) -> None:
+        """State survives a JSON round trip."""
+        templates = BoilerplateTemplates(learn_pages=3, min_support=3)
+        rules = _learn(templates)
+        templates.observe("https://learning.org/", _page(1), CONFIG)
+
+        restored = BoilerplateTemplates(learn_pages=3, min_support=3)
+        restored.load_dict(json.loads(json.dumps(templates.to_dict())))
+        assert restored.rules_for("https://example.com/") == rules
+        assert restored.to_dict() == templates.to_dict()
+
+    def test_invalid_settings(self) -> None:
+        """min_support cannot exceed learn_pages."""
+        with pytest.raises(ValueError):
+            BoilerplateTemplates(learn_pages=2, min_support=3)
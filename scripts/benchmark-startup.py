@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Measure cold-start time of the engine and the actor modules.
+
+Each scenario runs in a fresh interpreter so nothing is shared between
+measurements. Prints one JSON object per scenario (median of all runs) so
+results can be compared between commits:
+
+    uv run python scripts/benchmark-startup.py --runs 10 > startup.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SCENARIOS: dict[str, str] = {
+    'engine-import': 'import contextractor_engine',
+    'engine-config': (
+        'from contextractor_engine import TrafilaturaConfig; TrafilaturaConfig.balanced()'
+    ),
+    'engine-warmup': 'import contextractor_engine; contextractor_engine.warmup()',
+    'trafilatura-import': 'import trafilatura',
+    'actor-package-import': 'import src',
+    'actor-main-import': 'import src.main',
+}
+
+_TIMER = """
+import time
+_start = time.perf_counter()
+{code}
+print(time.perf_counter() - _start)
+"""
+
+
+def run_scenario(code: str, runs: int) -> list[float]:
+    """Run a scenario in fresh interpreters and return elapsed times in seconds."""
+    timings = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, '-c', _TIMER.format(code=code)],
+            cwd=ROOT / 'apps' / 'contextractor',
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        timings.append(float(completed.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Runs per scenario')
+    parser.add_argument('scenarios', nargs='*', default=list(SCENARIOS), help='Scenarios to run')
+    args = parser.parse_args()
+
+    for name in args.scenarios:
+        timings = run_scenario(SCENARIOS[name], args.runs)
+        print(json.dumps({
+            'scenario': name,
+            'medianMs': round(statistics.median(timings) * 1000, 1),
+            'minMs': round(min(timings) * 1000, 1),
+            'runs': args.runs,
+        }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""Run the actor against a synthetic local site and measure crawl throughput.
+
+Each test suite in `test-suites/<slug>/` has a `site.json` (shape of the
+synthetic site, see `SiteConfig`), a `settings.json` (actor input without
+`startUrls`) and optionally an `expect.json` (`minItems`/`maxItems` of the
+dataset). The actor runs as `python -m src` with fresh local storage, so no
+platform account or network access is needed. Prints one JSON object per
+suite (median of all runs) so results can be compared between commits:
+
+    uv run python tools/load-test-runner/load_test.py --all --runs 3 > load.jsonl
+
+With `--shards N` the crawl is split across N actor processes sharing the
+local storage, and `--hosts H` serves the site on H loopback addresses
+(127.0.0.1 ... 127.0.0.H) so the hosts spread over the shards.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from synthetic_site import SiteConfig, SyntheticSite
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+ACTOR_DIR = ROOT / 'apps' / 'contextractor'
+SUITES_DIR = Path(__file__).resolve().parent / 'test-suites'
+
+# Metrics flush interval used unless a suite sets metricsIntervalSecs itself
+DEFAULT_METRICS_INTERVAL_SECS = 5
+
+
+def list_suites() -> list[str]:
+    """Slugs of all test suites."""
+    return sorted(path.name for path in SUITES_DIR.iterdir() if (path / 'site.json').exists())
+
+
+def load_suite(slug: str) -> dict:
+    """Load the site, settings, expectations and description of a suite."""
+    suite_dir = SUITES_DIR / slug
+    expect_path = suite_dir / 'expect.json'
+    return {
+        'slug': slug,
+        'description': (suite_dir / 'description.md').read_text(encoding='utf-8'),
+        'site': SiteConfig.from_dict(json.loads((suite_dir / 'site.json').read_text())),
+        'settings': json.loads((suite_dir / 'settings.json').read_text()),
+        'expect': json.loads(expect_path.read_text()) if expect_path.exists() else {},
+    }
+
+
+def parse_prometheus(text: str) -> dict[str, dict[str, float]]:
+    """Parse a Prometheus text snapshot into {metric name: {labels: value}}."""
+    samples: dict[str, dict[str, float]] = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        series, _, value = line.rpartition(' ')
+        name, _, labels = series.partition('{')
+        samples.setdefault(name, {})[labels.rstrip('}')] = float(value)
+    return samples
+
+
+def histogram_quantile(buckets: dict[str, float], quantile: float) -> float | None:
+    """Estimate a quantile from cumulative `le` buckets, interpolating like Prometheus."""
+    bounds = sorted(
+        (float(labels.split('"')[1]), count) for labels, count in buckets.items()
+    )
+    total = bounds[-1][1] if bounds else 0
+    if not total:
+        return None
+    rank = quantile * total
+    lower_bound, lower_count = 0.0, 0.0
+    for bound, count in bounds:
+        if count >= rank:
+            if bound == float('inf'):
+                return lower_bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (
+                count - lower_count
+            )
+        lower_bound, lower_count = bound, count
+    return lower_bound
+
+
+def run_actor(
+    settings: dict,
+    storage_dir: Path,
+    timeout_secs: float,
+    shards: int = 1,
+) -> tuple[int, float, int]:
+    """Run the actor with local storage.
+
+    With `shards` above 1, one process per shard runs concurrently on the same
+    storage, each reading its input from the `INPUT-SHARD-<index>` record.
+
+    Returns:
+        Exit code (the first non-zero one), wall time in seconds and peak RSS
+        in bytes of the actor and the browser processes it waited for, summed
+        over the shards.
+    """
+    input_dir = storage_dir / 'key_value_stores' / 'default'
+    input_dir.mkdir(parents=True)
+    env = {
+        **os.environ,
+        'CRAWLEE_STORAGE_DIR': str(storage_dir),
+        'APIFY_LOCAL_STORAGE_DIR': str(storage_dir),
+        'APIFY_HEADLESS': '1',
+    }
+    inputs = {'actor': ('INPUT', settings)}
+    if shards > 1:
+        # Shards share the storage, so none of them may purge it on start
+        env['CRAWLEE_PURGE_ON_START'] = '0'
+        inputs = {
+            f'actor-shard-{i}': (
+                f'INPUT-SHARD-{i}',
+                {**settings, 'shardCount': shards, 'shardIndex': i},
+            )
+            for i in range(shards)
+        }
+
+    with contextlib.ExitStack() as stack:
+        started = time.perf_counter()
+        processes = []
+        for log_name, (input_key, shard_settings) in inputs.items():
+            (input_dir / f'{input_key}.json').write_text(json.dumps(shard_settings))
+            log = stack.enter_context(open(storage_dir / f'{log_name}.log', 'wb'))
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'src'],
+                cwd=ACTOR_DIR,
+                env={**env, 'ACTOR_INPUT_KEY': input_key},
+                stdout=log,
+                stderr=log,
+            )
+            # os.kill instead of process.kill, which would reap the process before wait4
+            timer = threading.Timer(timeout_secs, os.kill, (process.pid, signal.SIGKILL))
+            timer.start()
+            stack.callback(timer.cancel)
+            processes.append((process, timer))
+
+        exit_code, peak_rss = 0, 0
+        for process, timer in processes:
+            # wait4 reports the peak RSS of this run only, unlike RUSAGE_CHILDREN
+            _, status, usage = os.wait4(process.pid, 0)
+            timer.cancel()
+            process.returncode = os.waitstatus_to_exitcode(status)
+            exit_code = exit_code or process.returncode
+            peak_rss += usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+        elapsed = time.perf_counter() - started
+    return exit_code, elapsed, peak_rss
+
+
+def _read_metrics(kvs_dir: Path) -> dict[str, dict[str, float]]:
+    """Parse the metrics snapshot, summing the `METRICS-SHARD-<index>` snapshots of shards."""
+    metrics: dict[str, dict[str, float]] = {}
+    for path in kvs_dir.glob('METRICS*'):
+        if path.name.endswith('__metadata__.json'):
+            continue
+        for name, samples in parse_prometheus(path.read_text()).items():
+            totals = metrics.setdefault(name, {})
+            for labels, value in samples.items():
+                totals[labels] = totals.get(labels, 0) + value
+    return metrics
+
+
+def _count_items(storage_dir: Path, dataset_name: str | None) -> int:
+    dataset_dir = storage_dir / 'datasets' / (dataset_name or 'default')
+    if not dataset_dir.exists():
+        return 0
+    return sum(1 for path in dataset_dir.glob('*.json') if path.name != '__metadata__.json')
+
+
+def run_suite_once(
+    suite: dict,
+    timeout_secs: float,
+    keep_storage: bool,
+    shards: int = 1,
+    hosts: int = 1,
+) -> dict:
+    """Run a suite once and collect its measurements."""
+    settings = dict(suite['settings'])
+    settings.setdefault('metricsIntervalSecs', DEFAULT_METRICS_INTERVAL_SECS)
+    settings.setdefault('headless', True)
+    if shards > 1:
+        settings.setdefault('keyValueStoreName', 'load-test')
+    storage_dir = Path(tempfile.mkdtemp(prefix=f'load-test-{suite["slug"]}-'))
+    try:
+        with contextlib.ExitStack() as stack:
+            sites = [
+                stack.enter_context(SyntheticSite(suite['site'], host=f'127.0.0.{i + 1}'))
+                for i in range(hosts)
+            ]
+            settings['startUrls'] = [{'url': f'{site.origin}/'} for site in sites]
+            exit_code, elapsed, peak_rss = run_actor(settings, storage_dir, timeout_secs, shards)
+            site_requests = sum(site.requests for site in sites)
+
+        kvs_name = settings.get('keyValueStoreName') or 'default'
+        metrics = _read_metrics(storage_dir / 'key_value_stores' / kvs_name)
+        pages = metrics.get('contextractor_pages_total', {})
+        handled = sum(pages.values())
+        durations = metrics.get('contextractor_page_duration_seconds_bucket', {})
+        p95 = histogram_quantile(durations, 0.95)
+        if exit_code != 0:
+            for log_path in sorted(storage_dir.glob('actor*.log')):
+                log_tail = log_path.read_text(errors='replace')[-4000:]
+                print(
+                    f'[{suite["slug"]}] {log_path.stem} exited with {exit_code}:\n{log_tail}',
+                    file=sys.stderr,
+                )
+        return {
+            'exitCode': exit_code,
+            'pages': handled,
+            'stored': pages.get('status="stored"', 0),
+            'failedRequests': sum(metrics.get('contextractor_requests_failed_total', {}).values()),
+            'items': _count_items(storage_dir, settings.get('datasetName')),
+            'siteRequests': site_requests,
+            'wallSecs': round(elapsed, 2),
+            'pagesPerSec': round(handled / elapsed, 3) if elapsed else 0,
+            'p95HandlerMs': round(p95 * 1000, 1) if p95 is not None else None,
+            'peakRssMb': round(peak_rss / 2**20, 1),
+        }
+    finally:
+        if keep_storage:
+            print(f'[{suite["slug"]}] storage kept in {storage_dir}', file=sys.stderr)
+        else:
+            shutil.rmtree(storage_dir, ignore_errors=True)
+
+
+def _median(values: list) -> float | None:
+    present = [value for value in values if value is not None]
+    return round(statistics.median(present), 3) if present else None
+
+
+def check_expectations(result: dict, expect: dict) -> list[str]:
+    """Return failed expectations of a run."""
+    failures = []
+    if result['exitCode'] != 0:
+        failures.append(f'exit code {result["exitCode"]}')
+    if 'minItems' in expect and result['items'] < expect['minItems']:
+        failures.append(f'{result["items"]} items < minItems {expect["minItems"]}')
+    if 'maxItems' in expect and result['items'] > expect['maxItems']:
+        failures.append(f'{result["items"]} items > maxItems {expect["maxItems"]}')
+    return failures
+
+
+def _commit() -> str | None:
+    completed = subprocess.run(
+        ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True
+    )
+    return completed.stdout.strip() or None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--suite', action='append', default=[], help='Suite slug to run')
+    parser.add_argument('--all', action='store_true', help='Run all suites')
+    parser.add_argument('--runs', type=int, default=1, help='Runs per suite')
+    parser.add_argument('--timeout-secs', type=float, default=600, help='Timeout per run')
+    parser.add_argument('--keep-storage', action='store_true', help='Keep the local storage')
+    parser.add_argument('--shards', type=int, default=1, help='Actor processes sharing the crawl')
+    parser.add_argument('--hosts', type=int, default=1, help='Loopback hosts serving the site')
+    parser.add_argument('--dry-run', action='store_true', help='Show suites without running')
+    args = parser.parse_args()
+
+    slugs = list_suites() if args.all or not args.suite else args.suite
+    if args.dry_run or not (args.all or args.suite):
+        for slug in slugs:
+            suite = load_suite(slug)
+            print(f'{slug}: {suite["description"].splitlines()[2]}')
+            print(f'    {suite["site"].page_count} pages, {suite["site"]}')
+        return
+
+    commit = _commit()
+    failed = False
+    for slug in slugs:
+        suite = load_suite(slug)
+        runs = [
+            run_suite_once(suite, args.timeout_secs, args.keep_storage, args.shards, args.hosts)
+            for _ in range(args.runs)
+        ]
+        failures = [failure for run in runs for failure in check_expectations(run, suite['expect'])]
+        failed = failed or bool(failures)
+        summary = {key: _median([run[key] for run in runs]) for key in runs[0] if key != 'exitCode'}
+        print(json.dumps({
+            'suite': slug,
+            'commit': commit,
+            'runs': args.runs,
+            'shards': args.shards,
+            'hosts': args.hosts,
+            **summary,
+            'passed': not failures,
+            **({'failures': failures} if failures else {}),
+        }), flush=True)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
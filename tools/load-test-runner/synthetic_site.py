@@ -0,0 +1,269 @@
+"""Synthetic website for offline crawl load tests.
+
+Pages form a tree: `/` links to `/p/0` ... `/p/{fan_out - 1}`, which link to
+`/p/0/0` and so on down to `depth`. Text, JS rendering and errors are derived
+from a hash of the seed and the path, so the same parameters always serve the
+same site and results stay comparable between commits.
+
+Run standalone to browse the site:
+
+    python tools/load-test-runner/synthetic_site.py --fan-out 3 --depth 2 --port 8080
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import html
+import json
+import random
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_WORDS = (
+    'crawler extraction content page article section paragraph network request '
+    'browser render queue storage dataset value record latency throughput memory '
+    'template boilerplate navigation footer header sidebar language document text '
+    'structure element attribute selector link anchor sitemap index archive '
+    'report metric sample measure compare result commit change release version '
+    'system process worker thread event loop handler parser tree node branch leaf '
+    'the a of and to in for with on by from at as is are was be this that which'
+).split()
+
+
+@dataclass(frozen=True)
+class SiteConfig:
+    """Shape of the synthetic site.
+
+    Args:
+        fan_out: Child pages linked from each page.
+        depth: Depth of the deepest pages (the root is depth 0).
+        page_size_kb: Approximate size of the article text per page.
+        latency_ms: Delay before each response.
+        js_rendered_ratio: Share of pages whose article and links are rendered by script.
+        render_delay_ms: Delay of the script rendering (0 renders on DOMContentLoaded).
+        error_rate: Share of pages (never the root) answering with HTTP 500.
+        seed: Seed of the page texts and of the JS/error page selection.
+    """
+
+    fan_out: int = 5
+    depth: int = 2
+    page_size_kb: int = 10
+    latency_ms: int = 0
+    js_rendered_ratio: float = 0.0
+    render_delay_ms: int = 0
+    error_rate: float = 0.0
+    seed: int = 1
+
+    @classmethod
+    def from_dict(cls, data: dict) -> SiteConfig:
+        """Build from camelCase keys as used in `site.json`."""
+        names = {_camel_case(f.name): f.name for f in fields(cls)}
+        unknown = set(data) - set(names)
+        if unknown:
+            raise ValueError(f'Unknown site options: {", ".join(sorted(unknown))}')
+        return cls(**{names[key]: value for key, value in data.items()})
+
+    @property
+    def page_count(self) -> int:
+        """Number of pages in the site."""
+        return sum(self.fan_out**level for level in range(self.depth + 1))
+
+
+def _camel_case(name: str) -> str:
+    first, *rest = name.split('_')
+    return first + ''.join(part.title() for part in rest)
+
+
+def _fraction(config: SiteConfig, kind: str, path: str) -> float:
+    digest = hashlib.sha1(f'{config.seed}:{kind}:{path}'.encode()).digest()
+    return int.from_bytes(digest[:4], 'big') / 2**32
+
+
+def _parse_path(path: str) -> tuple[int, ...] | None:
+    if path == '/':
+        return ()
+    parts = path.strip('/').split('/')
+    if parts[0] != 'p' or len(parts) < 2 or not all(p.isdigit() for p in parts[1:]):
+        return None
+    return tuple(int(p) for p in parts[1:])
+
+
+def _page_path(node: tuple[int, ...]) -> str:
+    return '/p/' + '/'.join(map(str, node)) if node else '/'
+
+
+def _paragraphs(rng: random.Random, size: int) -> list[str]:
+    paragraphs, total = [], 0
+    while total < size:
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            words = rng.choices(_WORDS, k=rng.randint(8, 20))
+            sentences.append(' '.join(words).capitalize() + '.')
+        paragraph = ' '.join(sentences)
+        paragraphs.append(paragraph)
+        total += len(paragraph)
+    return paragraphs
+
+
+def render_page(config: SiteConfig, node: tuple[int, ...]) -> str:
+    """Render the HTML of a page."""
+    path = _page_path(node)
+    rng = random.Random(f'{config.seed}:{path}')
+    title = f'Page {path}'
+    paragraphs = _paragraphs(rng, config.page_size_kb * 1024)
+    children = []
+    if len(node) < config.depth:
+        children = [_page_path((*node, i)) for i in range(config.fan_out)]
+
+    nav = '<nav><a href="/">Home</a></nav>'
+    footer = '<footer><p>Synthetic site for load tests. All rights reserved.</p></footer>'
+    head = f'<head><meta charset="utf-8"><title>{html.escape(title)}</title></head>'
+
+    if _fraction(config, 'js', path) < config.js_rendered_ratio:
+        data = json.dumps({'title': title, 'paragraphs': paragraphs, 'links': children})
+        data = data.replace('</', '<\\/')
+        trigger = (
+            f'setTimeout(render, {config.render_delay_ms})'
+            if config.render_delay_ms
+            else "document.addEventListener('DOMContentLoaded', render)"
+        )
+        script = f"""<script>
+const data = {data};
+function render() {{
+    const main = document.getElementById('app');
+    const h1 = document.createElement('h1');
+    h1.textContent = data.title;
+    main.append(h1);
+    for (const text of data.paragraphs) {{
+        const p = document.createElement('p');
+        p.textContent = text;
+        main.append(p);
+    }}
+    const ul = document.createElement('ul');
+    for (const href of data.links) {{
+        const a = document.createElement('a');
+        a.href = href;
+        a.textContent = 'Read ' + href;
+        const li = document.createElement('li');
+        li.append(a);
+        ul.append(li);
+    }}
+    main.append(ul);
+}}
+{trigger};
+</script>"""
+        body = f'{nav}<main id="app"></main>{footer}{script}'
+    else:
+        article = ''.join(f'<p>{html.escape(text)}</p>' for text in paragraphs)
+        links = ''.join(f'<li><a href="{href}">Read {href}</a></li>' for href in children)
+        body = f'{nav}<main><article><h1>{html.escape(title)}</h1>{article}</article>'
+        body += f'<ul>{links}</ul></main>{footer}'
+    return f'<!DOCTYPE html><html lang="en">{head}<body>{body}</body></html>'
+
+
+def iter_pages(config: SiteConfig, node: tuple[int, ...] = ()) -> Iterator[str]:
+    """Yield paths of all pages, depth first."""
+    yield _page_path(node)
+    if len(node) < config.depth:
+        for i in range(config.fan_out):
+            yield from iter_pages(config, (*node, i))
+
+
+def render_sitemap(config: SiteConfig, origin: str) -> str:
+    """Render an XML sitemap of all pages."""
+    urls = ''.join(f'<url><loc>{origin}{path}</loc></url>' for path in iter_pages(config))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+    )
+
+
+class SyntheticSite:
+    """Serve a synthetic site on a local port from a background thread.
+
+    Use as a context manager; `origin` is available after entering.
+    """
+
+    def __init__(self, config: SiteConfig, host: str = '127.0.0.1', port: int = 0) -> None:
+        self.config = config
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def origin(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self) -> SyntheticSite:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                with site._lock:
+                    site.requests += 1
+                config = site.config
+                if config.latency_ms:
+                    time.sleep(config.latency_ms / 1000)
+
+                path = self.path.split('?', 1)[0].split('#', 1)[0]
+                node = _parse_path(path)
+                exists = node is not None and len(node) <= config.depth and all(
+                    i < config.fan_out for i in node
+                )
+                if path == '/sitemap.xml':
+                    self._respond(200, 'application/xml', render_sitemap(config, site.origin))
+                elif not exists:
+                    self._respond(404, 'text/html', '<h1>Not found</h1>')
+                elif node and _fraction(config, 'error', path) < config.error_rate:
+                    self._respond(500, 'text/html', '<h1>Internal server error</h1>')
+                else:
+                    self._respond(200, 'text/html', render_page(config, node))
+
+            def _respond(self, status: int, content_type: str, body: str) -> None:
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *_: object) -> None:
+                pass
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8080)
+    for field in fields(SiteConfig):
+        option = '--' + field.name.replace('_', '-')
+        parser.add_argument(option, type=type(field.default), default=field.default)
+    args = vars(parser.parse_args())
+    port = args.pop('port')
+    config = SiteConfig(**args)
+    with SyntheticSite(config, port=port) as site:
+        print(f'Serving {config.page_count} pages on {site.origin}')
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()